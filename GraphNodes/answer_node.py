@@ -1,22 +1,15 @@
-import asyncio
 import logging
 from state import AgentState
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from utils import get_llm
+from resources import registry
 
 # ---------------------------------------------------------------------
 # Setup Logging
 # ---------------------------------------------------------------------
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-# Optional: File handler for logs
-file_handler = logging.FileHandler("logs/synthesis_node.log")
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+logger.setLevel(logging.INFO)  # file output: tracing.configure_logging()
 
 # ---------------------------------------------------------------------
 # Prompt Template
@@ -58,10 +51,10 @@ two sources of context to help you answer.
 # Chain Initialization
 # ---------------------------------------------------------------------
 synthesis_prompt = ChatPromptTemplate.from_template(SYNTHESIS_PROMPT_TEMPLATE)
-llm = get_llm(temperature=0.2)
-synthesis_chain = synthesis_prompt | llm | StrOutputParser()
 
-logger.info("✅ Synthesis chain initialized successfully.")
+@registry.resource("synthesis_chain")
+def synthesis_chain():
+    return synthesis_prompt | get_llm(temperature=0.2) | StrOutputParser()
 
 # ---------------------------------------------------------------------
 # Async Node Function
@@ -87,11 +80,13 @@ async def synthesize_answer_node(state: AgentState) -> dict:
     logger.debug(f"Graph context: {g_context[:120]}...")
 
     try:
-        # Run the synchronous LLM chain in a separate thread
-        answer = await asyncio.to_thread(
-            synthesis_chain.invoke,
+        # Stream the completion so LangGraph's "messages" mode can forward tokens as they arrive
+        chunks = []
+        async for chunk in synthesis_chain().astream(
             {"question": question, "vector_context": v_context, "graph_context": g_context}
-        )
+        ):
+            chunks.append(chunk)
+        answer = "".join(chunks)
         logger.info("✅ Synthesis complete.")
         return {"answer": answer}
 
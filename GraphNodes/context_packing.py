@@ -0,0 +1,188 @@
+import json
+import logging
+from typing import List, Optional, Tuple
+
+import config
+from state import AgentState
+from tracing import set_attr, metrics
+from resources import registry
+
+# ---------------------------------------------------------------------
+# Logging setup
+# ---------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# ---------------------------------------------------------------------
+# 1. Token counting
+# ---------------------------------------------------------------------
+@registry.resource("token_encoding")
+def token_encoding():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(config.LLM_MODEL_NAME)
+    except Exception:  # tiktoken missing, or its BPE file cannot be downloaded
+        logger.warning("tiktoken unavailable; estimating tokens as characters / 4.")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = token_encoding()
+    return len(enc.encode(text)) if enc is not None else (len(text) + 3) // 4
+
+# ---------------------------------------------------------------------
+# 2. Parsing and merging
+# ---------------------------------------------------------------------
+# Column order of the packed tables; other fields follow in first-seen order.
+COLUMNS = ["id", "name", "type", "city", "region", "tags", "best_time_to_visit", "description"]
+HIDDEN = {"score"}          # used for ranking, not shown to the LLM
+GRAPH_RELEVANCE = 1.0       # graph records are exact matches for the question
+BOTH_BONUS = 0.5            # found by both retrievers
+REPEAT_MIN_CHARS = 40       # longer cell texts repeated from an earlier row become a back-reference
+
+
+def parse_records(context: str) -> Optional[List[dict]]:
+    """Records from a retrieval context, or None when it is prose / an error / empty."""
+    try:
+        data = json.loads(context)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, list) or not all(isinstance(r, dict) for r in data):
+        return None
+    if any("error" in r for r in data):
+        return None
+    return data
+
+
+def merge_records(vector: List[dict], graph: List[dict]) -> Tuple[List[Tuple[float, dict]], List[Tuple[float, dict]]]:
+    """
+    Deduplicate by `id`: an entity found by both retrievers is kept once, in the graph
+    rows, with fields from both. Returns (graph_rows, vector_rows) as (relevance, record).
+    """
+    vector_by_id = {r["id"]: r for r in vector if r.get("id")}
+    graph_rows, seen = [], set()
+    for record in graph:
+        rid = record.get("id")
+        if rid is not None and rid in seen:
+            continue  # e.g. entity_attributes with several cities
+        relevance = GRAPH_RELEVANCE
+        match = vector_by_id.get(rid) if rid is not None else None
+        if match is not None:
+            record = {**match, **{k: v for k, v in record.items() if v not in (None, "", [])}}
+            relevance += BOTH_BONUS + float(match.get("score", 0.0))
+        if rid is not None:
+            seen.add(rid)
+        graph_rows.append((relevance, record))
+
+    vector_rows = [(float(r.get("score", 0.0)), r) for r in vector if r.get("id") not in seen]
+    return graph_rows, vector_rows
+
+# ---------------------------------------------------------------------
+# 3. Compact rendering
+# ---------------------------------------------------------------------
+def _cell(value, max_chars: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    text = " ".join(str(value).replace("|", "/").split())
+    return text if len(text) <= max_chars else text[: max_chars - 1].rstrip() + "…"
+
+
+def _columns(records: List[dict]) -> List[str]:
+    present = []
+    for r in records:
+        for key, value in r.items():
+            if key not in present and key not in HIDDEN and value not in (None, "", []):
+                present.append(key)
+    return [c for c in COLUMNS if c in present] + [c for c in present if c not in COLUMNS]
+
+
+def render_table(rows: List[Tuple[float, dict]], budget: int,
+                 max_chars: int = config.CONTEXT_DESCRIPTION_MAX_CHARS) -> Tuple[str, int]:
+    """
+    Pipe-separated table (header once, one line per record, values shared by every
+    record stated once, repeated long texts referenced), most relevant rows first, stopping before `budget` tokens.
+    Returns (table, tokens used).
+    """
+    if not rows:
+        return "", 0
+    ranked = [r for _, r in sorted(rows, key=lambda x: -x[0])]  # stable: ties keep retrieval order
+    columns = _columns(ranked)
+    lines = []
+    if len(ranked) > 1:
+        # A value shared by every row (e.g. type=Attraction, city=Hue) is stated once above the table
+        shared = [c for c in columns if len({_cell(r.get(c), max_chars) for r in ranked}) == 1]
+        if shared and len(shared) < len(columns):
+            lines.append("all: " + "; ".join(f"{c}={_cell(ranked[0].get(c), max_chars)}" for c in shared))
+            columns = [c for c in columns if c not in shared]
+    lines.append(" | ".join(columns))
+    used = sum(count_tokens(line) for line in lines)
+    first_seen = {}  # long cell text -> id of the first row that had it
+    for i, record in enumerate(ranked):
+        cells = []
+        for c in columns:
+            text = _cell(record.get(c), max_chars)
+            if len(text) > REPEAT_MIN_CHARS and text in first_seen:
+                text = f"(same as {first_seen[text]})"
+            elif len(text) > REPEAT_MIN_CHARS and record.get("id"):
+                first_seen[text] = record["id"]
+            cells.append(text)
+        line = " | ".join(cells)
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            lines.append(f"({len(ranked) - i} less relevant records omitted)")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines), used
+
+
+def pack_contexts(vector_context: str, graph_context: str,
+                  budget: int = config.CONTEXT_TOKEN_BUDGET) -> Tuple[str, str]:
+    """
+    Compact both retrieval contexts. Contexts that are not record lists (graph prose,
+    "no records" messages, errors) are passed through unchanged.
+    """
+    vector = parse_records(vector_context) if vector_context else None
+    graph = parse_records(graph_context) if graph_context else None
+    if vector is None and graph is None:
+        return vector_context, graph_context
+
+    graph_rows, vector_rows = merge_records(vector or [], graph or [])
+    if graph is None:
+        packed_vector, _ = render_table(vector_rows, budget)
+        return packed_vector, graph_context
+
+    # Graph records are the exact answer, so they get the budget first
+    packed_graph, used = render_table(graph_rows, budget)
+    if vector is None:
+        return vector_context, packed_graph
+    packed_vector, _ = render_table(vector_rows, max(budget - used, 0))
+    return packed_vector, packed_graph
+
+# ---------------------------------------------------------------------
+# 4. Async Node Function
+# ---------------------------------------------------------------------
+async def pack_context_node(state: AgentState) -> dict:
+    """
+    Sits between retrieval and synthesis: deduplicates entities by id, renders them as
+    compact tables and trims to CONTEXT_TOKEN_BUDGET, logging the prompt tokens saved.
+    """
+    v_context = state.get("vector_search_context", "")
+    g_context = state.get("graph_search_context", "")
+    if not v_context and not g_context:
+        return {}
+
+    packed_v, packed_g = pack_contexts(v_context, g_context)
+    before = count_tokens(v_context) + count_tokens(g_context)
+    after = count_tokens(packed_v) + count_tokens(packed_g)
+    saved = before - after
+    logger.info(
+        f"Context packing ({state.get('router_decision', '')}): {before} -> {after} tokens "
+        f"({saved / before:.0%} saved)" if before else "Context packing: empty context"
+    )
+    set_attr("context.tokens_before", before)
+    set_attr("context.tokens_after", after)
+    metrics.inc("travel_context_tokens_saved_total", saved, {"route": state.get("router_decision", "")})
+    return {"vector_search_context": packed_v, "graph_search_context": packed_g}
@@ -1,38 +1,33 @@
-import asyncio
+import json
 import logging
+from typing import Optional
 import config
-from langchain_neo4j import Neo4jGraph, GraphCypherQAChain
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from state import AgentState
 from utils import get_llm
+from resources import registry, graph_schema
+from neo4j_access import run_read
+from graph_snapshot import current_snapshot
+from tracing import set_attr, metrics
+from executors import run_blocking
+from GraphNodes.cypher_templates import (
+    TEMPLATES, CypherCache, match_template, extract_cypher, is_read_only,
+)
 
 # ---------------------------------------------------------------------
 # Logging setup
 # ---------------------------------------------------------------------
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-file_handler = logging.FileHandler("logs/graph_cypher_node.log")
-file_handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())  # Also log to console
+logger.setLevel(logging.INFO)  # file output: tracing.configure_logging()
 
 # ---------------------------------------------------------------------
-# 1. Initialize Neo4j Graph
+# 1. Neo4j Graph
 # ---------------------------------------------------------------------
-logger.info("Initializing Neo4jGraph client...")
-
-try:
-    graph = Neo4jGraph(
-        url=config.NEO4J_URI,
-        username=config.NEO4J_USERNAME,
-        password=config.NEO4J_PASSWORD,
-        enhanced_schema=True,
-    )
-    logger.info("✅ Neo4jGraph client initialized successfully.")
-except Exception as e:
-    logger.exception("❌ Error connecting to Neo4j or refreshing schema.")
-    raise SystemExit("Failed to initialize Neo4j. Please check config.py credentials.")
+# Template queries are answered from the in-process graph snapshot (graph_snapshot.py)
+# when possible; everything else runs in read transactions on the shared, pooled
+# driver (neo4j_access.py).
+# `graph_schema()` is the enhanced schema for the generation prompt, cached on disk.
 
 # ---------------------------------------------------------------------
 # 2. Cypher Generation Prompt
@@ -65,29 +60,77 @@ cypher_prompt = ChatPromptTemplate.from_messages([
 ])
 
 # ---------------------------------------------------------------------
-# 3. Create GraphCypherQAChain
+# 3. Cypher Generation Chain (generation only; records go straight to synthesis)
 # ---------------------------------------------------------------------
-try:
-    llm = get_llm(temperature=0.0)
-    cypher_qa_chain = GraphCypherQAChain.from_llm(
-        llm=llm,
-        graph=graph,
-        cypher_prompt=cypher_prompt,
-        verbose=True,  # Set to False for cleaner logs in production
-        allow_dangerous_requests=True,
-    )
-    logger.info("✅ GraphCypherQAChain initialized successfully.")
-except Exception as e:
-    logger.exception("❌ Failed to initialize GraphCypherQAChain.")
-    raise SystemExit("Failed to initialize Cypher chain.")
+@registry.resource("cypher_generation_chain")
+def cypher_generation_chain():
+    return cypher_prompt | get_llm(temperature=0.0) | StrOutputParser()
+
+MAX_RECORDS = 50  # records passed on to synthesis
+cypher_cache = CypherCache(config.CYPHER_CACHE_PATH)
 
 # ---------------------------------------------------------------------
-# 4. Async Node Function
+# 4. Query Resolution: template → cached Cypher → LLM-generated Cypher
+# ---------------------------------------------------------------------
+def resolve_query(question: str) -> tuple[str, dict, str]:
+    """Return (cypher, params, source) where source is 'template', 'cache' or 'llm'."""
+    matched = match_template(question)
+    if matched is not None:
+        name, params = matched
+        return TEMPLATES[name], params, f"template:{name}"
+
+    cached = cypher_cache.get(question)
+    if cached is not None:
+        return cached, {}, "cache"
+
+    generated = cypher_generation_chain().invoke({"schema": graph_schema(), "query": question})
+    return extract_cypher(generated), {}, "llm"
+
+
+def snapshot_query(question: str) -> Optional[tuple[list, str]]:
+    """(records, source) from the graph snapshot, or None when Neo4j has to answer."""
+    if not config.GRAPH_SNAPSHOT_ENABLED:
+        return None
+    matched = match_template(question)
+    if matched is None:
+        return None
+    name, params = matched
+    try:
+        records = current_snapshot().run_template(name, params)
+    except Exception:
+        logger.exception("Graph snapshot unavailable; falling back to Neo4j.")
+        return None
+    if records is None:
+        return None
+    return records[:MAX_RECORDS], f"snapshot:{name}"
+
+
+def run_graph_query(question: str) -> tuple[list, str]:
+    cypher, params, source = resolve_query(question)
+    set_attr("cypher.source", source)
+    metrics.inc("travel_cypher_source_total", labels={"source": source.split(":")[0]})
+    logger.info(f"Cypher source: {source}")
+    logger.info(f"Cypher: {cypher}")
+    if not is_read_only(cypher):
+        raise ValueError("Generated Cypher contains write clauses; refusing to run it.")
+    try:
+        records = run_read(cypher, params, name=source)
+    except Exception:
+        if source == "cache":
+            cypher_cache.discard(question)
+        raise
+    if source == "llm":
+        cypher_cache.put(question, cypher)
+    return records[:MAX_RECORDS], source
+
+# ---------------------------------------------------------------------
+# 5. Async Node Function
 # ---------------------------------------------------------------------
 async def call_cypher_node(state: AgentState) -> dict:
     """
-    Asynchronous version of the GraphCypherQAChain node.
-    Translates user question → Cypher → executes → natural language answer.
+    Asynchronous graph search node.
+    Resolves the question to Cypher (template, cache or LLM), executes it and
+    returns the raw records as JSON for the synthesis node.
     """
     question = state.get("question", "")
     logger.info(f"--- Executing Cypher Node for question: '{question}' ---")
@@ -97,15 +140,22 @@ async def call_cypher_node(state: AgentState) -> dict:
         return {"graph_search_context": "No question provided."}
 
     try:
-        # Run blocking chain in background thread
-        result = await asyncio.to_thread(cypher_qa_chain.invoke, {"query": question})
-
-        # Extract human-readable result
-        answer = result.get("result", "No answer found from graph.")
-        logger.info(f"✅ Cypher execution completed. Answer: {answer[:100]}...")
-
-        return {"graph_search_context": str(answer)}
+        # Template traversals are answered in-process; anything else goes to Neo4j
+        # (and possibly the LLM) in a background thread
+        answered = snapshot_query(question)
+        if answered is not None:
+            records, source = answered
+            set_attr("cypher.source", source)
+            metrics.inc("travel_cypher_source_total", labels={"source": "snapshot"})
+        else:
+            records, source = await run_blocking("neo4j", run_graph_query, question)
+        set_attr("graph.records", len(records))
+        logger.info(f"✅ Cypher execution completed via {source}: {len(records)} records.")
+
+        if not records:
+            return {"graph_search_context": "No matching records found in the graph."}
+        return {"graph_search_context": json.dumps(records, ensure_ascii=False, default=str)}
 
     except Exception as e:
-        logger.exception("❌ Error during Cypher QA chain execution.")
+        logger.exception("❌ Error during Cypher query execution.")
         return {"graph_search_context": f"Error running graph query: {e}"}
\ No newline at end of file
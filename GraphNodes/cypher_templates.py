@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from catalog_index import get_catalog_index
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# 1. Parameterized Cypher templates for the common question shapes
+# ---------------------------------------------------------------------
+ENTITY_FIELDS = "e.id AS id, e.name AS name, e.type AS type, e.description AS description, e.tags AS tags"
+
+TEMPLATES = {
+    "hotels_in_city": (
+        "MATCH (e:Hotel)-[:Located_In]->(c:City {name: $city}) "
+        f"RETURN {ENTITY_FIELDS}, c.name AS city ORDER BY e.name LIMIT $limit"
+    ),
+    "attractions_in_city": (
+        "MATCH (e:Attraction)-[:Located_In]->(c:City {name: $city}) "
+        f"RETURN {ENTITY_FIELDS}, c.name AS city ORDER BY e.name LIMIT $limit"
+    ),
+    "activities_in_city": (
+        "MATCH (e:Activity)-[:Available_In]->(c:City {name: $city}) "
+        f"RETURN {ENTITY_FIELDS}, c.name AS city ORDER BY e.name LIMIT $limit"
+    ),
+    "connected_cities": (
+        "MATCH (c:City {name: $city})-[:Connected_To]-(e:City) "
+        "RETURN DISTINCT e.id AS id, e.name AS name, e.region AS region, e.tags AS tags "
+        "ORDER BY e.name LIMIT $limit"
+    ),
+    "entity_attributes": (
+        "MATCH (e:Entity {id: $id}) "
+        "OPTIONAL MATCH (e)-[:Located_In|Available_In]->(c:City) "
+        f"RETURN {ENTITY_FIELDS}, e.region AS region, e.best_time_to_visit AS best_time_to_visit, "
+        "c.name AS city"
+    ),
+    "entity_neighbourhood": (
+        "MATCH (e:Entity {id: $id})-[*1..2]-(n:Entity) WHERE n <> e "
+        "RETURN DISTINCT n.id AS id, n.name AS name, n.type AS type ORDER BY n.name LIMIT $limit"
+    ),
+    "route_between_cities": (
+        "MATCH (a:City {name: $from_city}), (b:City {name: $to_city}) "
+        "MATCH p = shortestPath((a)-[:Connected_To*..6]-(b)) "
+        "RETURN [n IN nodes(p) | n.name] AS route, length(p) AS hops"
+    ),
+    # Used by the fused retrieval node (not matched from questions): for each vector hit,
+    # its city, up to $per_seed entities in that city and the cities connected to it.
+    "seed_neighbourhoods": (
+        "UNWIND $ids AS seed "
+        "MATCH (e:Entity {id: seed}) "
+        "OPTIONAL MATCH (e)-[:Located_In|Available_In]->(home:City) "
+        "WITH seed, e, CASE WHEN e:City THEN e ELSE home END AS city "
+        "OPTIONAL MATCH (city)<-[:Located_In|Available_In]-(local:Entity) WHERE local <> e "
+        "WITH seed, e, city, local ORDER BY local.name "
+        "WITH seed, e, city, collect(DISTINCT local)[..$per_seed] AS locals "
+        "OPTIONAL MATCH (city)-[:Connected_To]-(next:City) "
+        "WITH seed, e, city, locals, next ORDER BY next.name "
+        "WITH seed, e, city, locals, collect(DISTINCT next) AS nexts "
+        "RETURN seed, e {.id, .name, .type, .description, .tags} AS entity, "
+        "city {.id, .name, .type, .description, .tags} AS city, "
+        "[n IN locals | n {.id, .name, .type, .description, .tags}] AS nearby, "
+        "[n IN nexts | n {.id, .name, .type, .description, .tags}] AS connected"
+    ),
+}
+
+TYPE_TEMPLATES = {
+    "Hotel": "hotels_in_city",
+    "Attraction": "attractions_in_city",
+    "Activity": "activities_in_city",
+}
+
+CONNECTION_RE = re.compile(r"\b(connected|connection|connects|linked|get (to|from)|travel (to|from)|near|nearby)\b", re.IGNORECASE)
+ROUTE_RE = re.compile(r"\b(route|path|way|between|from .+ to|get (to|from)|travel (to|from)|go (to|from))\b", re.IGNORECASE)
+NEARBY_RE = re.compile(r"\b(near|nearby|what('?s| is) around|close to|next to|surrounding)\b", re.IGNORECASE)
+
+DEFAULT_LIMIT = 50
+
+
+def match_template(question: str) -> Optional[Tuple[str, dict]]:
+    """
+    Map a question to (template name, parameters) using the local catalog index,
+    or return None when it does not fit one of the known shapes.
+    """
+    catalog = get_catalog_index()
+    cities = catalog.find_cities(question)
+    types = catalog.find_types(question)
+    entities = catalog.find_entities(question)
+
+    if len(cities) == 2 and ROUTE_RE.search(question) and set(types) <= {"City"} and not entities:
+        return "route_between_cities", {"from_city": cities[0], "to_city": cities[1]}
+
+    # "what is around X": X's graph neighbourhood, not X's own attributes
+    anchors = [catalog.cities[c]["id"] for c in cities] + [e["id"] for e in entities]
+    if len(anchors) == 1 and not types and NEARBY_RE.search(question):
+        return "entity_neighbourhood", {"id": anchors[0], "limit": DEFAULT_LIMIT}
+
+    if len(cities) == 1 and CONNECTION_RE.search(question) and set(types) <= {"City"} and not entities:
+        return "connected_cities", {"city": cities[0], "limit": DEFAULT_LIMIT}
+
+    listed = [t for t in types if t in TYPE_TEMPLATES]
+    if len(cities) == 1 and len(listed) == 1 and not entities:
+        return TYPE_TEMPLATES[listed[0]], {"city": cities[0], "limit": DEFAULT_LIMIT}
+
+    if len(entities) == 1 and not cities and not listed:
+        return "entity_attributes", {"id": entities[0]["id"]}
+
+    if len(cities) == 1 and not types and not entities:
+        return "entity_attributes", {"id": catalog.cities[cities[0]]["id"]}
+
+    return None
+
+
+# ---------------------------------------------------------------------
+# 2. Normalized question -> generated Cypher cache
+# ---------------------------------------------------------------------
+def normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+class CypherCache:
+    """LRU map of normalized question -> LLM-generated Cypher, persisted as JSON."""
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries.update(json.load(f))
+            except (OSError, ValueError):
+                logger.warning(f"Ignoring unreadable Cypher cache at {path}.")
+
+    def get(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            cypher = self._entries.get(key)
+            if cypher is not None:
+                self._entries.move_to_end(key)
+            return cypher
+
+    def _save(self):
+        # caller holds the lock
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def put(self, question: str, cypher: str):
+        with self._lock:
+            self._entries[normalize_question(question)] = cypher
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def discard(self, question: str):
+        with self._lock:
+            if self._entries.pop(normalize_question(question), None) is not None:
+                self._save()
+
+
+# ---------------------------------------------------------------------
+# 3. Helpers for LLM-generated Cypher
+# ---------------------------------------------------------------------
+WRITE_CLAUSE_RE = re.compile(
+    r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|LOAD\s+CSV|FOREACH)\b|\bCALL\s+(apoc|dbms|db\.create)",
+    re.IGNORECASE,
+)
+
+
+def extract_cypher(text: str) -> str:
+    """Strip markdown fences / prose the LLM may wrap around the query."""
+    fenced = re.findall(r"```(?:cypher)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    return (fenced[0] if fenced else text).strip()
+
+
+def is_read_only(cypher: str) -> bool:
+    return WRITE_CLAUSE_RE.search(cypher) is None
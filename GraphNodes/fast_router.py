@@ -0,0 +1,70 @@
+import re
+from dataclasses import dataclass
+import config
+from catalog_index import get_catalog_index
+
+# ---------------------------------------------------------------------
+# Tier-1 router: keyword + catalog-name rules, no network calls
+# ---------------------------------------------------------------------
+GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|hiya|yo|good (morning|afternoon|evening)|thanks?( you)?( so much)?|"
+    r"thank you|cheers|bye|goodbye|see you|ok(ay)?|great|cool|awesome)\b[\s!.,?]*"
+    r"(that was (very )?helpful|that helps)?[\s!.,?]*$",
+    re.IGNORECASE,
+)
+
+# Phrases asking for exact facts, lists or relations -> graph
+FACTUAL_RE = re.compile(
+    r"\b(list|which|how many|count|number of|show (me )?all|all (the )?\w+ in|"
+    r"connected|connection|located|where is|address|price|cost|best time|region|near(by)?|close to|what('?s| is) around|"
+    r"what (hotels|attractions|activities|cities))\b",
+    re.IGNORECASE,
+)
+
+# Phrases asking for descriptions, advice or similarity -> vector search
+DESCRIPTIVE_RE = re.compile(
+    r"\b(recommend\w*|suggest\w*|similar|like|vibe|describe|tell me about|what is .+ like|"
+    r"best(?! time)|good|nice|worth|ideal|romantic|family|budget|luxury|cozy|things to do|should i|"
+    r"experience|explore|scene)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class FastRoute:
+    route: str
+    confidence: float
+    reasoning: str
+
+
+def classify(question: str) -> FastRoute:
+    """
+    Cheap deterministic routing. Confidence is high only when the intent words and
+    a catalog anchor (city, entity, type or tag) agree; everything else is left to
+    the LLM router.
+    """
+    text = question.strip()
+    if not text or GREETING_RE.match(text):
+        return FastRoute("none", 0.95, "greeting / small talk")
+
+    catalog = get_catalog_index()
+    matches = catalog.match(text)
+    kinds = {kind for kind, _ in matches}
+    anchored = bool(kinds & {"city", "entity", "type", "tag"})
+    factual = bool(FACTUAL_RE.search(text))
+    descriptive = bool(DESCRIPTIVE_RE.search(text))
+
+    if not anchored:
+        return FastRoute("none", 0.3, "no catalog entities mentioned")
+    if factual and descriptive:
+        return FastRoute("both", 0.85, "factual and descriptive cues with catalog anchor")
+    if factual:
+        return FastRoute("cypher", 0.9, "factual cue with catalog anchor")
+    if descriptive:
+        return FastRoute("pinecone", 0.85, "descriptive cue with catalog anchor")
+    if config.HYBRID_SEARCH_ENABLED and kinds & {"entity", "tag"}:
+        # Exact names and tags are matched by the lexical half of the hybrid search
+        return FastRoute("pinecone", 0.8, "entity name or tag, resolved by hybrid search")
+    if "entity" in kinds and len(matches) == 1:
+        return FastRoute("cypher", 0.6, "bare entity mention")
+    return FastRoute("pinecone", 0.5, "catalog anchor without clear intent")
@@ -0,0 +1,111 @@
+import json
+import logging
+from typing import Dict, List, Tuple
+import config
+from state import AgentState
+from neo4j_access import run_read
+from graph_snapshot import current_snapshot
+from executors import run_blocking
+from tracing import set_attr
+from GraphNodes.pinecone_node import aembed_text, retrieve
+from GraphNodes.cypher_templates import TEMPLATES
+
+# ---------------------------------------------------------------------
+# Logging setup
+# ---------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # file output: tracing.configure_logging()
+
+# ---------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------
+SEED_K = 5                # vector hits whose neighbourhoods are expanded
+NEIGHBOURS_PER_SEED = 5   # entities in the same city, per hit
+HOP_DECAY = 0.5           # relevance multiplier per hop away from a hit
+
+# ---------------------------------------------------------------------
+# 1. Neighbourhood lookup (one batched query for all hits)
+# ---------------------------------------------------------------------
+async def fetch_neighbourhoods(ids: List[str]) -> Tuple[List[dict], str]:
+    """Rows of the `seed_neighbourhoods` template, from the graph snapshot or one Neo4j query."""
+    params = {"ids": ids, "per_seed": NEIGHBOURS_PER_SEED}
+    if config.GRAPH_SNAPSHOT_ENABLED:
+        try:
+            return current_snapshot().run_template("seed_neighbourhoods", params), "snapshot"
+        except Exception:
+            logger.exception("Graph snapshot unavailable; falling back to Neo4j.")
+    rows = await run_blocking("neo4j", run_read, TEMPLATES["seed_neighbourhoods"], params, "seed_neighbourhoods")
+    return rows, "neo4j"
+
+# ---------------------------------------------------------------------
+# 2. Ranking
+# ---------------------------------------------------------------------
+def rank_neighbourhoods(matches: List[dict], rows: List[dict]) -> List[dict]:
+    """
+    One deduplicated list: each vector hit keeps its fused score, its city gets
+    HOP_DECAY of it and entities in the same city / connected cities HOP_DECAY².
+    An entity reached several ways keeps its best score and the reason for it (`via`).
+    """
+    fields: Dict[str, dict] = {}
+    best: Dict[str, Tuple[float, str]] = {}
+
+    def add(entity: dict, score: float, via: str):
+        if not entity or not entity.get("id"):
+            return
+        merged = fields.setdefault(entity["id"], {})
+        merged.update({k: v for k, v in entity.items() if v not in (None, "", [])})
+        if entity["id"] not in best or score > best[entity["id"]][0]:
+            best[entity["id"]] = (score, via)
+
+    scores = {m["id"]: float(m["score"]) for m in matches}
+    for m in matches:
+        add(m.get("metadata", {}), scores[m["id"]], "match")
+    for row in rows:
+        score, entity, city = scores.get(row["seed"], 0.0), row["entity"], row["city"]
+        add(entity, score, "match")
+        if city and city["id"] != entity["id"]:
+            add(city, score * HOP_DECAY, f"city of {entity['name']}")
+        city_name = (city or {}).get("name")
+        for n in row["nearby"]:
+            add(n, score * HOP_DECAY ** 2, f"also in {city_name}")
+        for n in row["connected"]:
+            add(n, score * HOP_DECAY ** 2, f"connected to {city_name}")
+
+    ranked = sorted(best.items(), key=lambda kv: -kv[1][0])
+    return [{**fields[_id], "via": via, "score": round(score, 6)} for _id, (score, via) in ranked]
+
+# ---------------------------------------------------------------------
+# 3. Async Node Function
+# ---------------------------------------------------------------------
+async def call_fused_retrieval_node(state: AgentState) -> dict:
+    """
+    Graph-aware retrieval for "both" questions that no Cypher template covers:
+    hybrid vector search, then the hits' city, co-located entities and connected
+    cities in one batched lookup, returned as a single ranked context.
+    Replaces the separate vector search plus LLM-generated Cypher.
+    """
+    question = state.get("question", "")
+    logger.info(f"--- Executing Fused Retrieval Node for question: '{question}' ---")
+
+    if not question.strip():
+        logger.warning("⚠️ No question provided to fused retrieval node.")
+        return {"graph_search_context": "No question provided."}
+
+    try:
+        vec = await aembed_text(question)
+        matches = (await run_blocking("vector", retrieve, question, vec, SEED_K)).get("matches", [])
+        rows, source = await fetch_neighbourhoods([m["id"] for m in matches])
+        records = rank_neighbourhoods(matches, rows)
+
+        set_attr("fused.seeds", len(matches))
+        set_attr("fused.records", len(records))
+        set_attr("fused.source", source)
+        logger.info(f"✅ Fused retrieval: {len(matches)} hits expanded to {len(records)} records via {source}.")
+
+        if not records:
+            return {"graph_search_context": "No matching records found."}
+        return {"graph_search_context": json.dumps(records, ensure_ascii=False, default=str)}
+
+    except Exception as e:
+        logger.exception("❌ Error during fused retrieval.")
+        return {"graph_search_context": f"Error running graph query: {e}"}
@@ -1,61 +1,86 @@
-import asyncio
 import json
 import logging
-from typing import List
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
+from typing import List, Optional
+import numpy as np
 import config
+from resources import embed_model, vector_store
+from lexical_index import current_lexical_index, reciprocal_rank_fusion
+from reranker import rerank
+from GraphNodes.query_filters import QueryFilter, extract_filter, DEFAULT_TOP_K
+from embedding_batcher import EmbeddingBatcher
+from executors import run_blocking
 from state import AgentState
+from tracing import span, set_attr
 
 
 # ---------------------------------------------------------------------
 # Logging setup
 # ---------------------------------------------------------------------
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-file_handler = logging.FileHandler("logs/vector_search_node.log")
-file_handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())  # also log to console
+logger.setLevel(logging.INFO)  # file output: tracing.configure_logging()
 
 
 # ---------------------------------------------------------------------
 # Config & Initialization
 # ---------------------------------------------------------------------
-TOP_K = 5
-INDEX_NAME = config.PINECONE_INDEX_NAME
-PINECONE_DIM = 384  # must match model (all-MiniLM-L6-v2)
-
-logger.info("Initializing Pinecone client...")
-pc = Pinecone(api_key=config.PINECONE_API_KEY)
+TOP_K = DEFAULT_TOP_K  # adapted per question when QUERY_FILTERS_ENABLED (see query_filters.py)
 
-logger.info("Loading embedding model (all-MiniLM-L6-v2)...")
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")
+# The embedding model and vector store are built lazily (see resources.py).
 
-# Ensure index exists or create
-if INDEX_NAME not in pc.list_indexes().names():
-    logger.warning(f"Index {INDEX_NAME} not found. Creating new managed index...")
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=PINECONE_DIM,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-    )
-    logger.info(f"✅ Index {INDEX_NAME} created.")
-else:
-    logger.info(f"Connecting to existing index: {INDEX_NAME}")
+def encode_batch(texts: List[str]):
+    return embed_model().encode(texts)
 
-index = pc.Index(INDEX_NAME)
-logger.info("✅ Pinecone and embedding model initialized successfully.")
+# Concurrent requests share batched encode calls (also used by the answer cache)
+embed_batcher = EmbeddingBatcher(encode_batch)
 
 
 # ---------------------------------------------------------------------
 # Helper Functions
 # ---------------------------------------------------------------------
-def embed_text(text: str) -> List[float]:
-    """Generate embedding for text using the local model."""
-    return embed_model.encode(text).tolist()
+def query_index(vector: np.ndarray, top_k: int = TOP_K, filter: Optional[dict] = None) -> dict:
+    """Nearest-neighbour query against the configured vector store."""
+    return vector_store().query(vector=vector, top_k=top_k, filter=filter, include_metadata=True, include_values=False)
+
+
+def hybrid_query(question: str, vector: np.ndarray, top_k: int, filter: Optional[dict] = None) -> dict:
+    """
+    Vector search fused with BM25 matches over the local lexical index, so exact
+    names and tags rank first even when their embeddings are not the nearest.
+    """
+    if not config.HYBRID_SEARCH_ENABLED:
+        return query_index(vector, top_k, filter)
+    dense = query_index(vector, config.HYBRID_CANDIDATES, filter)["matches"]
+    lexical = current_lexical_index().search(question, config.HYBRID_CANDIDATES, filter)["matches"]
+    set_attr("vector.lexical_matches", len(lexical))
+    return {"matches": reciprocal_rank_fusion([dense, lexical], top_k)}
+
+
+def retrieve(question: str, vector: np.ndarray, top_k: Optional[int] = None) -> dict:
+    """
+    Hybrid search restricted to the entity types / cities / tags the question names,
+    with top_k adapted to the question. Filters no catalog entity satisfies are relaxed
+    (tags first, then all) before querying, using the local lexical index's metadata,
+    so relaxing costs no extra vector store round trip.
+    """
+    qf = extract_filter(question) if config.QUERY_FILTERS_ENABLED else QueryFilter()
+    top_k = top_k or qf.top_k
+    steps = qf.relaxations()
+    step = next(i for i, f in enumerate(steps) if f is None or current_lexical_index().count(f) > 0)
+    res = hybrid_query(question, vector, top_k, steps[step])
+    if not res["matches"] and steps[step] is not None:
+        # vector store out of sync with the catalog: search unfiltered
+        step = len(steps) - 1
+        res = hybrid_query(question, vector, top_k, None)
+    set_attr("vector.filter", qf.describe())
+    set_attr("vector.filter_relaxed", step)
+    logger.info(f"Vector filter: {qf.describe()} (relaxation step {step}), top_k={top_k}")
+    return res
+
+
+async def aembed_text(text: str) -> np.ndarray:
+    """Embed text through the micro-batcher, sharing an encode call with concurrent requests."""
+    with span("embed"):
+        return await embed_batcher.embed(text)
 
 
 # ---------------------------------------------------------------------
@@ -75,23 +100,24 @@ async def call_pinecone_node(state: AgentState) -> dict:
         return {"vector_search_context": json.dumps([{"error": "Empty question"}])}
 
     try:
-        # Run embedding in background thread (non-blocking)
-        vec = await asyncio.to_thread(embed_text, question)
-
-        # Run Pinecone query asynchronously as well
-        res = await asyncio.to_thread(
-            index.query,
-            vector=vec,
-            top_k=TOP_K,
-            include_metadata=True,
-            include_values=False,
-        )
-
-        matches = res.get("matches", [])
+        # Batched with other in-flight questions, encoded on the embedding pool
+        vec = await aembed_text(question)
+
+        # Vector query (+ local lexical search), on the vector pool
+        if config.RERANK_ENABLED:
+            # Over-fetch, then keep the candidates the cross-encoder rates relevant
+            top_k = extract_filter(question).top_k if config.QUERY_FILTERS_ENABLED else TOP_K
+            res = await run_blocking("vector", retrieve, question, vec, config.RERANK_CANDIDATES)
+            matches = await run_blocking("rerank", rerank, question, res.get("matches", []), top_k)
+        else:
+            res = await run_blocking("vector", retrieve, question, vec)
+            matches = res.get("matches", [])
+
+        set_attr("vector.matches", len(matches))
         logger.info(f"✅ Retrieved {len(matches)} matches from Pinecone.")
 
-        # Extract and format metadata for LLM
-        context_list = [m["metadata"] for m in matches]
+        # Extract and format metadata for LLM; the score lets context packing rank entries
+        context_list = [{**m["metadata"], "score": round(float(m["score"]), 4)} for m in matches]
         context_str = json.dumps(context_list, ensure_ascii=False)
 
         return {"vector_search_context": context_str}
@@ -0,0 +1,66 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+from catalog_index import get_catalog_index
+
+# ---------------------------------------------------------------------
+# Question -> vector metadata filter (type / city / tags)
+# ---------------------------------------------------------------------
+# pinecone_upload.py stores `type`, `city` (region for City entities) and `tags` with
+# every vector. Filtering on what the question names keeps TOP_K from being spent on
+# other entity types and cities, and shrinks the set the vector store has to score.
+
+DEFAULT_TOP_K = 5
+LIST_TOP_K = 10   # a filtered list question ("which hotels ...") gets more, all on-topic, results
+
+LIST_RE = re.compile(r"\b(list|all|which|what (hotels|attractions|activities|cities)|options|some)\b", re.IGNORECASE)
+
+
+@dataclass
+class QueryFilter:
+    types: List[str] = field(default_factory=list)
+    cities: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    top_k: int = DEFAULT_TOP_K
+
+    def build(self, with_tags: bool = True) -> Optional[dict]:
+        """Pinecone filter syntax (also understood by the local store and lexical index)."""
+        clauses = []
+        if self.types:
+            clauses.append({"type": {"$in": self.types}})
+        if self.cities:
+            # City entities store their region in `city`, so match them by name as well
+            clauses.append({"$or": [{"city": {"$in": self.cities}}, {"name": {"$in": self.cities}}]})
+        if with_tags and self.tags:
+            clauses.append({"tags": {"$in": self.tags}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def relaxations(self) -> List[Optional[dict]]:
+        """Filters to try in order: everything, then without tags, then unfiltered."""
+        steps = [self.build(), self.build(with_tags=False), None]
+        return [f for i, f in enumerate(steps) if f not in steps[:i]]
+
+    def describe(self) -> str:
+        parts = [f"{name}={values}" for name, values in
+                 (("type", self.types), ("city", self.cities), ("tags", self.tags)) if values]
+        return ", ".join(parts) or "none"
+
+
+def extract_filter(question: str) -> QueryFilter:
+    """
+    Entity types, cities and tags named in the question, from the catalog gazetteer.
+    Questions naming a specific entity ("Hanoi Hotel 16") are left unfiltered: the
+    lexical half of the hybrid search finds it directly.
+    """
+    catalog = get_catalog_index()
+    matches = catalog.match(question)
+    if any(kind == "entity" for kind, _ in matches):
+        return QueryFilter()
+    types = list(dict.fromkeys(v for kind, v in matches if kind == "type"))
+    cities = list(dict.fromkeys(v for kind, v in matches if kind == "city"))
+    tags = list(dict.fromkeys(v for kind, v in matches if kind == "tag"))
+    filtered = bool(types or cities)
+    top_k = LIST_TOP_K if filtered and LIST_RE.search(question) else DEFAULT_TOP_K
+    return QueryFilter(types, cities, tags, top_k)
@@ -1,10 +1,15 @@
+import time
 import asyncio
 import logging
 from pydantic import BaseModel, Field
 from typing import Literal
 from langchain.prompts import ChatPromptTemplate
+import config
 from state import AgentState
 from utils import get_llm
+from resources import registry
+from GraphNodes.fast_router import classify
+from tracing import set_attr
 
 
 # -----------------------------
@@ -82,25 +87,67 @@ router_prompt = ChatPromptTemplate.from_messages([
     ("human", "{question}")
 ])
 
-# Create the LLM with the structured output
-llm = get_llm(temperature=0.0)
+# Router chain (LLM with the structured output), built on first use
+@registry.resource("router_chain")
+def router_chain():
+    return router_prompt | get_llm(temperature=0.0).with_structured_output(RouterDecision)
 
-llm_with_router_schema = llm.with_structured_output(RouterDecision)
+# -----------------------------
+# 4. Tier Statistics
+# -----------------------------
+class RouterStats:
+    """Per-tier decision counts and latency, to track how many LLM calls the fast path saves."""
+
+    def __init__(self):
+        self.counts = {"fast": 0, "llm": 0}
+        self.total_ms = {"fast": 0.0, "llm": 0.0}
+
+    def record(self, tier: str, elapsed_ms: float):
+        self.counts[tier] += 1
+        self.total_ms[tier] += elapsed_ms
 
-# Create the router chain
-router_chain = router_prompt | llm_with_router_schema
+    def summary(self) -> str:
+        total = sum(self.counts.values()) or 1
+        parts = [
+            f"{tier}={n} ({n / total:.0%}, avg {self.total_ms[tier] / n:.1f}ms)" if n else f"{tier}=0"
+            for tier, n in self.counts.items()
+        ]
+        return "Router tiers: " + ", ".join(parts)
 
+router_stats = RouterStats()
+
+# -----------------------------
+# 5. Tiered Router Node
+# -----------------------------
 async def router_node(state: AgentState) -> dict:
     """
     Determines the next step based on the user's query asynchronously.
+    Tier 1 is the local rule-based classifier; the LLM router is only called
+    when its confidence is below FAST_ROUTER_MIN_CONFIDENCE.
     """
     logger.info("--- 1. Calling Router Node ---")
 
     question = state["question"]
 
+    if config.FAST_ROUTER_ENABLED:
+        start = time.perf_counter()
+        fast = classify(question)
+        if fast.confidence >= config.FAST_ROUTER_MIN_CONFIDENCE:
+            router_stats.record("fast", (time.perf_counter() - start) * 1000)
+            set_attr("router.tier", "fast")
+            set_attr("router.route", fast.route)
+            logger.info(f"Router Decision (fast path, {fast.confidence:.2f}): {fast.route}")
+            logger.info(f"Router Reasoning: {fast.reasoning}")
+            logger.info(router_stats.summary())
+            return {"router_decision": fast.route}
+        logger.info(f"Fast router unsure ({fast.route}, {fast.confidence:.2f}); falling back to LLM.")
+
+    start = time.perf_counter()
     try:
-        router_output: RouterDecision = await router_chain.ainvoke({"question": question})
+        router_output: RouterDecision = await router_chain().ainvoke({"question": question})
 
+        set_attr("router.tier", "llm")
+        set_attr("router.route", router_output.route)
         logger.info(f"Router Decision: {router_output.route}")
         logger.info(f"Router Reasoning: {router_output.reasoning}")
 
@@ -108,4 +155,8 @@ async def router_node(state: AgentState) -> dict:
 
     except Exception as e:
         logger.error(f"Router Node failed: {e}")
-        return {"router_decision": "none"}
\ No newline at end of file
+        return {"router_decision": "none"}
+
+    finally:
+        router_stats.record("llm", (time.perf_counter() - start) * 1000)
+        logger.info(router_stats.summary())
\ No newline at end of file
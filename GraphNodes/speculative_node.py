@@ -0,0 +1,102 @@
+import time
+import asyncio
+import logging
+from state import AgentState
+from GraphNodes.router_node import router_node
+from GraphNodes.pinecone_node import call_pinecone_node
+from GraphNodes.cypher_node import call_cypher_node
+from GraphNodes.cypher_templates import match_template
+
+# ---------------------------------------------------------------------
+# Logging setup
+# ---------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# ---------------------------------------------------------------------
+# Speculation Statistics
+# ---------------------------------------------------------------------
+class SpeculationStats:
+    """
+    Hits: speculative results the router selected; `saved_ms` is the retrieval time
+    that overlapped with routing. Misses: results discarded; `wasted_ms` is the work
+    they did before being cancelled.
+    """
+
+    def __init__(self):
+        self.hits = {"vector": 0, "graph": 0}
+        self.misses = {"vector": 0, "graph": 0}
+        self.saved_ms = 0.0
+        self.wasted_ms = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Speculation: hits {self.hits}, misses {self.misses}, "
+            f"saved {self.saved_ms:.0f}ms, wasted {self.wasted_ms:.0f}ms"
+        )
+
+speculation_stats = SpeculationStats()
+
+# ---------------------------------------------------------------------
+# Speculative Router Node
+# ---------------------------------------------------------------------
+async def _timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, start, time.perf_counter()
+
+
+async def speculative_router_node(state: AgentState) -> dict:
+    """
+    Runs the router while vector retrieval (and graph retrieval, when the question
+    matches a Cypher template and is therefore cheap) already execute. Results the
+    router selects are written to the state; the rest are cancelled.
+    """
+    logger.info("--- 1. Calling Speculative Router Node ---")
+    question = state["question"]
+
+    tasks = {"vector": asyncio.create_task(_timed(call_pinecone_node(state)))}
+    if match_template(question) is not None:
+        tasks["graph"] = asyncio.create_task(_timed(call_cypher_node(state)))
+
+    route_start = time.perf_counter()
+    decision = (await router_node(state))["router_decision"]
+    route_end = time.perf_counter()
+
+    wanted = {
+        "vector": decision in ("pinecone", "both"),
+        "graph": decision in ("cypher", "both"),
+    }
+    updates = {"router_decision": decision}
+    for kind, task in tasks.items():
+        if wanted[kind]:
+            result, start, end = await task
+            updates.update(result)
+            speculation_stats.hits[kind] += 1
+            speculation_stats.saved_ms += max(0.0, min(end, route_end) - max(start, route_start)) * 1000
+        else:
+            # Work already running on an executor thread finishes in the background; its result is dropped.
+            if task.done() and not task.cancelled():
+                _, start, end = task.result()
+                speculation_stats.wasted_ms += (end - start) * 1000
+            else:
+                speculation_stats.wasted_ms += (time.perf_counter() - route_start) * 1000
+                task.cancel()
+            speculation_stats.misses[kind] += 1
+
+    logger.info(speculation_stats.summary())
+    return updates
+
+
+def speculative_conditional_router(state: AgentState) -> str:
+    """Like the plain conditional router, but skips retrievals already done speculatively."""
+    decision = state["router_decision"]
+    need_vector = decision in ("pinecone", "both") and not state.get("vector_search_context")
+    need_graph = decision in ("cypher", "both") and not state.get("graph_search_context")
+    if need_vector and need_graph:
+        return "both"
+    if need_vector:
+        return "pinecone"
+    if need_graph:
+        return "cypher"
+    return "none"
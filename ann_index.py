@@ -0,0 +1,180 @@
+"""
+Approximate nearest neighbour search for the local vector backend.
+
+`IVFVectorStore` is a `LocalVectorStore` with an inverted-file (IVF) coarse quantizer:
+vectors are clustered with spherical k-means into `nlist` lists and a query only scores
+the rows in its `nprobe` closest lists. `nprobe` is the recall/latency knob
+(nprobe == nlist is an exact search).
+
+The index builds incrementally: rows upserted after training are assigned to their
+nearest centroid, and k-means is (re)trained on `flush()` once the store holds enough
+vectors or has grown well past the size it was trained on. Centroids and list
+assignments are persisted next to `vectors.npy` and loaded with mmap.
+"""
+
+import os
+import logging
+from typing import Optional
+
+import numpy as np
+
+import config
+from vector_store import LocalVectorStore, _normalize, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 20
+KMEANS_MAX_TRAIN_POINTS_PER_LIST = 256  # train on a sample for large catalogs
+TRAIN_MIN_POINTS_PER_LIST = 8           # below nlist * this, stay exact
+RETRAIN_GROWTH_FACTOR = 4.0             # retrain once the catalog grows this much
+
+
+def spherical_kmeans(data: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Cluster normalized vectors by cosine similarity; returns (k, dim) normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # re-seed empty lists with random points so every list stays usable
+            sums[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFVectorStore(LocalVectorStore):
+    """Local vector store searched through an IVF coarse quantizer (see module docstring)."""
+
+    def __init__(self, path: str = config.LOCAL_VECTOR_DIR, dimension: int = config.PINECONE_VECTOR_DIM,
+                 nlist: int = config.IVF_NLIST, nprobe: int = config.IVF_NPROBE):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._lists = None  # (row order sorted by list, offsets) built lazily for search
+        super().__init__(path, dimension)
+
+    # -- persistence ---------------------------------------------------
+    @property
+    def _centroids_file(self):
+        return os.path.join(self.path, "ivf_centroids.npy")
+
+    @property
+    def _assign_file(self):
+        return os.path.join(self.path, "ivf_assign.npy")
+
+    def _load(self):
+        super()._load()
+        self._lists = None
+        if os.path.exists(self._centroids_file) and os.path.exists(self._assign_file):
+            assign = np.load(self._assign_file, mmap_mode="r")
+            if len(assign) == len(self._ids):
+                self._centroids = np.load(self._centroids_file)
+                self._assign = assign
+                self._trained_size = len(assign)
+                self.nlist = len(self._centroids)
+                return
+            logger.warning("IVF assignments do not match the vector file; index will be retrained.")
+        self._centroids = None
+        self._assign = np.full(len(self._ids), -1, dtype=np.int32)
+
+    def flush(self):
+        with self._lock:
+            self._consolidate()
+            if not self._dirty:
+                return
+            alive = np.flatnonzero(self._alive)
+            if self._needs_training(len(alive)):
+                self._train(alive)
+            else:
+                self._assign_pending()
+            if self._centroids is not None:
+                os.makedirs(self.path, exist_ok=True)
+                for target, arr in ((self._centroids_file, self._centroids),
+                                    (self._assign_file, np.asarray(self._assign)[alive])):
+                    tmp = target + ".tmp.npy"
+                    np.save(tmp, arr)
+                    os.replace(tmp, target)
+            super().flush()
+
+    # -- training / assignment ----------------------------------------
+    def _needs_training(self, n_alive: int) -> bool:
+        if n_alive < self.nlist * TRAIN_MIN_POINTS_PER_LIST:
+            return False
+        return self._centroids is None or n_alive > self._trained_size * RETRAIN_GROWTH_FACTOR
+
+    def _train(self, rows: np.ndarray):
+        rng = np.random.default_rng(0)
+        sample_size = min(len(rows), self.nlist * KMEANS_MAX_TRAIN_POINTS_PER_LIST)
+        sample = np.asarray(self._matrix[np.sort(rng.choice(rows, size=sample_size, replace=False))])
+        logger.info(f"Training IVF quantizer: {self.nlist} lists on {sample_size} of {len(rows)} vectors...")
+        self._centroids = spherical_kmeans(sample, self.nlist)
+        self._assign = np.full(len(self._ids), -1, dtype=np.int32)
+        self._assign_pending()
+        self._trained_size = len(rows)
+
+    def _grow_assign(self):
+        """Make the assignment array writable and as long as the row count (new rows = -1)."""
+        if len(self._assign) < len(self._ids) or not np.asarray(self._assign).flags.writeable:
+            grown = np.full(len(self._ids), -1, dtype=np.int32)
+            grown[: len(self._assign)] = self._assign
+            self._assign = grown
+
+    def _assign_pending(self):
+        """Assign rows added or updated since the last assignment to their nearest list."""
+        if self._centroids is None:
+            return
+        self._grow_assign()
+        pending = np.flatnonzero(self._assign < 0)
+        for start in range(0, len(pending), 65536):
+            rows = pending[start : start + 65536]
+            self._assign[rows] = np.argmax(np.asarray(self._matrix[rows]) @ self._centroids.T, axis=1)
+        if len(pending):
+            self._lists = None
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self._assign, kind="stable")
+            offsets = np.searchsorted(self._assign[order], np.arange(self.nlist + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    # -- writes --------------------------------------------------------
+    def upsert(self, vectors):
+        # rows are (re)assigned lazily on the next search or flush
+        with self._lock:
+            super().upsert(vectors)
+            self._grow_assign()
+            self._assign[[self._pos[v["id"]] for v in vectors]] = -1
+            self._lists = None
+
+    # -- reads ---------------------------------------------------------
+    def search(self, queries, top_k, filter=None, nprobe: Optional[int] = None):
+        """IVF search; falls back to the exact scan until the quantizer is trained."""
+        with self._lock:
+            self._consolidate()
+            if self._centroids is None:
+                return super().search(queries, top_k, filter)
+            self._assign_pending()
+            nprobe = min(nprobe or self.nprobe, self.nlist)
+            queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+            mask = self._filter_mask(filter)
+            order, offsets = self._inverted_lists()
+
+            probes = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :nprobe]
+            results = []
+            for q, lists in zip(queries, probes):
+                rows = np.concatenate([order[offsets[l] : offsets[l + 1]] for l in lists])
+                rows = np.sort(rows[mask[rows]])  # sorted rows read the mmap sequentially
+                if len(rows) == 0:
+                    results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                    continue
+                scores = np.asarray(self._matrix[rows]) @ q
+                keep = top_k_indices(scores, top_k)
+                results.append((rows[keep], scores[keep]))
+            return results
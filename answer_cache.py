@@ -0,0 +1,176 @@
+"""
+Semantic answer cache in front of the LangGraph workflow.
+
+Questions are embedded with the same MiniLM model as the vector search; a new question
+whose cosine similarity to a cached one is at least `threshold` reuses the cached answer,
+route and contexts instead of paying for the router, Cypher and synthesis LLM calls.
+Catalog names are templated ("Hanoi Hotel 16" / "Hanoi Hotel 17"), so questions that
+differ only in the entity they name embed as near-duplicates; each entry therefore also
+stores the question's catalog anchors (entity ids, cities, types) and is reused only for
+a question with exactly the same anchors.
+Entries expire after `ttl_seconds`, the least recently used ones are evicted beyond
+`max_entries`, and the whole cache is dropped when the catalog version stamp written by
+the ingest scripts changes.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+import numpy as np
+
+import config
+from catalog_index import get_catalog_index
+from ingest import read_catalog_version
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_KINDS = ("entity", "city", "type")
+
+
+def question_anchors(question: str) -> FrozenSet[tuple]:
+    """The catalog entities, cities and types a question names, as (kind, value) pairs."""
+    return frozenset(m for m in get_catalog_index().match(question) if m[0] in ANCHOR_KINDS)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    anchors: FrozenSet[tuple]
+    answer: str
+    router_decision: str
+    vector_search_context: str
+    graph_search_context: str
+    created_at: float
+
+    def as_state(self, question: str) -> dict:
+        """AgentState-shaped result for the new (possibly paraphrased) question."""
+        return {
+            "question": question,
+            "router_decision": self.router_decision,
+            "vector_search_context": self.vector_search_context,
+            "graph_search_context": self.graph_search_context,
+            "answer": self.answer,
+        }
+
+
+class SemanticAnswerCache:
+    """Thread-safe near-duplicate question cache (see module docstring)."""
+
+    def __init__(self, threshold: float = config.ANSWER_CACHE_THRESHOLD,
+                 ttl_seconds: float = config.ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = config.ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Entries are keyed by their row in `_matrix`; freed rows are reused by later stores
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # unit question embeddings, grown by doubling
+        self._live = np.zeros(0, dtype=bool)
+        self._free: list = []
+        self._version = read_catalog_version()
+        self._lock = threading.Lock()
+
+    # -- housekeeping --------------------------------------------------
+    def _check_version(self, version: str):
+        if version != self._version:
+            logger.info("Catalog changed since answers were cached; clearing answer cache.")
+            self._version = version
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._live[:] = False
+        self._free = list(range(len(self._live)))
+
+    def _remove(self, row: int):
+        del self._entries[row]
+        self._live[row] = False
+        self._free.append(row)
+
+    def _expire(self, now: float):
+        for row in [r for r, e in self._entries.items() if now - e.created_at > self.ttl_seconds]:
+            self._remove(row)
+
+    def _allocate(self, dim: int) -> int:
+        """A free matrix row, growing the matrix when every row is taken."""
+        if not self._free:
+            n = 0 if self._matrix is None else len(self._matrix)
+            grown = np.zeros((min(max(2 * n, 16), max(self.max_entries, n + 1)), dim), dtype=np.float32)
+            if n:
+                grown[:n] = self._matrix
+            self._matrix = grown
+            self._live = np.concatenate([self._live, np.zeros(len(grown) - n, dtype=bool)])
+            self._free = list(range(len(grown) - 1, n - 1, -1))
+        return self._free.pop()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    # -- public API ----------------------------------------------------
+    def lookup(self, question: str, embedding) -> Optional[CachedAnswer]:
+        """Return the most similar fresh entry above the threshold with the same anchors, or None."""
+        query = self._unit(embedding)
+        anchors = question_anchors(question)
+        version = read_catalog_version()
+        with self._lock:
+            self._check_version(version)
+            self._expire(time.time())
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores = self._matrix @ query
+            near = [int(i) for i in np.flatnonzero((scores >= self.threshold) & self._live)]
+            same = [i for i in near if self._entries[i].anchors == anchors]
+            if not same:
+                if near:
+                    logger.info("Near-duplicate cached question names other catalog entities; not reusing it.")
+                self.misses += 1
+                return None
+            best = max(same, key=lambda i: scores[i])
+            self._entries.move_to_end(best)
+            self.hits += 1
+            entry = self._entries[best]
+            logger.info(f"Answer cache hit ({scores[best]:.3f}) for cached question: '{entry.question}'")
+            return entry
+
+    def store(self, question: str, embedding, state: dict):
+        vec = self._unit(embedding)
+        anchors = question_anchors(question)
+        version = read_catalog_version()
+        with self._lock:
+            self._check_version(version)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))  # least recently used
+            row = self._allocate(len(vec))
+            self._matrix[row] = vec
+            self._live[row] = True
+            self._entries[row] = CachedAnswer(
+                question=question,
+                anchors=anchors,
+                answer=state.get("answer", ""),
+                router_decision=state.get("router_decision", ""),
+                vector_search_context=state.get("vector_search_context", ""),
+                graph_search_context=state.get("graph_search_context", ""),
+                created_at=time.time(),
+            )
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
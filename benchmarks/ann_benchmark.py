@@ -0,0 +1,94 @@
+"""
+Recall-vs-latency benchmark for the IVF index against the exact (flat) local search.
+
+    python -m benchmarks.ann_benchmark --n 200000 --nlist 1024 --nprobe 1 4 16 64
+
+By default it uses a synthetic clustered catalog (the real one is only 360 vectors);
+pass --from-local-index to benchmark the vectors already in config.LOCAL_VECTOR_DIR.
+"""
+
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+import config
+from vector_store import LocalVectorStore, _normalize
+from ann_index import IVFVectorStore
+
+
+def synthetic_catalog(n, dim, clusters, spread=1.0, seed=0):
+    """Normalized points around `clusters` random centers; larger `spread` = harder search."""
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((clusters, dim)).astype(np.float32))
+    labels = rng.integers(0, clusters, size=n)
+    noise = rng.standard_normal((n, dim)).astype(np.float32) * spread / np.sqrt(dim)
+    return _normalize(centers[labels] + noise)
+
+
+def to_vectors(matrix):
+    return [{"id": str(i), "values": row, "metadata": {}} for i, row in enumerate(matrix)]
+
+
+def timed_search(store, queries, k, **kwargs):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        (rows, _), = store.search(q[None, :], k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(rows)
+    return results, np.array(latencies)
+
+
+def recall_at_k(approx, exact):
+    return float(np.mean([len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approx, exact)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000, help="synthetic catalog size")
+    parser.add_argument("--dim", type=int, default=config.PINECONE_VECTOR_DIM)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=3.0, help="cluster noise relative to center norm")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=config.IVF_NLIST)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--from-local-index", action="store_true", help="use vectors from config.LOCAL_VECTOR_DIR")
+    args = parser.parse_args()
+
+    if args.from_local_index:
+        data = np.asarray(LocalVectorStore()._matrix)
+    else:
+        data = synthetic_catalog(args.n, args.dim, args.clusters, args.spread)
+    rng = np.random.default_rng(1)
+    queries = _normalize(data[rng.choice(len(data), size=args.queries)]
+                         + rng.standard_normal((args.queries, data.shape[1])).astype(np.float32) * 0.02)
+    nlist = min(args.nlist, max(1, len(data) // 8))
+
+    with tempfile.TemporaryDirectory() as flat_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        flat = LocalVectorStore(flat_dir, data.shape[1])
+        flat.upsert(to_vectors(data))
+        flat.flush()
+
+        start = time.perf_counter()
+        ivf = IVFVectorStore(ivf_dir, data.shape[1], nlist=nlist)
+        ivf.upsert(to_vectors(data))
+        ivf.flush()
+        print(f"Catalog: {len(data)} x {data.shape[1]}, IVF nlist={nlist}, built in {time.perf_counter() - start:.1f}s")
+
+        exact, flat_ms = timed_search(flat, queries, args.k)
+        print(f"{'index':<14}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>10}")
+        print(f"{'flat':<14}{1.0:>10.3f}{np.percentile(flat_ms, 50):>10.3f}{np.percentile(flat_ms, 95):>10.3f}{1.0:>10.1f}")
+        for nprobe in args.nprobe:
+            if nprobe > nlist:
+                continue
+            approx, ms = timed_search(ivf, queries, args.k, nprobe=nprobe)
+            print(f"{'ivf/' + str(nprobe):<14}{recall_at_k(approx, exact):>10.3f}"
+                  f"{np.percentile(ms, 50):>10.3f}{np.percentile(ms, 95):>10.3f}"
+                  f"{np.median(flat_ms) / np.median(ms):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
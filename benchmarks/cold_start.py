@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark: import time, warm-up time and first-request latency, each
+measured in a fresh interpreter.
+
+    python -m benchmarks.cold_start                          # stubbed clients (offline)
+    python -m benchmarks.cold_start --startup-latency 1.5    # emulate model/connection setup
+    python -m benchmarks.cold_start --real                   # real model, Pinecone, Neo4j, OpenAI
+
+Scenarios:
+    lazy   first request builds whatever it needs
+    warm   blocking warm-up before the first request
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+QUESTION = "Which hotels are in Da Nang and what are they like?"
+
+
+def child(args):
+    if not args.real:
+        from benchmarks.fakes import install_stubs
+        install_stubs(args.llm_latency, startup_latency=args.startup_latency)
+
+    start = time.perf_counter()
+    import hybrid_chat
+    from resources import registry
+    import_ms = (time.perf_counter() - start) * 1000
+
+    warm_up_ms = 0.0
+    if args.scenario == "warm":
+        start = time.perf_counter()
+        registry.warm_up(background=False)
+        warm_up_ms = (time.perf_counter() - start) * 1000
+
+    async def timed_ask():
+        start = time.perf_counter()
+        await hybrid_chat.ask(QUESTION)
+        return (time.perf_counter() - start) * 1000
+
+    first_ms = asyncio.run(timed_ask())
+    second_ms = asyncio.run(timed_ask())
+    print(json.dumps({
+        "import_ms": import_ms, "warm_up_ms": warm_up_ms,
+        "first_ms": first_ms, "second_ms": second_ms, "resources_ms": registry.timings(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="use the real clients instead of stubs")
+    parser.add_argument("--startup-latency", type=float, default=0.0, help="stub build time per resource (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--scenario", choices=["lazy", "warm"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        return child(args)
+
+    print(f"{'scenario':<10}{'import ms':>11}{'warm-up ms':>12}{'1st req ms':>12}{'2nd req ms':>12}")
+    for scenario in ("lazy", "warm"):
+        cmd = [sys.executable, "-m", "benchmarks.cold_start", "--scenario", scenario,
+               "--startup-latency", str(args.startup_latency), "--llm-latency", str(args.llm_latency)]
+        if args.real:
+            cmd.append("--real")
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{scenario:<10}{r['import_ms']:>11.0f}{r['warm_up_ms']:>12.0f}{r['first_ms']:>12.0f}{r['second_ms']:>12.0f}")
+        built = {k: round(v) for k, v in r["resources_ms"].items() if v is not None}
+        print(f"{'':<10}resource build ms: {built}")
+
+
+if __name__ == "__main__":
+    main()
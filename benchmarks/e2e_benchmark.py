@@ -0,0 +1,128 @@
+"""
+Offline end-to-end benchmark of the real LangGraph workflow (hybrid_chat.build_app)
+with deterministic local stand-ins for OpenAI, Pinecone and Neo4j (benchmarks/fakes.py).
+
+    python -m benchmarks.e2e_benchmark
+    python -m benchmarks.e2e_benchmark --requests 200 --concurrency 1 8 32 --llm-latency 0.3
+    python -m benchmarks.e2e_benchmark --json results.json     # for comparing runs
+
+Reports throughput and end-to-end p50/p95/p99 latency at each concurrency level, and
+per-node p50/p95/p99 over all runs. The fakes have fixed latencies, so changes in
+these numbers come from routing, retrieval, synthesis or orchestration overhead.
+"""
+
+import json
+import time
+import logging
+import asyncio
+import argparse
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from benchmarks.fakes import install_stubs
+
+QUESTIONS = [
+    "List all hotels in Hanoi",
+    "Tell me about the food scene in Hoi An",
+    "Which cities are connected to Hue?",
+    "Suggest trekking activities in Sapa",
+    "Which hotels are in Da Nang and what are they like?",
+    "What is the best time to visit Da Lat?",
+    "Hello",
+    "Recommend romantic attractions in Ha Long Bay",
+    "What attractions are in Ho Chi Minh City?",
+    "Where should I go for beaches and seafood?",
+]
+
+
+def percentiles(samples) -> dict:
+    lat = np.asarray(samples, dtype=np.float64)
+    if not len(lat):
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {"n": int(len(lat)), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+class NodeTimer:
+    """`wrap` for build_app: records each node's latency under its name."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, name, fn):
+        async def timed(state):
+            start = time.perf_counter()
+            try:
+                return await fn(state)
+            finally:
+                self.samples[name].append((time.perf_counter() - start) * 1000)
+        return timed
+
+
+async def run_level(app, initial_state, total: int, concurrency: int):
+    latencies, routes = [], Counter()
+    questions = iter(f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})" for i in range(total))
+
+    async def worker():
+        for question in questions:
+            start = time.perf_counter()
+            final_state = await app.ainvoke(initial_state(question))
+            latencies.append((time.perf_counter() - start) * 1000)
+            routes[final_state.get("router_decision", "")] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "req_per_s": total / elapsed, "routes": dict(routes), **percentiles(latencies)}
+
+
+async def main_async(args):
+    import hybrid_chat  # imported after the stubs are installed
+    from resources import registry
+
+    registry.warm_up(background=False)
+    timer = NodeTimer()
+    app = hybrid_chat.build_app(wrap=timer.wrap)
+
+    await run_level(app, hybrid_chat.initial_state, len(QUESTIONS), 1)  # warm caches and pools
+    timer.samples.clear()
+
+    results = {"levels": [], "nodes": {}}
+    print(f"{'concurrency':>11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}   routes")
+    for level in args.concurrency:
+        r = await run_level(app, hybrid_chat.initial_state, args.requests, level)
+        results["levels"].append(r)
+        print(f"{level:>11}{r['req_per_s']:>9.1f}{r['p50']:>9.0f}{r['p95']:>9.0f}{r['p99']:>9.0f}   {r['routes']}")
+
+    print(f"\n{'node':<20}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, samples in sorted(timer.samples.items()):
+        p = results["nodes"][name] = percentiles(samples)
+        print(f"{name:<20}{p['n']:>7}{p['p50']:>9.1f}{p['p95']:>9.1f}{p['p99']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), **results}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--vector-latency", type=float, default=0.03)
+    parser.add_argument("--graph-latency", type=float, default=0.01)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the nodes' INFO logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    install_stubs(args.llm_latency, args.vector_latency, args.graph_latency)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
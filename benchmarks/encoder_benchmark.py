@@ -0,0 +1,116 @@
+"""
+Sentence encoder backends compared: PyTorch (sentence-transformers), ONNX Runtime
+float32 and ONNX Runtime int8 (onnx_encoder.py), each in a fresh interpreter.
+
+    python onnx_encoder.py --quantize                   # export once
+    python -m benchmarks.encoder_benchmark
+    python -m benchmarks.encoder_benchmark --threads 1 2 4
+
+Reports per backend: library import time, model load time, single-query latency
+(p50/p95), batch throughput over the catalog texts, peak RSS, and the minimum cosine
+similarity of its embeddings to the PyTorch ones.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+import numpy as np
+
+import config
+
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+QUERIES = [
+    "List all hotels in Hanoi",
+    "Tell me about the food scene in Hoi An",
+    "Suggest trekking activities in Sapa",
+    "What is the best time to visit Da Lat?",
+    "Where should I go for beaches and seafood?",
+]
+
+
+def child(args):
+    from onnx_encoder import parity_texts
+
+    threads = args.threads[0]
+
+    start = time.perf_counter()
+    if args.backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+        import_ms = (time.perf_counter() - start) * 1000
+        torch.set_num_threads(threads)
+        start = time.perf_counter()
+        model = SentenceTransformer(args.model, device="cpu")
+        encode = lambda texts: model.encode(texts, batch_size=config.ONNX_BATCH_SIZE, show_progress_bar=False)
+    else:
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+        from onnx_encoder import OnnxEncoder
+        import_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        model = OnnxEncoder(args.onnx_dir, quantized=args.backend == "onnx-int8", threads=threads)
+        encode = model.encode
+    load_ms = (time.perf_counter() - start) * 1000
+
+    texts = parity_texts(n=10_000)
+    encode(texts[:8])  # first run allocates buffers
+    latencies = []
+    for q in QUERIES * 20:
+        start = time.perf_counter()
+        encode([q])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    embeddings = encode(texts)
+    throughput = len(texts) / (time.perf_counter() - start)
+
+    np.save(args.out, np.asarray(embeddings, dtype=np.float32))
+    print(json.dumps({
+        "import_ms": import_ms, "load_ms": load_ms,
+        "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95)),
+        "texts_per_s": throughput, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    from onnx_encoder import model_dir, cosine_parity
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--onnx-dir", default=None, help="exported model directory (default: onnx_encoder.model_dir)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[config.ONNX_INTRA_OP_THREADS])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.onnx_dir = args.onnx_dir or model_dir(args.model)
+
+    if args.backend:
+        return child(args)
+
+    print(f"{'backend':<12}{'threads':>8}{'import ms':>11}{'load ms':>9}{'p50 ms':>8}{'p95 ms':>8}"
+          f"{'texts/s':>9}{'RSS MB':>8}{'min cos':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in args.threads:
+            reference = None
+            for backend in args.backends:
+                out = os.path.join(tmp, f"{backend}-{threads}.npy")
+                cmd = [sys.executable, "-m", "benchmarks.encoder_benchmark", "--backend", backend,
+                       "--model", args.model, "--onnx-dir", args.onnx_dir, "--threads", str(threads), "--out", out]
+                stdout = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+                r = json.loads(stdout.strip().splitlines()[-1])
+                embeddings = np.load(out)
+                if backend == "torch":
+                    reference = embeddings
+                parity = f"{cosine_parity(reference, embeddings).min():.6f}" if reference is not None else "-"
+                print(f"{backend:<12}{threads:>8}{r['import_ms']:>11.0f}{r['load_ms']:>9.0f}{r['p50_ms']:>8.2f}"
+                      f"{r['p95_ms']:>8.2f}{r['texts_per_s']:>9.0f}{r['rss_mb']:>8.0f}{parity:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Deterministic local stand-ins for OpenAI, Neo4j, Pinecone and the MiniLM models.
+
+The vector index and the graph are built from vietnam_travel_dataset.json, so retrieval
+returns realistic records: vectors are searched in memory, and the Cypher the graph node
+issues (templates and the stub LLM's query) is answered by an in-process graph.
+
+`install_stubs()` swaps the factories of the lazy resources (resources.py) for stubs and
+patches `utils.get_llm`; it must run before `hybrid_chat` / `server` are imported so the
+node modules pick up the patched `get_llm`.
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import hashlib
+import functools
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+import config
+from ingest import iter_entities, vector_metadata
+from vector_store import matches_filter, top_k_indices
+from graph_snapshot import GraphSnapshot
+from GraphNodes.cypher_templates import TEMPLATES
+
+DATA_FILE = "vietnam_travel_dataset.json"
+STUB_CYPHER = "MATCH (e:City) RETURN e.id AS id, e.name AS name ORDER BY e.name LIMIT 5"
+STUB_ANSWER = (
+    "Here is a short overview based on the travel catalog: the places listed above are "
+    "popular with visitors, easy to reach, and best enjoyed with a local guide."
+)
+
+
+# -----------------------------
+# LLM
+# -----------------------------
+def _last_text(messages) -> str:
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if isinstance(messages, list) and messages:
+        return str(messages[-1].content)
+    return str(messages)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model with fixed latency; streams its canned answer word by word."""
+
+    latency: float = 0.5        # seconds before the first token
+    token_delay: float = 0.01   # seconds between streamed tokens
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _respond(self, messages) -> str:
+        text = " ".join(str(m.content) for m in messages)
+        return STUB_CYPHER if "Neo4j Developer" in text else STUB_ANSWER
+
+    @staticmethod
+    def _usage(messages, answer: str) -> dict:
+        """Rough token counts (4 characters per token), like the API's usage block."""
+        prompt = sum(len(str(m.content)) for m in messages) // 4
+        completion = len(answer) // 4
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _message(self, messages) -> AIMessage:
+        answer = self._respond(messages)
+        return AIMessage(content=answer, usage_metadata=self._usage(messages, answer))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency + self.token_delay * len(STUB_ANSWER.split()))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency + self.token_delay * len(STUB_ANSWER.split()))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        answer = self._respond(messages)
+        for word in answer.split(" "):
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        # final usage-only chunk, as OpenAI sends with stream_usage=True
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, answer)))
+
+    def with_structured_output(self, schema, **kwargs):
+        """Router stand-in: answers with the fast router's guess after the LLM latency."""
+        from GraphNodes.fast_router import classify
+
+        def decide(prompt):
+            return schema(route=classify(_last_text(prompt)).route, reasoning="stub router")
+
+        async def adecide(prompt):
+            await asyncio.sleep(self.latency)
+            return decide(prompt)
+
+        return RunnableLambda(decide, afunc=adecide)
+
+
+# -----------------------------
+# Embeddings
+# -----------------------------
+class StubEncoder:
+    """Hashed bag-of-words vectors: deterministic, fast, and similar texts stay similar."""
+
+    def __init__(self, *args, dim: int = config.PINECONE_VECTOR_DIM, **kwargs):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            h = int.from_bytes(hashlib.md5(token.encode()).digest()[:4], "little")
+            vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(t) for t in texts]) if texts else np.empty((0, self.dim), dtype=np.float32)
+
+
+class StubCrossEncoder:
+    """
+    Cross-encoder stand-in: the share of the question's content terms found in the
+    passage, in [0, 1] like the sigmoid MS MARCO scores, after `pair_latency` seconds
+    per (question, passage) pair.
+    """
+
+    def __init__(self, pair_latency: float = 0.004):
+        self.pair_latency = pair_latency
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        from lexical_index import analyze
+
+        return set(analyze(text))  # plural-folded
+
+    def _score(self, question: str, passage: str) -> float:
+        terms = self._terms(question)
+        return len(terms & self._terms(passage)) / len(terms) if terms else 0.0
+
+    def predict(self, pairs, batch_size: int = 32, **kwargs):
+        time.sleep(self.pair_latency * len(pairs))
+        return np.array([self._score(q, p) for q, p in pairs], dtype=np.float32)
+
+
+# -----------------------------
+# Vector store and graph
+# -----------------------------
+class InMemoryVectorIndex:
+    """
+    Exact cosine search over the dataset embedded with StubEncoder, plus a fixed
+    network-like latency per call. Supports the same metadata filters as Pinecone.
+    """
+
+    def __init__(self, latency: float = 0.05, encoder: Optional[StubEncoder] = None, path: str = DATA_FILE):
+        encoder = encoder or StubEncoder()
+        self.latency = latency
+        nodes = [n for n in iter_entities(path) if n.get("semantic_text") or n.get("description")]
+        self.ids = [n["id"] for n in nodes]
+        self.metadata = [vector_metadata(n) for n in nodes]
+        self.vectors = encoder.encode([n.get("semantic_text") or n["description"][:1000] for n in nodes])
+
+    def query(self, vector, top_k, filter=None, include_metadata=True, include_values=False):
+        time.sleep(self.latency)
+        scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+        if filter:
+            keep = np.array([matches_filter(m, filter) for m in self.metadata])
+            scores = np.where(keep, scores, -np.inf)
+        rows = [r for r in top_k_indices(scores, top_k) if np.isfinite(scores[r])]
+        matches = []
+        for r in rows:
+            match = {"id": self.ids[r], "score": float(scores[r])}
+            if include_metadata:
+                match["metadata"] = self.metadata[r]
+            if include_values:
+                match["values"] = self.vectors[r].tolist()
+            matches.append(match)
+        return {"matches": matches}
+
+    def upsert(self, vectors):
+        time.sleep(self.latency)
+
+    def delete(self, ids):
+        time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+class StubRecord(dict):
+    def data(self) -> dict:
+        return dict(self)
+
+
+class InProcessGraph:
+    """
+    The dataset as an in-memory graph (graph_snapshot.GraphSnapshot) that answers the
+    Cypher the graph node issues: every template in cypher_templates.TEMPLATES and the
+    stub LLM's query. Any other Cypher returns no records.
+    """
+
+    def __init__(self, path: str = DATA_FILE):
+        self.snapshot = GraphSnapshot.from_entities(iter_entities(path))
+        self._handlers = {TEMPLATES[name]: functools.partial(self.snapshot.run_template, name) for name in TEMPLATES}
+        self._handlers[STUB_CYPHER] = self.stub_cypher
+
+    def run(self, query: str, params: dict) -> List[StubRecord]:
+        handler = self._handlers.get(query)
+        return [StubRecord(r) for r in handler(params)] if handler else []
+
+    def stub_cypher(self, params: dict):
+        cities = sorted(self.snapshot.by_name["City"].items())[:5]
+        return [{"id": self.snapshot.ids[rows[0]], "name": name} for name, rows in cities]
+
+
+class StubTransaction:
+    def __init__(self, graph: InProcessGraph, latency: float):
+        self.graph = graph
+        self.latency = latency
+
+    def run(self, query: str, parameters: Optional[dict] = None, **kwargs) -> List[StubRecord]:
+        time.sleep(self.latency)
+        return self.graph.run(query, {**(parameters or {}), **kwargs})
+
+
+class StubSession:
+    def __init__(self, graph: InProcessGraph, latency: float):
+        self.graph = graph
+        self.latency = latency
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(StubTransaction(self.graph, self.latency), *args, **kwargs)
+
+    execute_write = execute_read
+
+    def close(self):
+        pass
+
+
+class StubDriver:
+    """Neo4j driver stand-in over an InProcessGraph; every query takes `latency` seconds."""
+
+    def __init__(self, latency: float = 0.02, graph: Optional[InProcessGraph] = None):
+        self.latency = latency
+        self.graph = graph or InProcessGraph()
+
+    def session(self, **kwargs) -> StubSession:
+        return StubSession(self.graph, self.latency)
+
+    def close(self):
+        pass
+
+
+# -----------------------------
+# Installation
+# -----------------------------
+def install_stubs(llm_latency: float = 0.5, vector_latency: float = 0.05, graph_latency: float = 0.02,
+                  answer_cache: bool = False, startup_latency: float = 0.0) -> str:
+    """
+    Swap every external client for a local stand-in. Caches are redirected to a fresh
+    temporary directory, which is returned. `startup_latency` is added to the build of
+    each stub resource, to stand in for model loading and connection setup.
+    """
+    if "hybrid_chat" in sys.modules:
+        raise RuntimeError("install_stubs() must be called before hybrid_chat is imported")
+
+    os.makedirs("logs", exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix="travel-bench-")
+    config.EMBEDDING_CACHE_PATH = os.path.join(tmp, "embeddings.sqlite")
+    config.CYPHER_CACHE_PATH = os.path.join(tmp, "cypher_cache.json")
+    config.ANSWER_CACHE_ENABLED = answer_cache
+
+    import utils
+    import neo4j_access  # registers the driver resource
+    import reranker  # registers the cross-encoder resource
+    from resources import registry
+    from embedding_cache import CachedEncoder, EmbeddingCache
+
+    def slow(build):
+        def factory():
+            time.sleep(startup_latency)
+            return build()
+        return factory
+
+    registry.replace("embed_model", slow(lambda: CachedEncoder(
+        StubEncoder(), "stub-encoder", EmbeddingCache(config.EMBEDDING_CACHE_PATH)
+    )))
+    registry.replace("vector_store", slow(lambda: InMemoryVectorIndex(latency=vector_latency)))
+    registry.replace("neo4j_driver", slow(lambda: StubDriver(latency=graph_latency)))
+    registry.replace("graph_schema", lambda: "")
+    registry.replace("graph_snapshot", lambda: GraphSnapshot.from_entities(iter_entities(DATA_FILE)))
+    registry.replace("rerank_model", lambda: StubCrossEncoder())
+    utils.get_llm = lambda *a, **k: StubChatModel(latency=llm_latency)
+    return tmp
@@ -0,0 +1,83 @@
+"""
+Local load test for server.py with every external client stubbed (see benchmarks/fakes.py).
+
+    python -m benchmarks.load_test --requests 200 --concurrency 1 8 32 64 --llm-latency 0.5
+
+Requests go through the real FastAPI app via an in-process ASGI transport, so admission
+control, queueing, timeouts and the sized executors are all exercised.
+"""
+
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.fakes import install_stubs
+
+QUESTIONS = [
+    "List all hotels in Hanoi",
+    "Tell me about the food scene in Hoi An",
+    "Which cities are connected to Hue?",
+    "Suggest trekking activities in Sapa",
+    "Which hotels are in Da Nang and what are they like?",
+    "What is the best time to visit Da Lat?",
+    "Hello",
+    "Recommend romantic attractions in Ha Long Bay",
+]
+
+
+async def run_level(client, total: int, concurrency: int):
+    latencies, statuses = [], Counter()
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})")
+
+    async def worker():
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            resp = await client.post("/ask", json={"question": question})
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[resp.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies)
+    print(
+        f"{concurrency:>11}{total / elapsed:>10.1f}{np.percentile(lat, 50):>10.0f}"
+        f"{np.percentile(lat, 95):>10.0f}{np.percentile(lat, 99):>10.0f}   {dict(statuses)}"
+    )
+
+
+async def main_async(args):
+    import httpx
+    import server  # imported after the stubs are installed
+    from GraphNodes.pinecone_node import embed_batcher
+
+    transport = httpx.ASGITransport(app=server.api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'concurrency':>11}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}   statuses")
+        for level in args.concurrency:
+            await run_level(client, args.requests, level)
+    print(embed_batcher.metrics.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--vector-latency", type=float, default=0.05)
+    parser.add_argument("--graph-latency", type=float, default=0.02)
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache enabled")
+    args = parser.parse_args()
+
+    install_stubs(args.llm_latency, args.vector_latency, args.graph_latency, answer_cache=args.answer_cache)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
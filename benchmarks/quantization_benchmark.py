@@ -0,0 +1,103 @@
+"""
+Recall@k, latency and memory of the quantized local index (quantization.py) against
+the exact float32 scan.
+
+    python -m benchmarks.quantization_benchmark                  # dataset, stub encoder (offline)
+    python -m benchmarks.quantization_benchmark --real           # dataset, MiniLM embeddings
+    python -m benchmarks.quantization_benchmark --n 200000       # plus a synthetic catalog at scale
+
+The dataset run embeds every catalog entity and questions built from its cities, tags
+and the e2e benchmark questions. Recall@k is the share of the quantized search's results
+(codes scan + exact rescoring of top_k * oversample) that belong in the float32 top k.
+Templated catalog texts often tie on score, so any row scoring at least the k-th best
+exact score counts, whichever of the tied rows the float32 scan happened to return.
+"""
+
+import argparse
+import tempfile
+
+import numpy as np
+
+import config
+from ingest import iter_entities
+from vector_store import LocalVectorStore, _normalize
+from quantization import QuantizedVectorStore
+from benchmarks.ann_benchmark import synthetic_catalog, to_vectors, timed_search
+from benchmarks.e2e_benchmark import QUESTIONS
+from benchmarks.fakes import DATA_FILE, StubEncoder
+
+
+def dataset_questions(entities):
+    cities = sorted({e["name"] for e in entities if e.get("type") == "City"})
+    tags = sorted({t for e in entities for t in e.get("tags") or []})
+    return (
+        [q for q in QUESTIONS if q != "Hello"]
+        + [f"Things to do in {c}" for c in cities]
+        + [f"Places for {t.replace('_', ' ')}" for t in tags]
+    )
+
+
+def recall_with_ties(results, data, queries, k):
+    recalls = []
+    for rows, q in zip(results, queries):
+        kth = np.partition(data @ q, -k)[-k]
+        recalls.append(np.sum(data[rows] @ q >= kth - 1e-5) / k)
+    return float(np.mean(recalls))
+
+
+def evaluate(label, data, queries, k, oversamples):
+    print(f"\n{label}: {len(data)} x {data.shape[1]}, {len(queries)} queries, k={k}")
+    print(f"{'index':<16}{'recall@' + str(k):>10}{'p50 ms':>10}{'p95 ms':>10}{'bytes/vec':>11}{'memory MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = LocalVectorStore(f"{tmp}/flat", data.shape[1])
+        flat.upsert(to_vectors(data))
+        flat.flush()
+        exact, flat_ms = timed_search(flat, queries, k)
+        print(f"{'float32':<16}{recall_with_ties(exact, data, queries, k):>10.3f}"
+              f"{np.percentile(flat_ms, 50):>10.3f}{np.percentile(flat_ms, 95):>10.3f}"
+              f"{data.shape[1] * 4:>11}{data.nbytes / 2**20:>11.1f}")
+
+        for method in ("int8", "binary"):
+            store = QuantizedVectorStore(f"{tmp}/{method}", data.shape[1], method=method)
+            store.upsert(to_vectors(data))
+            store.flush()
+            memory = store.memory_bytes()
+            for oversample in oversamples:
+                approx, ms = timed_search(store, queries, k, oversample=oversample)
+                print(f"{f'{method} x{oversample}':<16}{recall_with_ties(approx, data, queries, k):>10.3f}"
+                      f"{np.percentile(ms, 50):>10.3f}{np.percentile(ms, 95):>10.3f}"
+                      f"{memory // len(data):>11}{memory / 2**20:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="embed with config.EMBEDDING_MODEL_NAME instead of the stub")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[1, 2, 4, 10, 20])
+    parser.add_argument("--n", type=int, default=0, help="also benchmark a synthetic catalog of this size")
+    parser.add_argument("--queries", type=int, default=200, help="synthetic queries")
+    args = parser.parse_args()
+
+    if args.real:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+    else:
+        encoder = StubEncoder()
+
+    entities = [e for e in iter_entities(DATA_FILE) if e.get("semantic_text") or e.get("description")]
+    data = np.asarray(encoder.encode([e.get("semantic_text") or e["description"][:1000] for e in entities]),
+                      dtype=np.float32)
+    queries = np.asarray(encoder.encode(dataset_questions(entities)), dtype=np.float32)
+    evaluate(f"Dataset ({'MiniLM' if args.real else 'stub encoder'})", _normalize(data), _normalize(queries),
+             args.k, args.oversample)
+
+    if args.n:
+        data = synthetic_catalog(args.n, data.shape[1], clusters=100, spread=3.0)
+        rng = np.random.default_rng(1)
+        queries = _normalize(data[rng.choice(len(data), size=args.queries)]
+                             + rng.standard_normal((args.queries, data.shape[1])).astype(np.float32) * 0.02)
+        evaluate("Synthetic", data, queries, args.k, args.oversample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Reranking cost against prompt-token savings, per question, through the real vector
+search node (GraphNodes/pinecone_node.py) with and without the cross-encoder stage.
+
+    python -m benchmarks.rerank_benchmark                     # stub cross-encoder (offline)
+    python -m benchmarks.rerank_benchmark --pair-latency 0.008
+    python -m benchmarks.rerank_benchmark --real              # config.RERANK_MODEL_NAME on CPU
+
+For each question: passages and packed context tokens reaching synthesis (baseline top_k
+vs reranked), candidates the cross-encoder scored, and the node's extra latency with a
+cold and a warm score cache. Other clients are stubbed with zero latency, so the latency
+difference is the over-fetch plus the reranking.
+"""
+
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+from benchmarks.fakes import install_stubs, StubCrossEncoder
+
+QUESTIONS = [
+    "List all hotels in Hanoi",
+    "Tell me about the food scene in Hoi An",
+    "Suggest trekking activities in Sapa",
+    "Which hotels are in Da Nang and what are they like?",
+    "Recommend romantic attractions in Ha Long Bay",
+    "What attractions are in Ho Chi Minh City?",
+    "Where should I go for beaches and seafood?",
+    "Quiet places for a honeymoon near the mountains",
+    "Hanoi Hotel 16",
+    "Family friendly activities with kids",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="use the real cross-encoder instead of the stub")
+    parser.add_argument("--pair-latency", type=float, default=0.004, help="stub cross-encoder time per pair (s)")
+    args = parser.parse_args()
+
+    install_stubs(llm_latency=0.0, vector_latency=0.0, graph_latency=0.0)
+    import config
+    import reranker
+    from resources import registry
+    from tracing import trace
+    from GraphNodes.pinecone_node import call_pinecone_node
+    from GraphNodes.context_packing import pack_contexts, parse_records, count_tokens
+
+    if not args.real:
+        registry.replace("rerank_model", lambda: StubCrossEncoder(args.pair_latency))
+    registry.warm_up(["embed_model", "vector_store", "lexical_index", "rerank_model", "token_encoding"], background=False)
+
+    async def run(question, enabled):
+        config.RERANK_ENABLED = enabled
+        with trace("rerank-benchmark") as t:
+            start = time.perf_counter()
+            out = await call_pinecone_node({"question": question})
+            ms = (time.perf_counter() - start) * 1000
+        context = out["vector_search_context"]
+        packed, _ = pack_contexts(context, "")
+        attrs = {k: v for s in t.spans for k, v in s.attrs.items()}
+        return len(parse_records(context) or []), count_tokens(packed), ms, attrs
+
+    async def bench():
+        rows = []
+        for q in QUESTIONS:
+            await run(q, False)  # warm embedding cache and lexical counts for both variants
+            base_n, base_tok, base_ms, _ = await run(q, False)
+            reranker.score_cache.clear()
+            n, tok, cold_ms, attrs = await run(q, True)
+            _, _, warm_ms, _ = await run(q, True)
+            rows.append((q, base_n, n, base_tok, tok, attrs.get("rerank.scored", 0),
+                         cold_ms - base_ms, warm_ms - base_ms))
+        return rows
+
+    rows = asyncio.run(bench())
+    print(f"{'question':<52}{'passages':>10}{'tokens':>14}{'saved':>7}{'scored':>8}{'+ms cold':>10}{'+ms warm':>10}")
+    for q, base_n, n, base_tok, tok, scored, cold, warm in rows:
+        saved = 1 - tok / base_tok if base_tok else 0.0
+        print(f"{q[:50]:<52}{f'{base_n}->{n}':>10}{f'{base_tok}->{tok}':>14}{saved:>7.0%}"
+              f"{scored:>8}{cold:>10.1f}{warm:>10.1f}")
+
+    base_total = sum(r[3] for r in rows)
+    saved_total = base_total - sum(r[4] for r in rows)
+    cold = np.array([r[6] for r in rows])
+    warm = np.array([r[7] for r in rows])
+    print(f"\nprompt tokens: {base_total} -> {base_total - saved_total} "
+          f"({saved_total / max(base_total, 1):.0%} saved, {saved_total / len(rows):.0f} per question)")
+    print(f"rerank cost:   {cold.mean():.1f}ms cold / {warm.mean():.1f}ms cached per question, "
+          f"{saved_total / len(rows) / max(cold.mean(), 1e-9):.1f} tokens saved per cold ms")
+    print(f"score cache:   {reranker.score_cache.hits} hits / {reranker.score_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Local lookup tables over the travel catalog (vietnam_travel_dataset.json).
+
+Used wherever a question has to be matched against catalog names without a network
+call or an LLM: entity names ("Hanoi Hotel 16"), city names and aliases ("Saigon"),
+entity types ("hotels" -> Hotel) and tags ("trekking"). The index is rebuilt when the
+catalog version stamp changes (see ingest.py), so synced entities are matched at once.
+"""
+
+import re
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from ingest import iter_entities, read_catalog_version
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = "vietnam_travel_dataset.json"
+
+# Words that name an entity type in a question
+TYPE_ALIASES = {
+    "hotel": "Hotel", "hotels": "Hotel", "stay": "Hotel", "stays": "Hotel",
+    "accommodation": "Hotel", "accommodations": "Hotel", "resort": "Hotel", "resorts": "Hotel",
+    "attraction": "Attraction", "attractions": "Attraction", "sight": "Attraction",
+    "sights": "Attraction", "landmark": "Attraction", "landmarks": "Attraction",
+    "activity": "Activity", "activities": "Activity", "experience": "Activity",
+    "experiences": "Activity", "tour": "Activity", "tours": "Activity",
+    "city": "City", "cities": "City", "destination": "City", "destinations": "City",
+}
+
+# Common alternative spellings for catalog cities
+CITY_ALIASES = {
+    "ha noi": "Hanoi",
+    "halong": "Ha Long Bay", "ha long": "Ha Long Bay", "halong bay": "Ha Long Bay",
+    "sa pa": "Sapa",
+    "hoian": "Hoi An",
+    "danang": "Da Nang",
+    "nhatrang": "Nha Trang",
+    "dalat": "Da Lat",
+    "saigon": "Ho Chi Minh City", "sai gon": "Ho Chi Minh City",
+    "ho chi minh": "Ho Chi Minh City", "hcmc": "Ho Chi Minh City",
+    "mekong": "Mekong Delta",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class CatalogIndex:
+    """Phrase dictionaries over catalog names, matched by longest n-gram first."""
+
+    def __init__(self, entities):
+        self.entities: Dict[str, dict] = {}
+        self.cities: Dict[str, dict] = {}  # canonical city name -> City entity
+        self.tags = set()
+        self._phrases: Dict[tuple, tuple] = {}  # token tuple -> ("entity" | "city" | "type" | "tag", value)
+        self._max_len = 1
+
+        for e in entities:
+            self.entities[e["id"]] = e
+            self.tags.update(e.get("tags", []))
+            if e.get("type") == "City":
+                self.cities[e["name"]] = e
+            self._add(e["name"], ("city", e["name"]) if e.get("type") == "City" else ("entity", e["id"]))
+        for alias, city in CITY_ALIASES.items():
+            if city in self.cities:
+                self._add(alias, ("city", city))
+        for word, label in TYPE_ALIASES.items():
+            self._add(word, ("type", label))
+        for tag in self.tags:
+            self._add(tag.replace("_", " "), ("tag", tag))
+        logger.info(f"Catalog index built: {len(self.entities)} entities, {len(self.cities)} cities.")
+
+    def _add(self, phrase: str, value: tuple):
+        key = tuple(tokenize(phrase))
+        if key and key not in self._phrases:
+            self._phrases[key] = value
+            self._max_len = max(self._max_len, len(key))
+
+    def match(self, question: str) -> List[tuple]:
+        """Non-overlapping (kind, value) matches in the question, longest phrase first."""
+        tokens = tokenize(question)
+        found, i = [], 0
+        while i < len(tokens):
+            for n in range(min(self._max_len, len(tokens) - i), 0, -1):
+                hit = self._phrases.get(tuple(tokens[i : i + n]))
+                if hit is not None:
+                    found.append(hit)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def find_entities(self, question: str) -> List[dict]:
+        return [self.entities[v] for kind, v in self.match(question) if kind == "entity"]
+
+    def find_cities(self, question: str) -> List[str]:
+        """Canonical city names mentioned directly (not as part of an entity name)."""
+        return list(dict.fromkeys(v for kind, v in self.match(question) if kind == "city"))
+
+    def find_types(self, question: str) -> List[str]:
+        return list(dict.fromkeys(v for kind, v in self.match(question) if kind == "type"))
+
+    def find_tags(self, question: str) -> List[str]:
+        return list(dict.fromkeys(v for kind, v in self.match(question) if kind == "tag"))
+
+
+_indexes: Dict[str, Tuple[str, CatalogIndex]] = {}  # path -> (catalog version, index)
+_build_lock = threading.Lock()
+
+
+def get_catalog_index(path: str = DATA_FILE) -> CatalogIndex:
+    """The catalog index of the dataset file, rebuilt once whenever the catalog version changes."""
+    version = read_catalog_version()
+    cached = _indexes.get(path)
+    if cached is None or cached[0] != version:
+        with _build_lock:
+            cached = _indexes.get(path)
+            if cached is None or cached[0] != version:
+                if cached is not None:
+                    logger.info("Catalog changed; rebuilding catalog index.")
+                cached = _indexes[path] = (version, CatalogIndex(iter_entities(path)))
+    return cached[1]
@@ -3,10 +3,91 @@ NEO4J_USERNAME = "neo4j"
 NEO4J_PASSWORD = "your_neo4j_password"
 NEO4J_URI = "neo4j+s://"
 NEO4J_DATABASE = "neo4j"
+NEO4J_MAX_POOL_SIZE = 50                # >= EXECUTOR_POOL_SIZES["neo4j"] so query threads never wait on the pool
+NEO4J_ACQUISITION_TIMEOUT = 10.0        # seconds to wait for a pooled connection
+NEO4J_MAX_CONNECTION_LIFETIME = 1800    # recycle connections before load balancers/Aura drop them
+NEO4J_LIVENESS_CHECK_TIMEOUT = 60.0     # ping connections idle longer than this before reuse
+NEO4J_MAX_RETRY_TIME = 15.0             # managed transactions retry transient errors for up to this long
+NEO4J_QUERY_TIMEOUT = 10.0              # server-side timeout for serving-path transactions
 
 OPENAI_API_KEY = "sk-"# your OpenAI API key
+LLM_MODEL_NAME = "gpt-4o-mini"
 
 PINECONE_API_KEY="pcsk" # your Pinecone API key
 PINECONE_ENV = "us-east-1"   # example
 PINECONE_INDEX_NAME = "vietnam-travel"
 PINECONE_VECTOR_DIM = 384       # adjust to embedding model used (text-embedding-3-large ~ 3072? check your model); we assume 1536 for common OpenAI models — change if needed.
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = "torch"             # "torch" (sentence-transformers) or "onnx" (onnxruntime, no PyTorch at query time)
+ONNX_MODEL_DIR = ".cache/onnx"          # exported models; `python onnx_encoder.py [--quantize]`
+ONNX_QUANTIZE = False                   # use the int8 dynamically quantized export
+ONNX_INTRA_OP_THREADS = 2               # threads per inference call, per embedding-pool worker (0 = all cores)
+ONNX_BATCH_SIZE = 32                    # texts per inference call
+ONNX_PARITY_MIN_COSINE = 0.99           # min cosine to the PyTorch embeddings, checked at export
+EMBEDDING_CACHE_PATH = ".cache/embeddings.sqlite"   # shared by pinecone_upload.py and the search node
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000               # LRU-evicted beyond this
+
+VECTOR_BACKEND = "pinecone"             # "pinecone" (managed) or "local" (in-process NumPy index, works offline)
+LOCAL_VECTOR_DIR = ".cache/local_index" # where the local backend keeps vectors.npy + metadata.json
+LOCAL_INDEX_TYPE = "flat"               # "flat" (exact scan) or "ivf" (approximate, for large catalogs)
+IVF_NLIST = 1024                        # IVF lists (~sqrt(N) to 4*sqrt(N) vectors)
+IVF_NPROBE = 16                         # lists scanned per query: higher = better recall, slower
+LOCAL_QUANTIZATION = "none"             # flat local index codes: "none", "int8" (4x smaller) or "binary" (32x)
+                                        # single-query scans: int8 ~1.5-2x, binary ~2-3x faster than float32 at 20k-200k vectors
+QUANTIZATION_OVERSAMPLE = 4             # candidates per result taken from the codes and rescored in float32 (binary: ~20)
+HYBRID_SEARCH_ENABLED = True            # fuse BM25 matches (exact names, tags) with vector results
+LEXICAL_INDEX_PATH = ".cache/lexical_index.json"  # built by pinecone_upload.py
+HYBRID_CANDIDATES = 20                  # results taken from each retriever before fusion
+RRF_K = 60                              # reciprocal-rank fusion constant: higher = flatter rank weights
+QUERY_FILTERS_ENABLED = True            # restrict vector search to the types/cities/tags a question names
+RERANK_ENABLED = False                  # rescore vector candidates with a local cross-encoder (needs sentence-transformers)
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20                  # candidates fetched for the reranker to choose from
+RERANK_BATCH_SIZE = 8                   # candidates scored per cross-encoder call; scoring stops at a batch with no hits
+RERANK_THRESHOLD = 0.3                  # min cross-encoder score (0-1) for a passage to reach synthesis
+RERANK_MIN_KEEP = 2                     # passages kept even when fewer pass the threshold
+RERANK_CACHE_MAX_ENTRIES = 20000        # cached (question, entity id) scores
+
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_THRESHOLD = 0.92           # min cosine similarity between questions to reuse an answer
+ANSWER_CACHE_TTL_SECONDS = 3600
+ANSWER_CACHE_MAX_ENTRIES = 2000
+
+FAST_ROUTER_ENABLED = True              # rule/catalog-based routing before the LLM router
+FAST_ROUTER_MIN_CONFIDENCE = 0.8        # below this the LLM router decides
+
+CYPHER_CACHE_PATH = ".cache/cypher_cache.json"  # normalized question -> LLM-generated Cypher
+CONTEXT_PACKING_ENABLED = True          # dedupe + tabulate retrieval results before synthesis
+CONTEXT_TOKEN_BUDGET = 1500             # max prompt tokens for both retrieval contexts together
+CONTEXT_DESCRIPTION_MAX_CHARS = 240     # longer cell values are truncated
+
+GRAPH_SCHEMA_CACHE_PATH = ".cache/graph_schema.json"  # Neo4j enhanced schema; cleared by load_to_neo4j.py
+GRAPH_SNAPSHOT_ENABLED = True           # answer template graph queries from an in-process snapshot
+GRAPH_SNAPSHOT_PATH = ".cache/graph_snapshot.json"    # exported from Neo4j by load_to_neo4j.py
+GRAPH_SNAPSHOT_SOURCE = "dataset"       # used when the file is missing: "dataset" (offline) or "neo4j"
+FUSED_RETRIEVAL_ENABLED = True          # "both" questions without a Cypher template: vector hits + graph neighbourhood
+
+WARM_UP_ON_START = True                 # build models/clients when the CLI or server starts...
+WARM_UP_IN_BACKGROUND = True            # ...without blocking startup (first requests wait if not ready)
+
+SPECULATIVE_RETRIEVAL = False           # start vector (and template graph) retrieval while the router runs
+STREAM_ANSWERS = True                   # print synthesized answers token by token in the CLI
+
+# Serving (server.py)
+EXECUTOR_POOL_SIZES = {                 # threads per kind of blocking work, so one cannot starve another
+    "embedding": 2,
+    "vector": 8,
+    "neo4j": 8,
+    "rerank": 2,
+}
+MAX_CONCURRENT_REQUESTS = 16            # workflows running at once
+MAX_QUEUED_REQUESTS = 64                # waiting for a slot; beyond this requests get 503 immediately
+QUEUE_TIMEOUT_SECONDS = 10.0            # max wait for a slot
+REQUEST_TIMEOUT_SECONDS = 60.0          # max workflow run time
+SHUTDOWN_GRACE_SECONDS = 30.0           # drain time for in-flight requests on shutdown
+TRACING_ENABLED = True                  # per-request spans (TRACE_FILE) + Prometheus metrics at /metrics
+TRACE_FILE = "logs/traces.jsonl"        # one JSON line per request
+LOG_FILE = "logs/travel_assistant.log"  # application logs, written by a background listener
+EMBED_BATCH_MAX_SIZE = 32               # query embeddings encoded together by the micro-batcher
+EMBED_BATCH_MAX_WAIT_MS = 5.0           # max time a query waits for others to join its batch
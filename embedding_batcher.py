@@ -0,0 +1,152 @@
+"""
+Async micro-batching for query embeddings.
+
+Under concurrency every request used to encode its question on its own, so 50 users
+meant 50 single-item `encode` calls competing for the embedding threads. The batcher
+collects requests for at most `max_wait_ms` (or until `max_batch_size` are waiting),
+encodes them in one batched call on the "embedding" executor pool and resolves each
+caller's future with its own vector. Identical texts in one batch are encoded once.
+
+    batcher = EmbeddingBatcher(encoder.encode)
+    vec = await batcher.embed("hotels in Hanoi")   # -> float32 np.ndarray
+"""
+
+import time
+import asyncio
+import logging
+import contextvars
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+import config
+from executors import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------
+class BatcherStats:
+    """Batch sizes, time spent queued before encoding, and encode throughput."""
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.unique_items = 0
+        self.full_batches = 0
+        self.wait_ms = 0.0      # summed over items: enqueue -> batch start
+        self.encode_ms = 0.0    # summed over batches
+        self.max_batch = 0
+
+    def record(self, size: int, unique: int, full: bool, wait_ms: float, encode_ms: float):
+        self.batches += 1
+        self.items += size
+        self.unique_items += unique
+        self.full_batches += int(full)
+        self.wait_ms += wait_ms
+        self.encode_ms += encode_ms
+        self.max_batch = max(self.max_batch, size)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch,
+            "full_batches": self.full_batches,
+            "deduplicated": self.items - self.unique_items,
+            "mean_wait_ms": self.wait_ms / self.items if self.items else 0.0,
+            "mean_encode_ms": self.encode_ms / self.batches if self.batches else 0.0,
+            "encode_items_per_s": self.unique_items / (self.encode_ms / 1000) if self.encode_ms else 0.0,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"Embedding batcher: {s['batches']} batches, {s['items']} items "
+            f"(mean batch {s['mean_batch_size']:.1f}, max {s['max_batch_size']}), "
+            f"wait {s['mean_wait_ms']:.1f}ms, encode {s['mean_encode_ms']:.1f}ms/batch, "
+            f"{s['encode_items_per_s']:.0f} items/s"
+        )
+
+
+# ---------------------------------------------------------------------
+# Batcher
+# ---------------------------------------------------------------------
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent `embed` calls into batched `encode(list_of_texts)` calls;
+    `encode` returns one row per text.
+
+    The batcher belongs to whichever event loop is running when it is first used; if a
+    new loop shows up (e.g. successive `asyncio.run` calls), pending state is reset.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = config.EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = config.EMBED_BATCH_MAX_WAIT_MS,
+        pool: str = "embedding",
+    ):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.pool = pool
+        self.metrics = BatcherStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # the loop only keeps weak references to running tasks
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._pending, self._timer, self._tasks = loop, [], None, set()
+
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch(full=True)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+        return await future
+
+    def _dispatch(self, full: bool = False):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # A fresh context: the batch serves several requests, so it belongs to no one's trace
+            task = self._loop.create_task(self._encode(batch, full), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future, float]], full: bool):
+        start = time.perf_counter()
+        unique: Dict[str, int] = {}
+        for text, _, _ in batch:
+            unique.setdefault(text, len(unique))
+
+        try:
+            vectors = np.asarray(await run_blocking(self.pool, self.encode, list(unique)), dtype=np.float32)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            # cancelled (e.g. at shutdown): callers awaiting this batch must not hang
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+
+        encode_ms = (time.perf_counter() - start) * 1000
+        wait_ms = sum((start - enqueued) * 1000 for _, _, enqueued in batch)
+        self.metrics.record(len(batch), len(unique), full, wait_ms, encode_ms)
+        for text, future, _ in batch:
+            if not future.done():  # the caller may have been cancelled meanwhile
+                future.set_result(vectors[unique[text]])
@@ -0,0 +1,164 @@
+"""
+Persistent embedding cache shared by pinecone_upload.py and the Pinecone search node.
+
+Vectors are stored as float32 blobs in SQLite, keyed by sha256(model name + encode
+options that change the output + normalized text), with least-recently-used eviction
+once the cache grows past `max_entries`.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+import config
+from tracing import count
+
+logger = logging.getLogger(__name__)
+
+# `encode` options that do not change the vectors; any other option is part of the key
+OUTPUT_NEUTRAL_KWARGS = frozenset({"batch_size", "show_progress_bar", "device", "convert_to_numpy", "convert_to_tensor"})
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivially different inputs share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_key(model_name: str, text: str, options: str = "") -> str:
+    variant = f"{model_name}\x00{options}" if options else model_name
+    return hashlib.sha256(f"{variant}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def encode_options(kwargs: dict) -> str:
+    """Canonical form of the `encode` kwargs that change the output ("" when there are none)."""
+    options = {k: v for k, v in kwargs.items() if k not in OUTPUT_NEUTRAL_KWARGS}
+    return json.dumps(options, sort_keys=True, default=str) if options else ""
+
+
+# ---------------------------------------------------------------------
+# SQLite-backed store
+# ---------------------------------------------------------------------
+class EmbeddingCache:
+    """Thread-safe key -> float32 vector store with LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: str = config.EMBEDDING_CACHE_PATH, max_entries: int = config.EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vec BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for `keys` (missing keys are simply absent)."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = list(keys[i : i + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec, last_access) VALUES (?, ?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+        # Trim to 90% so eviction does not run on every insert once the cache is full
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        logger.info(f"Embedding cache evicted {excess} least recently used entries.")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# ---------------------------------------------------------------------
+# Encoder wrapper
+# ---------------------------------------------------------------------
+class CachedEncoder:
+    """
+    Drop-in wrapper around a SentenceTransformer-like model: `encode` accepts a string
+    or a list of strings and returns a numpy array, encoding only cache misses
+    (in one batched call).
+    """
+
+    def __init__(self, model, model_name: str, cache: EmbeddingCache | None = None):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        if kwargs.get("convert_to_tensor"):
+            raise ValueError("CachedEncoder returns numpy arrays; convert_to_tensor is not supported")
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        options = encode_options(kwargs)
+        keys = [cache_key(self.model_name, t, options) for t in batch]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, batch):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        count("embedding_cache.hits", len(cached))
+        count("embedding_cache.misses", len(missing))
+        if missing:
+            encoded = np.asarray(self.model.encode(list(missing.values()), **kwargs), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        result = np.stack([cached[k] for k in keys]) if batch else np.empty((0, 0), dtype=np.float32)
+        return result[0] if single else result
@@ -0,0 +1,72 @@
+"""
+Explicitly sized thread pools for the blocking calls made by the graph nodes.
+
+`asyncio.to_thread` shares one default executor between everything, so a burst of slow
+Neo4j queries can occupy every worker and stall embedding or vector lookups for other
+requests. Each kind of blocking work gets its own pool instead (sizes in
+config.EXECUTOR_POOL_SIZES); `run_blocking` is the drop-in replacement for `to_thread`.
+Every call is a tracing span recording how long it queued for a worker and how long it ran.
+"""
+
+import time
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import config
+from tracing import span, metrics
+
+logger = logging.getLogger(__name__)
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(pool: str) -> ThreadPoolExecutor:
+    with _lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            if pool not in config.EXECUTOR_POOL_SIZES:
+                raise KeyError(f"Unknown executor pool: {pool!r}")
+            executor = ThreadPoolExecutor(
+                max_workers=config.EXECUTOR_POOL_SIZES[pool], thread_name_prefix=f"{pool}-pool"
+            )
+            _executors[pool] = executor
+        return executor
+
+
+async def run_blocking(pool: str, func, *args, **kwargs):
+    """
+    Run `func(*args, **kwargs)` on the named pool. Like `asyncio.to_thread`, the caller's
+    context variables (LangGraph callbacks, tracing) are propagated to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    with span(f"{pool}:{getattr(func, '__name__', 'call')}") as s:
+        submitted = time.perf_counter()
+        started = []
+
+        def call():
+            started.append(time.perf_counter())
+            return func(*args, **kwargs)
+
+        ctx = contextvars.copy_context()
+        try:
+            return await loop.run_in_executor(get_executor(pool), functools.partial(ctx.run, call))
+        finally:
+            if started:
+                queued = started[0] - submitted
+                metrics.observe("travel_executor_queue_seconds", queued, {"pool": pool})
+                if s is not None:
+                    s.attrs["queue_ms"] = round(queued * 1000, 3)
+
+
+def shutdown_executors(wait: bool = True):
+    with _lock:
+        for name, executor in _executors.items():
+            logger.info(f"Shutting down {name} executor...")
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+        _executors.clear()
@@ -0,0 +1,340 @@
+"""
+In-process, read-only snapshot of the travel graph.
+
+The graph is small and read-mostly, so the common template traversals (entities in a
+city, connected cities, entity attributes, k-hop neighbourhoods, shortest routes between
+cities) are answered here in microseconds instead of a Neo4j round trip. Each relation
+type is stored as CSR adjacency arrays in both directions, with id and label/name indexes:
+
+    snapshot = current_snapshot()
+    snapshot.run_template("hotels_in_city", {"city": "Hanoi", "limit": 50})  # same records as Neo4j
+    snapshot.run_template("some_other_query", {})                            # None -> ask Neo4j
+
+load_to_neo4j.py exports a fresh snapshot from Neo4j to GRAPH_SNAPSHOT_PATH after every
+load; without that file it is built from GRAPH_SNAPSHOT_SOURCE. A running process
+reloads it when the catalog version stamp changes (see ingest.py).
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from catalog_index import DATA_FILE
+from ingest import iter_entities, read_catalog_version
+from resources import registry
+
+logger = logging.getLogger(__name__)
+
+ENTITY_FIELDS = ("id", "name", "type", "description", "tags")
+NEIGHBOURHOOD_HOPS = 2   # also fixed in the entity_neighbourhood Cypher template
+MAX_ROUTE_HOPS = 6       # also fixed in the route_between_cities Cypher template
+
+
+# ---------------------------------------------------------------------
+# Adjacency
+# ---------------------------------------------------------------------
+def _csr(n: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32)
+
+
+class Adjacency:
+    """CSR adjacency of one relation type, outgoing and incoming."""
+
+    def __init__(self, n: int, src: np.ndarray, dst: np.ndarray):
+        self.edges = len(src)
+        self._out = _csr(n, src, dst)
+        self._in = _csr(n, dst, src)
+
+    @staticmethod
+    def _row(csr, row: int) -> np.ndarray:
+        indptr, indices = csr
+        return indices[indptr[row] : indptr[row + 1]]
+
+    def out(self, row: int) -> np.ndarray:
+        return self._row(self._out, row)
+
+    def into(self, row: int) -> np.ndarray:
+        return self._row(self._in, row)
+
+    def both(self, row: int) -> np.ndarray:
+        return np.concatenate([self.out(row), self.into(row)])
+
+
+# ---------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------
+class GraphSnapshot:
+    """
+    Nodes (label + properties) and one Adjacency per relation type. Node rows are
+    positions in `ids`; edges whose endpoints are missing are dropped, as Neo4j's
+    MATCH ... MERGE would never have created them.
+    """
+
+    def __init__(self, nodes: List[dict], edges: Dict[str, Iterable[Tuple[int, int]]], version: str = ""):
+        self.version = version
+        self.ids = [n["id"] for n in nodes]
+        self.labels = [n["label"] for n in nodes]
+        self.props = [n["props"] for n in nodes]
+        self.row = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.by_name: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for i, (label, props) in enumerate(zip(self.labels, self.props)):
+            if props.get("name") is not None:
+                self.by_name[label][props["name"]].append(i)
+        self.relations: Dict[str, Adjacency] = {}
+        for rel, pairs in edges.items():
+            pairs = sorted(set(map(tuple, pairs)))  # MERGE semantics: one edge per (source, target)
+            src = np.asarray([s for s, _ in pairs], dtype=np.int32)
+            dst = np.asarray([t for _, t in pairs], dtype=np.int32)
+            self.relations[rel] = Adjacency(len(self.ids), src, dst)
+
+    # -- construction --------------------------------------------------
+    @classmethod
+    def from_entities(cls, entities: Iterable[dict], version: str = "") -> "GraphSnapshot":
+        """Build from dataset entities (same nodes and edges load_to_neo4j.py writes)."""
+        nodes, connections = [], []
+        for e in entities:
+            nodes.append({"id": e["id"], "label": e.get("type", "Unknown"),
+                          "props": {k: v for k, v in e.items() if k != "connections"}})
+            connections.append(e.get("connections", []))
+        row = {n["id"]: i for i, n in enumerate(nodes)}
+        edges = defaultdict(list)
+        for source, conns in enumerate(connections):
+            for rel in conns:
+                target = row.get(rel.get("target"))
+                if target is not None:
+                    edges[rel.get("relation", "RELATED_TO")].append((source, target))
+        return cls(nodes, edges, version)
+
+    @classmethod
+    def from_neo4j(cls, version: str = "") -> "GraphSnapshot":
+        """Export every :Entity node and the relationships between them."""
+        from neo4j_access import run_read
+
+        records = run_read(
+            "MATCH (n:Entity) RETURN n.id AS id, [l IN labels(n) WHERE l <> 'Entity'] AS labels, "
+            "properties(n) AS props",
+            name="snapshot_nodes",
+        )
+        nodes = [{"id": r["id"], "label": (r["labels"] or ["Unknown"])[0], "props": r["props"]} for r in records]
+        row = {n["id"]: i for i, n in enumerate(nodes)}
+        edges = defaultdict(list)
+        for r in run_read(
+            "MATCH (a:Entity)-[r]->(b:Entity) RETURN a.id AS source, type(r) AS relation, b.id AS target",
+            name="snapshot_edges",
+        ):
+            edges[r["relation"]].append((row[r["source"]], row[r["target"]]))
+        return cls(nodes, edges, version)
+
+    # -- persistence ---------------------------------------------------
+    def save(self, path: str = config.GRAPH_SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.version,
+                "nodes": [{"id": i, "label": l, "props": p} for i, l, p in zip(self.ids, self.labels, self.props)],
+                "edges": {rel: self._pairs(adj) for rel, adj in self.relations.items()},
+            }, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    def _pairs(self, adj: Adjacency) -> List[Tuple[int, int]]:
+        return [(row, int(t)) for row in range(len(self.ids)) for t in adj.out(row)]
+
+    @classmethod
+    def load(cls, path: str = config.GRAPH_SNAPSHOT_PATH) -> "GraphSnapshot":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["nodes"], data["edges"], data.get("version", ""))
+
+    # -- helpers -------------------------------------------------------
+    def _adj(self, rel: str) -> Optional[Adjacency]:
+        return self.relations.get(rel)
+
+    def _named(self, label: str, name: str) -> List[int]:
+        return self.by_name.get(label, {}).get(name, [])
+
+    def _fields(self, row: int, fields=ENTITY_FIELDS) -> dict:
+        props = self.props[row]
+        return {k: props.get(k) for k in fields}
+
+    def _sorted_by_name(self, rows) -> List[int]:
+        return sorted(set(int(r) for r in rows), key=lambda r: str(self.props[r].get("name")))
+
+    # -- traversals ----------------------------------------------------
+    def entities_in_city(self, label: str, relation: str, city: str, limit: int) -> List[dict]:
+        adj = self._adj(relation)
+        rows = []
+        for c in self._named("City", city):
+            members = [m for m in (adj.into(c) if adj else []) if self.labels[m] == label]
+            rows += [(m, c) for m in members]
+        rows.sort(key=lambda mc: str(self.props[mc[0]].get("name")))
+        return [{**self._fields(m), "city": self.props[c].get("name")} for m, c in rows[:limit]]
+
+    def connected_cities(self, city: str, limit: int) -> List[dict]:
+        adj = self._adj("Connected_To")
+        rows = [r for c in self._named("City", city) for r in (adj.both(c) if adj else [])
+                if self.labels[r] == "City"]
+        return [self._fields(r, ("id", "name", "region", "tags")) for r in self._sorted_by_name(rows)[:limit]]
+
+    def entity_attributes(self, id: str) -> List[dict]:
+        row = self.row.get(id)
+        if row is None:
+            return []
+        base = {**self._fields(row), **self._fields(row, ("region", "best_time_to_visit"))}
+        cities = [c for rel in ("Located_In", "Available_In") if self._adj(rel)
+                  for c in self._adj(rel).out(row) if self.labels[c] == "City"]
+        return [{**base, "city": self.props[c].get("name")} for c in cities] or [{**base, "city": None}]
+
+    def neighbourhood(self, id: str, hops: int = NEIGHBOURHOOD_HOPS, limit: int = 50) -> List[dict]:
+        """Entities within `hops` relationships of `id`, in either direction."""
+        start = self.row.get(id)
+        if start is None:
+            return []
+        seen, frontier = {start}, [start]
+        for _ in range(hops):
+            nxt = []
+            for row in frontier:
+                for adj in self.relations.values():
+                    for r in adj.both(row):
+                        if int(r) not in seen:
+                            seen.add(int(r))
+                            nxt.append(int(r))
+            frontier = nxt
+        seen.discard(start)
+        return [self._fields(r, ("id", "name", "type")) for r in self._sorted_by_name(seen)[:limit]]
+
+    def shortest_route(self, from_city: str, to_city: str, max_hops: int = MAX_ROUTE_HOPS) -> List[dict]:
+        """Breadth-first shortest path over Connected_To (either direction)."""
+        adj = self._adj("Connected_To")
+        sources, targets = self._named("City", from_city), set(self._named("City", to_city))
+        if adj is None or not sources or not targets:
+            return []
+        parent = {s: None for s in sources}
+        queue = deque((s, 0) for s in sources)
+        while queue:
+            row, depth = queue.popleft()
+            if row in targets:
+                path = []
+                while row is not None:
+                    path.append(self.props[row].get("name"))
+                    row = parent[row]
+                return [{"route": path[::-1], "hops": len(path) - 1}]
+            if depth == max_hops:
+                continue
+            for r in adj.both(row):
+                r = int(r)
+                if r not in parent and self.labels[r] == "City":
+                    parent[r] = row
+                    queue.append((r, depth + 1))
+        return []
+
+    def seed_neighbourhoods(self, ids: List[str], per_seed: int) -> List[dict]:
+        """Per id: the entity, its city, up to `per_seed` entities in that city and the connected cities."""
+        located = [adj for rel, adj in self.relations.items() if rel in ("Located_In", "Available_In")]
+        connected = self._adj("Connected_To")
+        rows = []
+        for seed in ids:
+            e = self.row.get(seed)
+            if e is None:
+                continue
+            if self.labels[e] == "City":
+                cities = [e]
+            else:
+                cities = [int(c) for adj in located for c in adj.out(e) if self.labels[c] == "City"] or [None]
+            for c in cities:
+                nearby, nexts = [], []
+                if c is not None:
+                    nearby = self._sorted_by_name(m for adj in located for m in adj.into(c) if m != e)[:per_seed]
+                    nexts = self._sorted_by_name(
+                        r for r in (connected.both(c) if connected else []) if self.labels[r] == "City"
+                    )
+                rows.append({
+                    "seed": seed,
+                    "entity": self._fields(e),
+                    "city": self._fields(c) if c is not None else None,
+                    "nearby": [self._fields(m) for m in nearby],
+                    "connected": [self._fields(r) for r in nexts],
+                })
+        return rows
+
+    # -- template dispatch ---------------------------------------------
+    def run_template(self, name: str, params: dict) -> Optional[List[dict]]:
+        """
+        Records for a cypher_templates.TEMPLATES query, shaped like Neo4j's, or None
+        when the snapshot cannot answer it (the caller then queries Neo4j).
+        """
+        if name == "hotels_in_city":
+            return self.entities_in_city("Hotel", "Located_In", params["city"], params["limit"])
+        if name == "attractions_in_city":
+            return self.entities_in_city("Attraction", "Located_In", params["city"], params["limit"])
+        if name == "activities_in_city":
+            return self.entities_in_city("Activity", "Available_In", params["city"], params["limit"])
+        if name == "connected_cities":
+            return self.connected_cities(params["city"], params["limit"])
+        if name == "entity_attributes":
+            return self.entity_attributes(params["id"])
+        if name == "entity_neighbourhood":
+            return self.neighbourhood(params["id"], limit=params["limit"])
+        if name == "route_between_cities":
+            return self.shortest_route(params["from_city"], params["to_city"])
+        if name == "seed_neighbourhoods":
+            return self.seed_neighbourhoods(params["ids"], params["per_seed"])
+        return None
+
+    def __len__(self):
+        return len(self.ids)
+
+
+# ---------------------------------------------------------------------
+# Shared snapshot
+# ---------------------------------------------------------------------
+def build_graph_snapshot(source: str = config.GRAPH_SNAPSHOT_SOURCE) -> GraphSnapshot:
+    if source == "neo4j":
+        return GraphSnapshot.from_neo4j(read_catalog_version())
+    if source == "dataset":
+        return GraphSnapshot.from_entities(iter_entities(DATA_FILE), read_catalog_version())
+    raise ValueError(f"Unknown graph snapshot source: {source!r}")
+
+
+def refresh_graph_snapshot(source: str = "neo4j", path: str = config.GRAPH_SNAPSHOT_PATH) -> GraphSnapshot:
+    """Rebuild and save the snapshot; called by load_to_neo4j.py after the graph changes."""
+    snapshot = build_graph_snapshot(source)
+    snapshot.save(path)
+    edges = sum(adj.edges for adj in snapshot.relations.values())
+    logger.info(f"Graph snapshot saved: {len(snapshot)} nodes, {edges} edges -> {path}")
+    return snapshot
+
+
+@registry.resource("graph_snapshot")
+def graph_snapshot() -> GraphSnapshot:
+    if os.path.exists(config.GRAPH_SNAPSHOT_PATH):
+        return GraphSnapshot.load()
+    logger.warning(f"No graph snapshot at {config.GRAPH_SNAPSHOT_PATH}; building it from {config.GRAPH_SNAPSHOT_SOURCE}.")
+    return build_graph_snapshot()
+
+
+_checked_version: Optional[str] = None
+_reload_lock = threading.Lock()
+
+
+def current_snapshot() -> GraphSnapshot:
+    """The shared snapshot, reloaded once whenever the catalog version stamp changes."""
+    global _checked_version
+    version = read_catalog_version()
+    if version != _checked_version:
+        with _reload_lock:
+            if version != _checked_version:
+                if _checked_version is not None:
+                    logger.info("Catalog changed; reloading graph snapshot.")
+                    registry["graph_snapshot"].reset()
+                _checked_version = version
+    return graph_snapshot()
@@ -1,11 +1,22 @@
+import time
 import asyncio
 import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+import config
 from state import AgentState
 from langgraph.graph import StateGraph, END
-from GraphNodes.pinecone_node import call_pinecone_node
+from answer_cache import SemanticAnswerCache
+from resources import registry
+import tracing
+from GraphNodes.pinecone_node import call_pinecone_node, aembed_text
 from GraphNodes.cypher_node import call_cypher_node
+from GraphNodes.fused_retrieval_node import call_fused_retrieval_node
+from GraphNodes.cypher_templates import match_template
 from GraphNodes.router_node import router_node
 from GraphNodes.answer_node import synthesize_answer_node
+from GraphNodes.context_packing import pack_context_node
+from GraphNodes.speculative_node import speculative_router_node, speculative_conditional_router
 
 # -----------------------------
 # Logging Setup
@@ -26,6 +37,22 @@ def conditional_router(state: AgentState) -> str:
     logger.info(f"Routing to: '{decision}'")
     return decision
 
+def retrieval_route(route_fn: Callable[[AgentState], str]) -> Callable[[AgentState], str]:
+    """
+    Wrap a conditional router: "both" questions that no Cypher template covers, or that
+    ask what is around an entity, go to fused retrieval (vector hits + their graph
+    neighbourhood) instead of vector search plus LLM-generated Cypher.
+    """
+    def route(state: AgentState) -> str:
+        decision = route_fn(state)
+        if decision == "both" and config.FUSED_RETRIEVAL_ENABLED:
+            matched = match_template(state["question"])
+            if matched is None or matched[0] == "entity_neighbourhood":
+                logger.info("No Cypher template answers this fully; using fused retrieval.")
+                return "fused"
+        return decision
+    return route
+
 # -----------------------------
 # Parallel Search Node
 # -----------------------------
@@ -40,43 +67,191 @@ async def parallel_search_node(state: AgentState) -> dict:
 # -----------------------------
 # Graph Assembly
 # -----------------------------
-logger.info("Assembling LangGraph workflow...")
-workflow = StateGraph(AgentState)
-
-workflow.add_node("router", router_node)
-workflow.add_node("pinecone_search", call_pinecone_node)
-workflow.add_node("cypher_search", call_cypher_node)
-workflow.add_node("synthesize_answer", synthesize_answer_node)
-workflow.add_node("parallel_search", parallel_search_node)
-
-workflow.set_entry_point("router")
-
-workflow.add_conditional_edges(
-    "router",
-    conditional_router,
-    {
-        "pinecone": "pinecone_search",
-        "cypher": "cypher_search",
-        "both": "parallel_search",
-        "none": "synthesize_answer"
+def build_app(wrap: Optional[Callable] = None):
+    """
+    Assemble and compile the workflow. `wrap(name, node_fn)`, if given, returns the
+    function to register for each node (used by the benchmarks to time nodes).
+    """
+    logger.info("Assembling LangGraph workflow...")
+    workflow = StateGraph(AgentState)
+
+    def add_node(name, fn):
+        workflow.add_node(name, wrap(name, fn) if wrap else fn)
+
+    # In speculative mode retrieval starts concurrently with routing, and the
+    # conditional edge only schedules the searches that did not run speculatively.
+    if config.SPECULATIVE_RETRIEVAL:
+        add_node("router", speculative_router_node)
+    else:
+        add_node("router", router_node)
+    add_node("pinecone_search", call_pinecone_node)
+    add_node("cypher_search", call_cypher_node)
+    add_node("synthesize_answer", synthesize_answer_node)
+    add_node("parallel_search", parallel_search_node)
+    add_node("fused_search", call_fused_retrieval_node)
+
+    # Retrieval results are compacted (deduplicated, tabulated, token-budgeted) before synthesis.
+    # "none" goes through it too: in speculative mode retrieval may already have run.
+    after_retrieval = "synthesize_answer"
+    if config.CONTEXT_PACKING_ENABLED:
+        add_node("pack_context", pack_context_node)
+        workflow.add_edge("pack_context", "synthesize_answer")
+        after_retrieval = "pack_context"
+
+    workflow.set_entry_point("router")
+
+    workflow.add_conditional_edges(
+        "router",
+        retrieval_route(speculative_conditional_router if config.SPECULATIVE_RETRIEVAL else conditional_router),
+        {
+            "pinecone": "pinecone_search",
+            "cypher": "cypher_search",
+            "both": "parallel_search",
+            "fused": "fused_search",
+            "none": after_retrieval
+        }
+    )
+
+    workflow.add_edge("parallel_search", "pinecone_search")
+    workflow.add_edge("parallel_search", "cypher_search")
+
+    workflow.add_edge("pinecone_search", after_retrieval)
+    workflow.add_edge("cypher_search", after_retrieval)
+    workflow.add_edge("fused_search", after_retrieval)
+
+    workflow.add_edge("synthesize_answer", END)
+
+    compiled = workflow.compile()
+    logger.info("Graph compiled successfully.")
+    return compiled
+
+app = build_app(wrap=tracing.traced_node if config.TRACING_ENABLED else None)
+
+# -----------------------------
+# Semantic Answer Cache
+# -----------------------------
+answer_cache = SemanticAnswerCache() if config.ANSWER_CACHE_ENABLED else None
+
+def initial_state(question: str) -> AgentState:
+    return {
+        "question": question,
+        "router_decision": "",
+        "vector_search_context": "",
+        "graph_search_context": "",
+        "answer": ""
     }
-)
 
-workflow.add_edge("parallel_search", "pinecone_search")
-workflow.add_edge("parallel_search", "cypher_search")
+def is_cacheable(state: AgentState) -> bool:
+    """Only cache answers produced without node errors."""
+    answer = state.get("answer", "")
+    return bool(answer) and not (
+        answer.startswith("Sorry, an error occurred")
+        or state.get("graph_search_context", "").startswith("Error running graph query")
+        or '"error"' in state.get("vector_search_context", "")
+    )
+
+async def _cache_lookup(question: str):
+    """Return (embedding, cached answer or None); (None, None) when the cache is disabled."""
+    if answer_cache is None:
+        return None, None
+    embedding = await aembed_text(question)
+    with tracing.span("answer_cache.lookup"):
+        cached = answer_cache.lookup(question, embedding)
+    tracing.count("answer_cache.hits" if cached is not None else "answer_cache.misses")
+    return embedding, cached
+
+def _cache_store(question: str, embedding, final_state: AgentState):
+    if answer_cache is None:
+        return
+    if is_cacheable(final_state):
+        answer_cache.store(question, embedding, final_state)
+    logger.info(f"Answer cache stats: {answer_cache.stats()}")
+
+async def ask(question: str) -> AgentState:
+    """Answer one question, serving near-duplicates of recent questions from the cache."""
+    with tracing.trace("ask", question=question):
+        embedding, cached = await _cache_lookup(question)
+        if cached is not None:
+            return cached.as_state(question)
+
+        final_state = await app.ainvoke(initial_state(question), config={"callbacks": tracing.callbacks()})
+        tracing.set_attr("route", final_state.get("router_decision", ""))
+        _cache_store(question, embedding, final_state)
+        return final_state
+
+# -----------------------------
+# Streaming
+# -----------------------------
+@dataclass
+class RequestTiming:
+    """Per-request latency: time to first answer token and to the final state."""
+    ttft_ms: Optional[float] = None
+    total_ms: float = 0.0
+    cached: bool = False
+
+    def log(self):
+        logger.info(
+            f"Latency: time-to-first-token {self.ttft_ms or 0:.0f}ms, total {self.total_ms:.0f}ms"
+            + (" (cached)" if self.cached else "")
+        )
+
+async def ask_stream(question: str, timing: Optional[RequestTiming] = None) -> AsyncIterator[tuple]:
+    """
+    Answer one question as a stream of events:
+      ("token", str)           - incremental answer text from the synthesis LLM
+      ("final", AgentState)    - the final state, once the workflow finished
+    Tokens come from LangGraph's "messages" stream mode, filtered to the synthesis node
+    so router / Cypher-generation LLM output never reaches the user.
+    """
+    timing = timing if timing is not None else RequestTiming()
+    start = time.perf_counter()
 
-workflow.add_edge("pinecone_search", "synthesize_answer")
-workflow.add_edge("cypher_search", "synthesize_answer")
+    def first_token():
+        if timing.ttft_ms is None:
+            timing.ttft_ms = (time.perf_counter() - start) * 1000
+            tracing.set_attr("ttft_ms", round(timing.ttft_ms, 3))
 
-workflow.add_edge("synthesize_answer", END)
+    with tracing.trace("ask_stream", question=question):
+        embedding, cached = await _cache_lookup(question)
+        if cached is not None:
+            timing.cached = True
+            first_token()
+            yield "token", cached.answer
+            timing.total_ms = (time.perf_counter() - start) * 1000
+            timing.log()
+            yield "final", cached.as_state(question)
+            return
 
-app = workflow.compile()
-logger.info("Graph compiled successfully.")
+        final_state: AgentState = initial_state(question)
+        async for mode, chunk in app.astream(
+            initial_state(question), stream_mode=["messages", "values"], config={"callbacks": tracing.callbacks()}
+        ):
+            if mode == "values":
+                final_state = chunk
+                continue
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "synthesize_answer" and message.content:
+                first_token()
+                yield "token", message.content
+
+        if timing.ttft_ms is None and final_state.get("answer"):
+            # e.g. the synthesis error path, which returns an answer without streaming it
+            first_token()
+            yield "token", final_state["answer"]
+        timing.total_ms = (time.perf_counter() - start) * 1000
+        tracing.set_attr("route", final_state.get("router_decision", ""))
+        timing.log()
+        _cache_store(question, embedding, final_state)
+        yield "final", final_state
 
 # -----------------------------
 # Main Async Runner
 # -----------------------------
 async def main():
+    tracing.configure_logging()
+    if config.WARM_UP_ON_START:
+        # Models and clients load while the user types the first question
+        registry.warm_up(background=config.WARM_UP_IN_BACKGROUND)
     logger.info("Vietnam Travel Assistant is ready!")
 
     print("\n--- Vietnam Travel Assistant ---")
@@ -91,16 +266,16 @@ async def main():
             print("\nAssistant: Goodbye! Have a great day.")
             break
 
-        inputs = {
-            "question": query,
-            "router_decision": "",
-            "vector_search_context": "",
-            "graph_search_context": "",
-            "answer": ""
-        }
-
         try:
-            final_state: AgentState = await app.ainvoke(inputs)
+            if config.STREAM_ANSWERS:
+                print("\nAssistant:")
+                async for kind, payload in ask_stream(query):
+                    if kind == "token":
+                        print(payload, end="", flush=True)
+                print()
+                continue
+
+            final_state: AgentState = await ask(query)
             answer = final_state.get(
                 "answer",
                 "Sorry, I seem to have lost my train of thought. Could you ask again?"
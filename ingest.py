@@ -0,0 +1,245 @@
+"""
+Streaming, incremental ingestion helpers shared by load_to_neo4j.py and pinecone_upload.py.
+
+`iter_entities` parses the dataset's top-level JSON array one item at a time, and
+`Manifest` keeps a per-sink content hash for every entity id so a re-sync only
+touches entities that were added, changed or removed since the last run.
+Both scripts bump a catalog version stamp when they finish, which invalidates
+caches built on top of the catalog (see answer_cache.py).
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024  # characters read from disk at a time
+MANIFEST_PATH = os.path.join(".ingest", "manifest.sqlite")
+MARK_SEEN_BATCH = 5000  # unchanged ids flushed to the manifest per statement
+CATALOG_VERSION_FILE = os.path.join(".cache", "catalog_version")
+
+
+# -----------------------------
+# Streaming JSON array parser
+# -----------------------------
+def iter_entities(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the items of a top-level JSON array without loading the whole file.
+
+    Memory is bounded by the largest single item plus one read chunk.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        # Skip to the opening bracket
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                break
+            if eof:
+                return
+            fill()
+        if buf[pos] != "[":
+            raise ValueError(f"{path}: expected a top-level JSON array")
+        pos += 1
+
+        while True:
+            # Skip whitespace and item separators
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                fill()
+                continue
+            if buf[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A scalar cut at the chunk boundary can still decode; make sure a delimiter follows.
+            if end >= len(buf) and not eof:
+                fill()
+                continue
+
+            pos = end
+            yield item
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+
+
+# -----------------------------
+# Catalog version stamp
+# -----------------------------
+def bump_catalog_version():
+    """Record that the catalog changed; caches derived from it compare against this stamp."""
+    os.makedirs(os.path.dirname(CATALOG_VERSION_FILE), exist_ok=True)
+    tmp = CATALOG_VERSION_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp, CATALOG_VERSION_FILE)  # a new inode, so readers' stat check always sees the change
+
+
+_version_cache = (None, "")  # ((inode, mtime_ns) of the stamp file, its contents)
+
+
+def read_catalog_version() -> str:
+    """The current stamp; read on every request, so the file is only re-read when its stat changes."""
+    global _version_cache
+    try:
+        st = os.stat(CATALOG_VERSION_FILE)
+    except FileNotFoundError:
+        return ""
+    key = (st.st_ino, st.st_mtime_ns)
+    if _version_cache[0] != key:
+        try:
+            with open(CATALOG_VERSION_FILE, "r", encoding="utf-8") as f:
+                _version_cache = (key, f.read().strip())
+        except FileNotFoundError:
+            return ""
+    return _version_cache[1]
+
+
+# -----------------------------
+# Search-record metadata
+# -----------------------------
+def vector_metadata(node: dict) -> dict:
+    """Metadata stored with each entity's search record (vector store and lexical index)."""
+    return {
+        "id": node.get("id"),
+        "type": node.get("type"),
+        "name": node.get("name"),
+        "city": node.get("city", node.get("region", "")),
+        "tags": node.get("tags", []),
+    }
+
+
+# -----------------------------
+# Content hashing
+# -----------------------------
+def content_hash(obj) -> str:
+    """Stable hash of a JSON-serialisable object (key order does not matter)."""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# Change-detection manifest
+# -----------------------------
+class Manifest:
+    """
+    SQLite-backed map of entity id -> content hash, kept separately per sink
+    ("neo4j", "pinecone") because each sink is synced by its own script.
+
+    Typical run:
+        manifest.begin_run()
+        for entity, digest in manifest.changed(entities, hash_fn): push, then manifest.commit(...)
+        manifest.removed_ids() -> delete from the sink, then manifest.forget(...)
+    A hash is only recorded by `commit`, so entities whose push failed are retried next run.
+    """
+
+    def __init__(self, sink: str, path: str = MANIFEST_PATH):
+        self.sink = sink
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            " sink TEXT NOT NULL, id TEXT NOT NULL, hash TEXT NOT NULL, run_id INTEGER NOT NULL,"
+            " PRIMARY KEY (sink, id))"
+        )
+        self.conn.commit()
+        self.run_id = None
+
+    def begin_run(self) -> int:
+        row = self.conn.execute(
+            "SELECT COALESCE(MAX(run_id), 0) FROM manifest WHERE sink = ?", (self.sink,)
+        ).fetchone()
+        self.run_id = row[0] + 1
+        return self.run_id
+
+    def _mark_seen(self, ids):
+        self.conn.executemany(
+            "UPDATE manifest SET run_id = ? WHERE sink = ? AND id = ?",
+            [(self.run_id, self.sink, _id) for _id in ids],
+        )
+        self.conn.commit()
+
+    def changed(self, entities, hash_fn=content_hash):
+        """
+        Yield (entity, digest) for every entity that is new or whose hash differs
+        from the manifest. Unchanged entities are only marked as seen.
+        """
+        if self.run_id is None:
+            self.begin_run()
+        seen = []
+        for entity in entities:
+            _id = entity["id"]
+            digest = hash_fn(entity)
+            row = self.conn.execute(
+                "SELECT hash FROM manifest WHERE sink = ? AND id = ?", (self.sink, _id)
+            ).fetchone()
+            if row is not None:
+                seen.append(_id)
+                if len(seen) >= MARK_SEEN_BATCH:
+                    self._mark_seen(seen)
+                    seen = []
+                if row[0] == digest:
+                    continue
+            yield entity, digest
+        if seen:
+            self._mark_seen(seen)
+
+    def has(self, _id) -> bool:
+        """Whether the id was pushed to this sink by an earlier run (i.e. it is not new)."""
+        row = self.conn.execute(
+            "SELECT 1 FROM manifest WHERE sink = ? AND id = ?", (self.sink, _id)
+        ).fetchone()
+        return row is not None
+
+    def commit(self, pairs):
+        """Record (id, digest) pairs after they were pushed successfully."""
+        self.conn.executemany(
+            "INSERT INTO manifest (sink, id, hash, run_id) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(sink, id) DO UPDATE SET hash = excluded.hash, run_id = excluded.run_id",
+            [(self.sink, _id, digest, self.run_id) for _id, digest in pairs],
+        )
+        self.conn.commit()
+
+    def removed_ids(self):
+        """Ids present in the manifest but not seen during the current run."""
+        rows = self.conn.execute(
+            "SELECT id FROM manifest WHERE sink = ? AND run_id <> ?", (self.sink, self.run_id)
+        )
+        return [r[0] for r in rows]
+
+    def forget(self, ids):
+        self.conn.executemany(
+            "DELETE FROM manifest WHERE sink = ? AND id = ?", [(self.sink, _id) for _id in ids]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,248 @@
+"""
+Local BM25 index over the catalog's text, fused with vector search results.
+
+Dense MiniLM similarity is fuzzy for exact names ("Hanoi Hotel 16") and single tags
+("trekking"); this inverted index matches their terms exactly. pinecone_upload.py builds
+it at ingest time from the same entities as the vector store and saves it to
+LEXICAL_INDEX_PATH. The search node queries both and merges the two rankings with
+reciprocal-rank fusion:
+
+    lexical = current_lexical_index().search("Hanoi Hotel 16", top_k=20)
+    fused = reciprocal_rank_fusion([dense["matches"], lexical["matches"]], top_k=5)
+
+Fields are weighted BM25F-style: a term in the name counts FIELD_WEIGHTS["name"] times
+towards the entity's term frequency. A running process reloads the index when the
+catalog version stamp changes (see ingest.py). Terms are plural-folded ("hotels" -> "hotel") in
+documents and queries alike.
+"""
+
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from catalog_index import DATA_FILE, tokenize
+from ingest import iter_entities, vector_metadata, read_catalog_version
+from resources import registry
+from vector_store import matches_filter, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0, "semantic_text": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+ANALYZER_VERSION = 3  # saved with the index; an index built by another analyzer is rebuilt
+
+# Dropped from documents and queries; everything else is left to IDF
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me of on or show some "
+    "tell that the their there these this to what where which with you your".split()
+)
+
+
+_ES_PLURAL_RE = re.compile(r"(ss|x|z|ch|sh)es$")
+
+
+def fold(term: str) -> str:
+    """
+    Light plural folding for terms longer than three letters:
+
+    >>> [fold(t) for t in ("activities", "beaches", "classes", "hotels", "class", "famous")]
+    ['activity', 'beach', 'class', 'hotel', 'class', 'famous']
+    """
+    if len(term) <= 3 or not term.endswith("s") or term.endswith(("ss", "us")):
+        return term
+    if term.endswith("ies"):
+        return term[:-3] + "y"
+    if _ES_PLURAL_RE.search(term):
+        return term[:-2]
+    return term[:-1]
+
+
+def analyze(text: str) -> List[str]:
+    """
+    Index / query terms: tokens without stopwords, plural-folded.
+
+    >>> analyze("activities") == analyze("activity")
+    True
+    """
+    return [fold(t) for t in tokenize(text) if t not in STOPWORDS]
+
+
+def entity_fields(node: dict) -> Dict[str, str]:
+    return {
+        "name": node.get("name") or "",
+        "tags": " ".join(t.replace("_", " ") for t in node.get("tags") or []),
+        "description": node.get("description") or "",
+        "semantic_text": node.get("semantic_text") or "",
+    }
+
+
+# ---------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------
+class LexicalIndex:
+    """Inverted index of term -> (entity rows, weighted term frequencies), scored with BM25."""
+
+    def __init__(self, ids: List[str], metadata: List[dict], doc_len: np.ndarray,
+                 postings: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        self.ids = ids
+        self.metadata = metadata
+        self.doc_len = doc_len
+        self.postings = postings
+        self._counts: Dict[str, int] = {}
+        n = len(ids)
+        avgdl = float(doc_len.mean()) if n else 1.0
+        # Per-entity part of the BM25 denominator and per-term IDF, computed once
+        self._norm = (BM25_K1 * (1 - BM25_B + BM25_B * doc_len / max(avgdl, 1e-9))).astype(np.float32)
+        self._idf = {
+            term: math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5)) for term, (rows, _) in postings.items()
+        }
+
+    @classmethod
+    def build(cls, entities: Iterable[dict]) -> "LexicalIndex":
+        ids, metadata, lengths = [], [], []
+        terms: Dict[str, Tuple[List[int], List[float]]] = {}
+        for node in entities:
+            if not node.get("id"):
+                continue
+            tf = Counter()
+            for field, text in entity_fields(node).items():
+                for term in analyze(text):
+                    tf[term] += FIELD_WEIGHTS[field]
+            row = len(ids)
+            ids.append(node["id"])
+            metadata.append(vector_metadata(node))
+            lengths.append(sum(tf.values()))
+            for term, freq in tf.items():
+                rows, freqs = terms.setdefault(term, ([], []))
+                rows.append(row)
+                freqs.append(freq)
+        postings = {
+            term: (np.asarray(rows, dtype=np.int32), np.asarray(freqs, dtype=np.float32))
+            for term, (rows, freqs) in terms.items()
+        }
+        return cls(ids, metadata, np.asarray(lengths, dtype=np.float32), postings)
+
+    # -- persistence ---------------------------------------------------
+    def save(self, path: str = config.LEXICAL_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "analyzer": ANALYZER_VERSION,
+                "ids": self.ids,
+                "metadata": self.metadata,
+                "doc_len": self.doc_len.tolist(),
+                "postings": {t: [rows.tolist(), freqs.tolist()] for t, (rows, freqs) in self.postings.items()},
+            }, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = config.LEXICAL_INDEX_PATH) -> "LexicalIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("analyzer", 1) != ANALYZER_VERSION:
+            raise ValueError(f"{path} was built with analyzer version {data.get('analyzer', 1)}, not {ANALYZER_VERSION}")
+        postings = {
+            t: (np.asarray(rows, dtype=np.int32), np.asarray(freqs, dtype=np.float32))
+            for t, (rows, freqs) in data["postings"].items()
+        }
+        return cls(data["ids"], data["metadata"], np.asarray(data["doc_len"], dtype=np.float32), postings)
+
+    # -- search --------------------------------------------------------
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every entity for the query `text` (0 = no query term matched)."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term, qtf in Counter(analyze(text)).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, tf = posting
+            scores[rows] += qtf * self._idf[term] * tf * (BM25_K1 + 1) / (tf + self._norm[rows])
+        return scores
+
+    def search(self, text: str, top_k: int, filter: Optional[dict] = None) -> dict:
+        """Pinecone-shaped results ({"matches": [{"id", "score", "metadata"}]}), best first."""
+        scores = self.scores(text)
+        rows = np.flatnonzero(scores > 0)
+        if filter:
+            rows = rows[[matches_filter(self.metadata[r], filter) for r in rows]] if len(rows) else rows
+        best = rows[top_k_indices(scores[rows], top_k)] if len(rows) else rows
+        return {"matches": [
+            {"id": self.ids[r], "score": float(scores[r]), "metadata": self.metadata[r]} for r in best
+        ]}
+
+    def count(self, filter: Optional[dict]) -> int:
+        """Catalog entities matching a metadata filter (answered locally, cached per filter)."""
+        if not filter:
+            return len(self.ids)
+        key = json.dumps(filter, sort_keys=True)
+        n = self._counts.get(key)
+        if n is None:
+            n = self._counts[key] = sum(matches_filter(m, filter) for m in self.metadata)
+        return n
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_lexical_index(path: str = DATA_FILE, out: str = config.LEXICAL_INDEX_PATH) -> LexicalIndex:
+    """Index the dataset and save it; called by pinecone_upload.py after every sync."""
+    index = LexicalIndex.build(iter_entities(path))
+    index.save(out)
+    logger.info(f"Lexical index built: {len(index)} entities, {len(index.postings)} terms -> {out}")
+    return index
+
+
+@registry.resource("lexical_index")
+def lexical_index() -> LexicalIndex:
+    if os.path.exists(config.LEXICAL_INDEX_PATH):
+        try:
+            return LexicalIndex.load()
+        except ValueError as e:
+            logger.warning(f"{e}; rebuilding it from {DATA_FILE}.")
+            return build_lexical_index()
+    logger.warning(f"No lexical index at {config.LEXICAL_INDEX_PATH}; building it from {DATA_FILE}.")
+    return LexicalIndex.build(iter_entities(DATA_FILE))
+
+
+_checked_version: Optional[str] = None
+_reload_lock = threading.Lock()
+
+
+def current_lexical_index() -> LexicalIndex:
+    """The shared index, reloaded once whenever the catalog version stamp changes."""
+    global _checked_version
+    version = read_catalog_version()
+    if version != _checked_version:
+        with _reload_lock:
+            if version != _checked_version:
+                if _checked_version is not None:
+                    logger.info("Catalog changed; reloading lexical index.")
+                    registry["lexical_index"].reset()
+                _checked_version = version
+    return lexical_index()
+
+
+# ---------------------------------------------------------------------
+# Fusion
+# ---------------------------------------------------------------------
+def reciprocal_rank_fusion(result_lists: List[List[dict]], top_k: int, k: int = config.RRF_K) -> List[dict]:
+    """
+    Merge ranked match lists by summing 1 / (k + rank) per id. Only ranks are used, so
+    cosine and BM25 scores need no calibration against each other.
+    """
+    fused: Dict[str, dict] = {}
+    for matches in result_lists:
+        for rank, m in enumerate(matches, start=1):
+            entry = fused.setdefault(m["id"], {"id": m["id"], "score": 0.0, "metadata": m.get("metadata", {})})
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda m: -m["score"])[:top_k]
@@ -1,27 +1,47 @@
 # load_to_neo4j.py
 import json
-from neo4j import GraphDatabase
+import time
+import argparse
+from collections import defaultdict
 from tqdm import tqdm
-import config
+from ingest import iter_entities, Manifest, bump_catalog_version
+from resources import invalidate_graph_schema
+from graph_snapshot import refresh_graph_snapshot
+from neo4j_access import session as neo4j_session, close_driver, query_stats
 
 DATA_FILE = "vietnam_travel_dataset.json"
-
-driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD))
+BULK_BATCH_SIZE = 1000  # rows per UNWIND statement in --bulk mode
 
 def create_constraints(tx):
     # generic uniqueness constraint on id for node label Entity (we also add label specific types)
     tx.run("CREATE CONSTRAINT IF NOT EXISTS FOR (n:Entity) REQUIRE n.id IS UNIQUE")
 
-def upsert_node(tx, node):
-    # use label from node['type'] and always add :Entity label
-    labels = [node.get("type","Unknown"), "Entity"]
-    label_cypher = ":" + ":".join(labels)
+def node_label(node):
+    return node.get("type", "Unknown")
+
+def graph_labels(tx):
+    return [r["label"] for r in tx.run("CALL db.labels() YIELD label RETURN label")]
+
+def stale_labels(label, labels):
+    # labels a node may still carry from an earlier type; removed when it is upserted
+    return [l for l in labels if l not in (label, "Entity")]
+
+def remove_clause(var, labels):
+    return f" REMOVE {var}" + "".join(f":`{l}`" for l in labels) if labels else ""
+
+def node_props(node):
     # keep a subset of properties to store (avoid storing huge nested objects)
-    props = {k:v for k,v in node.items() if k not in ("connections",)}
+    return {k:v for k,v in node.items() if k not in ("connections",)}
+
+def upsert_node(tx, node, labels=()):
+    # MERGE on the constrained :Entity id, then set the label from node['type'], so a
+    # node whose type changed is matched under its old label instead of duplicated
+    label = node_label(node)
+    props = node_props(node)
     # set properties using parameters
     tx.run(
-        f"MERGE (n{label_cypher} {{id: $id}}) "
-        "SET n += $props",
+        "MERGE (n:Entity {id: $id}) "
+        f"SET n:{label}, n += $props" + remove_clause("n", stale_labels(label, labels)),
         id=node["id"], props=props
     )
 
@@ -39,23 +59,195 @@ def create_relationship(tx, source_id, rel):
     )
     tx.run(cypher, source_id=source_id, target_id=target_id)
 
-def main():
+# -----------------------------
+# Bulk (UNWIND) loading
+# -----------------------------
+def chunked(items, n):
+    for i in range(0, len(items), n):
+        yield items[i : i + n]
+
+def group_nodes_by_label(nodes):
+    """Group node rows by label so each UNWIND statement uses a static label."""
+    groups = defaultdict(list)
+    for node in nodes:
+        groups[node_label(node)].append({"id": node["id"], "props": node_props(node)})
+    return groups
+
+def group_edges_by_relation(nodes):
+    """Group edge rows by relationship type; connections without a target are skipped."""
+    groups = defaultdict(list)
+    for node in nodes:
+        for rel in node.get("connections", []):
+            target_id = rel.get("target")
+            if not target_id:
+                continue
+            rel_type = rel.get("relation", "RELATED_TO")
+            groups[rel_type].append({"source_id": node["id"], "target_id": target_id})
+    return groups
+
+def bulk_upsert_nodes(tx, label, rows, labels=()):
+    # same MERGE/SET semantics as upsert_node, one round trip per batch
+    tx.run(
+        "UNWIND $rows AS row "
+        "MERGE (n:Entity {id: row.id}) "
+        f"SET n:{label}, n += row.props" + remove_clause("n", stale_labels(label, labels)),
+        rows=rows
+    )
+
+def bulk_create_relationships(tx, rel_type, rows):
+    # same MATCH/MERGE semantics as create_relationship, one round trip per batch
+    tx.run(
+        "UNWIND $rows AS row "
+        "MATCH (a:Entity {id: row.source_id}), (b:Entity {id: row.target_id}) "
+        f"MERGE (a)-[r:{rel_type}]->(b)",
+        rows=rows
+    )
+
+def load_per_row(session, nodes):
+    # Upsert all nodes
+    labels = session.execute_read(graph_labels)
+    for node in tqdm(nodes, desc="Creating nodes"):
+        session.execute_write(upsert_node, node, labels)
+
+    # Create relationships
+    for node in tqdm(nodes, desc="Creating relationships"):
+        conns = node.get("connections", [])
+        for rel in conns:
+            session.execute_write(create_relationship, node["id"], rel)
+
+def load_bulk(session, nodes, batch_size=BULK_BATCH_SIZE):
+    """Write nodes grouped by label, then edges grouped by type, in UNWIND batches."""
+    start = time.perf_counter()
+    node_count = 0
+    labels = session.execute_read(graph_labels)
+    for label, rows in group_nodes_by_label(nodes).items():
+        for batch in tqdm(list(chunked(rows, batch_size)), desc=f"Creating {label} nodes"):
+            session.execute_write(bulk_upsert_nodes, label, batch, labels)
+            node_count += len(batch)
+    node_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    edge_count = 0
+    for rel_type, rows in group_edges_by_relation(nodes).items():
+        for batch in tqdm(list(chunked(rows, batch_size)), desc=f"Creating {rel_type} relationships"):
+            session.execute_write(bulk_create_relationships, rel_type, batch)
+            edge_count += len(batch)
+    edge_secs = time.perf_counter() - start
+
+    print(f"Nodes: {node_count} in {node_secs:.2f}s ({node_count / max(node_secs, 1e-9):.0f} nodes/s)")
+    print(f"Edges: {edge_count} in {edge_secs:.2f}s ({edge_count / max(edge_secs, 1e-9):.0f} edges/s)")
+
+# -----------------------------
+# Incremental (manifest-driven) loading
+# -----------------------------
+def delete_outgoing_relationships(tx, ids):
+    # changed nodes get their connections rebuilt from the dataset
+    tx.run("UNWIND $ids AS id MATCH (a:Entity {id: id})-[r]->() DELETE r", ids=ids)
+
+def delete_nodes(tx, ids):
+    tx.run("UNWIND $ids AS id MATCH (n:Entity {id: id}) DETACH DELETE n", ids=ids)
+
+def incoming_edges(targets, skip):
+    """Edges to `targets` declared by entities not in `skip`, grouped by type (one pass over the dataset)."""
+    groups = defaultdict(list)
+    for node in iter_entities(DATA_FILE):
+        if node["id"] in skip:
+            continue
+        for rel_type, rows in group_edges_by_relation([node]).items():
+            groups[rel_type].extend(r for r in rows if r["target_id"] in targets)
+    return groups
+
+def load_incremental(session, batch_size=BULK_BATCH_SIZE):
+    """
+    Stream the dataset and only write entities whose content hash changed since the
+    last run, then delete entities that disappeared from the dataset.
+    Edges are created after all nodes so targets added later in the file exist.
+    Unchanged entities are not re-synced, so edges they declare to entities that are
+    new this run (whose MATCH found no target before) are found with a second pass.
+    """
+    manifest = Manifest("neo4j")
+    run_id = manifest.begin_run()
+    labels = set(session.execute_read(graph_labels))
+    pending_hashes = []
+    pending_edges = defaultdict(list)
+    new_ids = set()
+    batch = []
+
+    def flush(batch):
+        session.execute_write(delete_outgoing_relationships, [n["id"] for n in batch])
+        for label, rows in group_nodes_by_label(batch).items():
+            session.execute_write(bulk_upsert_nodes, label, rows, labels)
+            labels.add(label)
+
+    for node, digest in tqdm(manifest.changed(iter_entities(DATA_FILE)), desc="Syncing changed nodes"):
+        batch.append(node)
+        pending_hashes.append((node["id"], digest))
+        if not manifest.has(node["id"]):
+            new_ids.add(node["id"])
+        for rel_type, rows in group_edges_by_relation([node]).items():
+            pending_edges[rel_type].extend(rows)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if new_ids and run_id > 1:  # on the first run every entity is synced anyway
+        for rel_type, rows in incoming_edges(new_ids, {_id for _id, _ in pending_hashes}).items():
+            pending_edges[rel_type].extend(rows)
+
+    removed = manifest.removed_ids()
+    for ids in chunked(removed, batch_size):
+        session.execute_write(delete_nodes, ids)
+
+    edge_count = 0
+    for rel_type, rows in pending_edges.items():
+        for edges in chunked(rows, batch_size):
+            session.execute_write(bulk_create_relationships, rel_type, edges)
+            edge_count += len(edges)
+
+    manifest.forget(removed)
+    manifest.commit(pending_hashes)
+    manifest.close()
+    print(f"Upserted {len(pending_hashes)} changed nodes, {edge_count} edges; deleted {len(removed)} removed nodes.")
+
+def publish_graph_changes():
+    # derived artifacts first, version stamp last: a server that sees the new stamp
+    # must find the new snapshot on disk, or it would cache the old one as current
+    invalidate_graph_schema()
+    refresh_graph_snapshot()
+    bump_catalog_version()
+
+def main(bulk=False, batch_size=BULK_BATCH_SIZE, incremental=False):
+    if incremental:
+        with neo4j_session(write=True, timeout=None) as session:
+            session.execute_write(create_constraints)
+            load_incremental(session, batch_size)
+        publish_graph_changes()
+        print(query_stats.summary())
+        close_driver()
+        print("Done syncing Neo4j.")
+        return
+
     with open(DATA_FILE, "r", encoding="utf-8") as f:
         nodes = json.load(f)
 
-    with driver.session() as session:
+    with neo4j_session(write=True, timeout=None) as session:
         session.execute_write(create_constraints)
-        # Upsert all nodes
-        for node in tqdm(nodes, desc="Creating nodes"):
-            session.execute_write(upsert_node, node)
-
-        # Create relationships
-        for node in tqdm(nodes, desc="Creating relationships"):
-            conns = node.get("connections", [])
-            for rel in conns:
-                session.execute_write(create_relationship, node["id"], rel)
+        if bulk:
+            load_bulk(session, nodes, batch_size)
+        else:
+            load_per_row(session, nodes)
 
+    publish_graph_changes()
+    print(query_stats.summary())
+    close_driver()
     print("Done loading into Neo4j.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load the travel dataset into Neo4j.")
+    parser.add_argument("--bulk", action="store_true", help="write nodes/edges in batched UNWIND statements")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="rows per UNWIND batch")
+    parser.add_argument("--incremental", action="store_true", help="stream the dataset and only sync changed/removed entities")
+    args = parser.parse_args()
+    main(bulk=args.bulk, batch_size=args.batch_size, incremental=args.incremental)
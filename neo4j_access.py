@@ -0,0 +1,176 @@
+"""
+Shared Neo4j access layer: one driver per process, a tuned connection pool, read/write
+routing, retries on transient errors and per-query timing.
+
+    from neo4j_access import run_read, session
+
+    rows = run_read("MATCH (c:City) RETURN c.name AS name", name="city_names")
+
+    with session(write=True) as s:          # load scripts keep their tx functions
+        s.execute_write(create_constraints)
+
+Queries go through managed transactions (`execute_read` / `execute_write`), so the
+driver retries transient failures (leader switches, dropped connections, deadlocks) for
+up to NEO4J_MAX_RETRY_TIME seconds, and reads are routed to followers/read replicas on
+a cluster. Every transaction is timed and its retries counted in `query_stats`.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS, unit_of_work
+
+import config
+from resources import registry
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------
+def create_driver():
+    return GraphDatabase.driver(
+        config.NEO4J_URI,
+        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD),
+        max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=config.NEO4J_MAX_CONNECTION_LIFETIME,
+        liveness_check_timeout=config.NEO4J_LIVENESS_CHECK_TIMEOUT,
+        keep_alive=True,
+        max_transaction_retry_time=config.NEO4J_MAX_RETRY_TIME,
+    )
+
+
+@registry.resource("neo4j_driver")
+def neo4j_driver():
+    driver = create_driver()
+    driver.verify_connectivity()
+    return driver
+
+
+def close_driver():
+    """Close the shared driver (end of a script, server shutdown); it reopens on next use."""
+    resource = registry["neo4j_driver"]
+    if resource.built:
+        resource().close()
+        resource.reset()
+
+
+# ---------------------------------------------------------------------
+# Query statistics
+# ---------------------------------------------------------------------
+class QueryStats:
+    """Per query name: count, latency, retries and errors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries: Dict[str, dict] = {}
+
+    def record(self, name: str, elapsed_ms: float, retries: int, failed: bool):
+        with self._lock:
+            q = self.queries.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "retries": 0, "errors": 0})
+            q["count"] += 1
+            q["total_ms"] += elapsed_ms
+            q["max_ms"] = max(q["max_ms"], elapsed_ms)
+            q["retries"] += retries
+            q["errors"] += int(failed)
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [
+                f"{name}: n={q['count']} avg={q['total_ms'] / q['count']:.1f}ms max={q['max_ms']:.0f}ms "
+                f"retries={q['retries']} errors={q['errors']}"
+                for name, q in sorted(self.queries.items())
+            ]
+        return "Neo4j queries: " + ("; ".join(parts) if parts else "none")
+
+
+query_stats = QueryStats()
+
+
+# ---------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------
+class TimedSession:
+    """
+    Wraps a driver session so managed transactions are timed and their retries
+    counted. Anything else is delegated to the underlying session.
+    """
+
+    def __init__(self, session, timeout: Optional[float] = None):
+        self._session = session
+        self._timeout = timeout
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._execute(self._session.execute_read, work, args, kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._execute(self._session.execute_write, work, args, kwargs)
+
+    def _execute(self, method, work, args, kwargs):
+        name = getattr(work, "__name__", "query")
+        attempts = 0
+
+        @unit_of_work(timeout=self._timeout)
+        def attempt(tx, *a, **k):
+            nonlocal attempts
+            attempts += 1
+            return work(tx, *a, **k)
+
+        start = time.perf_counter()
+        failed = False
+        with span(f"neo4j:{name}") as s:
+            try:
+                return method(attempt, *args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                query_stats.record(name, elapsed_ms, max(0, attempts - 1), failed)
+                if attempts > 1:
+                    if s is not None:
+                        s.attrs["retries"] = attempts - 1
+                    logger.warning(f"Neo4j transaction '{name}' needed {attempts} attempts ({elapsed_ms:.0f}ms).")
+
+    def __getattr__(self, item):
+        return getattr(self._session, item)
+
+
+@contextmanager
+def session(write: bool = False, timeout: Optional[float] = config.NEO4J_QUERY_TIMEOUT):
+    """Session on the shared driver, routed to writers (`write=True`) or readers."""
+    s = neo4j_driver().session(
+        database=config.NEO4J_DATABASE,
+        default_access_mode=WRITE_ACCESS if write else READ_ACCESS,
+    )
+    try:
+        yield TimedSession(s, timeout)
+    finally:
+        s.close()
+
+
+# ---------------------------------------------------------------------
+# One-shot queries
+# ---------------------------------------------------------------------
+def _run(query: str, params: Optional[dict], name: str, write: bool) -> List[dict]:
+    def work(tx):
+        return [record.data() for record in tx.run(query, params or {})]
+
+    work.__name__ = name
+    with session(write=write) as s:
+        return s.execute_write(work) if write else s.execute_read(work)
+
+
+def run_read(query: str, params: Optional[dict] = None, name: str = "read") -> List[dict]:
+    """Run a read-only query in a retried read transaction; returns records as dicts."""
+    return _run(query, params, name, write=False)
+
+
+def run_write(query: str, params: Optional[dict] = None, name: str = "write") -> List[dict]:
+    return _run(query, params, name, write=True)
@@ -0,0 +1,239 @@
+"""
+ONNX Runtime backend for the MiniLM sentence encoder.
+
+SentenceTransformer runs the model through full PyTorch, which is the slowest CPU step
+on the query path and dominates startup with its import. With
+`config.EMBEDDING_BACKEND = "onnx"` the encoder runs the same network through
+onnxruntime and the `tokenizers` library instead; neither PyTorch nor transformers is
+imported at query time.
+
+The model is exported once (PyTorch is needed for that step only):
+
+    python onnx_encoder.py                 # float32 export, parity-checked
+    python onnx_encoder.py --quantize      # plus int8 dynamic quantization
+
+The exported graph includes the SentenceTransformer pooling and normalization, so it
+outputs the final embeddings. Each export is compared with the PyTorch embeddings and
+rejected when any cosine similarity is below ONNX_PARITY_MIN_COSINE: models are written
+under temporary names and only moved into place once they pass. Inference is
+batched (texts sorted by length to minimize padding) with ONNX_INTRA_OP_THREADS
+threads per call.
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from typing import List, Union
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+META_FILE = "encoder.json"
+TOKENIZER_FILE = "tokenizer.json"
+OPSET = 14
+PARITY_SAMPLE = 128  # catalog texts compared with the PyTorch model after export
+
+
+def model_dir(model_name: str = config.EMBEDDING_MODEL_NAME) -> str:
+    return os.path.join(config.ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def cache_name(model_name: str = config.EMBEDDING_MODEL_NAME, quantized: bool = config.ONNX_QUANTIZE) -> str:
+    """Embedding cache namespace: float32 ONNX matches PyTorch, int8 vectors differ slightly."""
+    return f"{model_name}:onnx-int8" if quantized else model_name
+
+
+# ---------------------------------------------------------------------
+# Inference
+# ---------------------------------------------------------------------
+class OnnxEncoder:
+    """SentenceTransformer-compatible `encode` over an exported model (see module docstring)."""
+
+    def __init__(self, path: str = None, quantized: bool = config.ONNX_QUANTIZE,
+                 threads: int = config.ONNX_INTRA_OP_THREADS, batch_size: int = config.ONNX_BATCH_SIZE,
+                 model_file: str = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = path or model_dir()
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.meta["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.meta["pad_id"], pad_token=self.meta["pad_token"])
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads  # 0 = onnxruntime default (all cores)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        model_file = model_file or os.path.join(path, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        logger.info(f"ONNX encoder loaded: {model_file} ({threads or 'default'} threads)")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta["dimension"]
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        return self.session.run(["embedding"], {k: v for k, v in feeds.items() if k in self._inputs})[0]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = None, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.empty((len(texts), self.meta["dimension"]), dtype=np.float32)
+        order = np.argsort([-len(t) for t in texts], kind="stable")  # similar lengths share a batch
+        size = batch_size or self.batch_size
+        for start in range(0, len(texts), size):
+            rows = order[start : start + size]
+            out[rows] = self._run([texts[i] for i in rows])
+        return out[0] if single else out
+
+
+def load_onnx_encoder(model_name: str = config.EMBEDDING_MODEL_NAME, quantized: bool = config.ONNX_QUANTIZE) -> OnnxEncoder:
+    """The exported encoder, exporting it first (once, with PyTorch) if it is missing."""
+    path = model_dir(model_name)
+    if not os.path.exists(os.path.join(path, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)):
+        logger.warning(f"No ONNX export of {model_name} in {path}; exporting it now (needs PyTorch once).")
+        export(model_name, quantize=quantized)
+    return OnnxEncoder(path, quantized)
+
+
+# ---------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two embedding matrices."""
+    num = np.sum(reference * candidate, axis=1)
+    den = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return num / np.maximum(den, 1e-12)
+
+
+def parity_texts(n: int = PARITY_SAMPLE) -> List[str]:
+    from ingest import iter_entities
+    from catalog_index import DATA_FILE
+
+    texts = [e.get("semantic_text") or e.get("description") or e.get("name") or "" for e in iter_entities(DATA_FILE)]
+    return [t for t in texts if t][:n] + ["Hello", "Which hotels are in Da Nang and what are they like?"]
+
+
+def check_parity(st_model, encoder: OnnxEncoder, texts: List[str],
+                 min_cosine: float = config.ONNX_PARITY_MIN_COSINE) -> float:
+    """Minimum cosine between PyTorch and ONNX embeddings; raises if below `min_cosine`."""
+    worst = float(cosine_parity(st_model.encode(texts, show_progress_bar=False), encoder.encode(texts)).min())
+    if worst < min_cosine:
+        raise ValueError(f"ONNX embeddings diverge from PyTorch: min cosine {worst:.6f} < {min_cosine}")
+    return worst
+
+
+def staged_path(path: str) -> str:
+    """Temporary name a model is written under until it passes the parity check."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.tmp{ext}"
+
+
+def publish(path: str, st_model, out_dir: str, texts: List[str], quantized: bool) -> float:
+    """Move the staged model to `path` if it passes the parity check; otherwise delete it and raise."""
+    staged = staged_path(path)
+    try:
+        worst = check_parity(st_model, OnnxEncoder(out_dir, quantized, model_file=staged), texts)
+    except Exception:
+        os.remove(staged)
+        raise
+    os.replace(staged, path)
+    return worst
+
+
+def export(model_name: str = config.EMBEDDING_MODEL_NAME, out_dir: str = None, quantize: bool = False) -> str:
+    """Export the SentenceTransformer model (with pooling and normalization) to ONNX."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    out_dir = out_dir or model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = st_model[0], st_model[1]
+    if not (pooling.pooling_mode_mean_tokens or pooling.pooling_mode_cls_token):
+        raise ValueError("Only mean or CLS pooling can be exported")
+    mean_pooling = bool(pooling.pooling_mode_mean_tokens)
+    normalize = any(isinstance(m, models.Normalize) for m in st_model)
+
+    class SentenceEmbedding(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            tokens = self.model(input_ids=input_ids, attention_mask=attention_mask,
+                                token_type_ids=token_type_ids)[0]
+            if mean_pooling:
+                mask = attention_mask.unsqueeze(-1).to(tokens.dtype)
+                emb = (tokens * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            else:
+                emb = tokens[:, 0]
+            return torch.nn.functional.normalize(emb, p=2, dim=1) if normalize else emb
+
+    tokenizer = transformer.tokenizer
+    dummy = tokenizer(["a sample sentence", "another one"], padding=True, return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    fp32_path = os.path.join(out_dir, MODEL_FILE)
+    start = time.perf_counter()
+    with torch.no_grad():
+        torch.onnx.export(
+            SentenceEmbedding(transformer.auto_model).eval(),
+            tuple(dummy[n] for n in names),
+            staged_path(fp32_path),
+            input_names=names,
+            output_names=["embedding"],
+            dynamic_axes={**{n: {0: "batch", 1: "sequence"} for n in names}, "embedding": {0: "batch"}},
+            opset_version=OPSET,
+            do_constant_folding=True,
+        )
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, TOKENIZER_FILE))
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "pad_id": tokenizer.pad_token_id,
+            "pad_token": tokenizer.pad_token,
+        }, f, indent=2)
+    logger.info(f"Exported {model_name} to {fp32_path} in {time.perf_counter() - start:.1f}s.")
+
+    texts = parity_texts()
+    worst = publish(fp32_path, st_model, out_dir, texts, quantized=False)
+    logger.info(f"✅ float32 parity: min cosine {worst:.6f} over {len(texts)} texts.")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = os.path.join(out_dir, QUANTIZED_MODEL_FILE)
+        quantize_dynamic(fp32_path, staged_path(int8_path), weight_type=QuantType.QInt8)
+        worst = publish(int8_path, st_model, out_dir, texts, quantized=True)
+        logger.info(f"✅ int8 parity: min cosine {worst:.6f} over {len(texts)} texts "
+                    f"({os.path.getsize(int8_path) / os.path.getsize(fp32_path):.0%} of the float32 size).")
+    return out_dir
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - [%(levelname)s] - %(message)s", datefmt="%H:%M:%S")
+    parser = argparse.ArgumentParser(description="Export the sentence encoder to ONNX and check parity.")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--out", default=None, help=f"output directory (default: under {config.ONNX_MODEL_DIR})")
+    parser.add_argument("--quantize", action="store_true", help="also write an int8 dynamically quantized model")
+    args = parser.parse_args()
+    export(args.model, args.out, args.quantize)
@@ -1,13 +1,17 @@
 # pinecone_upload.py
-import json
 import time
+import random
 import asyncio
 import logging
+import argparse
+from dataclasses import dataclass, field
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
 import config
+from resources import embed_model
+from vector_store import get_vector_store
+from lexical_index import build_lexical_index
+from ingest import iter_entities, content_hash, vector_metadata, Manifest, bump_catalog_version
 
 
 # -----------------------------
@@ -16,9 +20,9 @@ import config
 DATA_FILE = "vietnam_travel_dataset.json"
 BATCH_SIZE = 64  # slightly higher for better throughput
 MAX_WORKERS = 5  # concurrent upserts
-
-INDEX_NAME = config.PINECONE_INDEX_NAME
-VECTOR_DIM = config.PINECONE_VECTOR_DIM  # 1536 for text-embedding-3-small
+QUEUE_SIZE = 2 * MAX_WORKERS  # embedded batches waiting for upload (backpressure bound)
+MAX_RETRIES = 4  # upsert attempts after the first one
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry
 
 
 # -----------------------------
@@ -36,32 +40,19 @@ logger = logging.getLogger(__name__)
 # Initialize clients
 # -----------------------------
 logger.info("Initializing clients...")
-pc = Pinecone(api_key=config.PINECONE_API_KEY)
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# Create index if not exists
-existing_indexes = pc.list_indexes().names()
-if INDEX_NAME not in existing_indexes:
-    logger.info(f"Creating new Pinecone index: {INDEX_NAME}")
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=VECTOR_DIM,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-    )
-else:
-    logger.info(f"Index '{INDEX_NAME}' already exists.")
-
-index = pc.Index(INDEX_NAME)
-logger.info(f"Connected to Pinecone index: {INDEX_NAME}")
+model = embed_model()  # PyTorch or ONNX Runtime, per config.EMBEDDING_BACKEND
+
+# Pinecone or the local in-process index, depending on config.VECTOR_BACKEND
+index = get_vector_store()
+logger.info(f"Connected to vector store: {config.VECTOR_BACKEND}")
 
 
 # -----------------------------
 # Helper functions
 # -----------------------------
 def get_embeddings(texts):
-    """Generate embeddings using SentenceTransformer."""
-    return model.encode(texts).tolist()
+    """Generate embeddings with the configured encoder (float32 rows; lists only at the Pinecone boundary)."""
+    return model.encode(texts)
 
 
 def chunked(iterable, n):
@@ -69,71 +60,208 @@ def chunked(iterable, n):
         yield iterable[i : i + n]
 
 
+def chunked_iter(iterable, n):
+    """Like chunked, but for generators: holds at most n items at a time."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 # -----------------------------
 # Async helpers
 # -----------------------------
 executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+encode_executor = ThreadPoolExecutor(max_workers=1)  # one encoder thread; the model parallelises internally
+
+
+@dataclass
+class UploadStats:
+    """Counters reported at the end of a pipeline run."""
+    items: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    failed_items: int = 0
+    encode_secs: float = 0.0
+    upsert_secs: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (
+            f"{self.items} items in {self.batches} batches, {elapsed:.2f}s "
+            f"({self.items / max(elapsed, 1e-9):.1f} items/s) | "
+            f"encode {self.encode_secs:.2f}s, upsert {self.upsert_secs:.2f}s | "
+            f"retries {self.retries}, failed {self.failed_batches} batches / {self.failed_items} items"
+        )
 
-async def async_upsert(vectors, batch_num):
-    """Run Pinecone upsert asynchronously using thread executor."""
-    loop = asyncio.get_event_loop()
-    start = time.time()
-    try:
-        await loop.run_in_executor(executor, index.upsert, vectors)
-        logger.info(f"✅ Batch {batch_num} uploaded ({len(vectors)} items) in {time.time() - start:.2f}s")
-    except Exception as e:
-        logger.error(f"❌ Error uploading batch {batch_num}: {e}")
 
+async def upsert_with_retry(vectors, batch_num, stats):
+    """Upsert one batch, retrying with exponential backoff. Returns True on success."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(executor, index.upsert, vectors)
+            stats.upsert_secs += time.perf_counter() - start
+            logger.info(f"✅ Batch {batch_num} uploaded ({len(vectors)} items) in {time.perf_counter() - start:.2f}s")
+            return True
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                logger.error(f"❌ Giving up on batch {batch_num} after {attempt + 1} attempts: {e}")
+                return False
+            delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random() * 0.2)
+            stats.retries += 1
+            logger.warning(f"⚠️ Batch {batch_num} failed ({e}); retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
 
-async def upload_batches(all_batches):
-    """Upload all batches concurrently."""
-    tasks = []
-    for i, batch in enumerate(all_batches, start=1):
-        tasks.append(async_upsert(batch, i))
-    await asyncio.gather(*tasks)
+
+async def run_pipeline(items, on_batch_done=None):
+    """
+    Embed and upsert `items` ((id, text, metadata) tuples, any iterable) as a bounded
+    producer/consumer pipeline: one producer encodes batches while MAX_WORKERS consumers
+    upsert them. The queue holds at most QUEUE_SIZE batches, so encoding pauses when
+    uploads fall behind and memory stays flat regardless of dataset size.
+
+    `on_batch_done(batch, ok)` is called after every batch is uploaded (or given up on).
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    stats = UploadStats()
+    progress = tqdm(desc="Uploading", unit="items")
+
+    async def producer():
+        try:
+            for batch_num, batch in enumerate(chunked_iter(items, BATCH_SIZE), start=1):
+                texts = [item[1] for item in batch]
+                start = time.perf_counter()
+                try:
+                    embeddings = await loop.run_in_executor(encode_executor, get_embeddings, texts)
+                except Exception as e:
+                    logger.error(f"❌ Error embedding batch {batch_num}: {e}")
+                    stats.failed_batches += 1
+                    stats.failed_items += len(batch)
+                    if on_batch_done:
+                        on_batch_done(batch, False)
+                    continue
+                stats.encode_secs += time.perf_counter() - start
+                vectors = [
+                    {"id": _id, "values": emb, "metadata": meta}
+                    for (_id, _, meta), emb in zip(batch, embeddings)
+                ]
+                await queue.put((batch_num, batch, vectors))  # blocks while the queue is full
+        finally:
+            for _ in range(MAX_WORKERS):
+                await queue.put(None)
+
+    async def consumer():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            batch_num, batch, vectors = job
+            ok = await upsert_with_retry(vectors, batch_num, stats)
+            stats.batches += 1
+            if ok:
+                stats.items += len(batch)
+            else:
+                stats.failed_batches += 1
+                stats.failed_items += len(batch)
+            progress.update(len(batch))
+            if on_batch_done:
+                on_batch_done(batch, ok)
+
+    await asyncio.gather(producer(), *(consumer() for _ in range(MAX_WORKERS)))
+    progress.close()
+    return stats
 
 
 # -----------------------------
 # Main upload logic
 # -----------------------------
+def build_item(node):
+    """Return (id, semantic_text, metadata) for a dataset entity, or None if it has no text."""
+    semantic_text = node.get("semantic_text") or (node.get("description") or "")[:1000]
+    if not semantic_text.strip():
+        return None
+    return (node["id"], semantic_text, vector_metadata(node))
+
+
+def item_hash(item):
+    """Only the embedded text and stored metadata affect the vector record."""
+    _id, text, meta = item
+    return content_hash({"text": text, "metadata": meta})
+
+
+def iter_items():
+    """Stream upload items straight from the dataset file."""
+    for node in iter_entities(DATA_FILE):
+        item = build_item(node)
+        if item is not None:
+            yield item
+
+
+def sync_incremental():
+    """
+    Stream the dataset, embed and upsert only items whose text/metadata changed
+    since the last run, and delete vectors whose entities were removed.
+    """
+    manifest = Manifest("pinecone")
+    manifest.begin_run()
+    pending = {}  # id -> digest for batches still in the pipeline
+
+    def changed_items():
+        entries = ({"id": item[0], "item": item} for item in iter_items())
+        for entry, digest in manifest.changed(entries, hash_fn=lambda e: item_hash(e["item"])):
+            pending[entry["id"]] = digest
+            yield entry["item"]
+
+    def on_batch_done(batch, ok):
+        digests = [(item[0], pending.pop(item[0])) for item in batch]
+        if ok:
+            manifest.commit(digests)
+
+    stats = asyncio.run(run_pipeline(changed_items(), on_batch_done))
+
+    removed = manifest.removed_ids()
+    for ids in chunked(removed, BATCH_SIZE):
+        index.delete(ids=ids)
+        manifest.forget(ids)
+    index.flush()
+    manifest.close()
+    build_lexical_index(DATA_FILE)  # full rebuild: one pass over the dataset, no embeddings
+    bump_catalog_version()
+
+    logger.info(f"📊 {stats.summary()}")
+    logger.info(f"📦 Embedding cache: {model.cache.stats()}")
+    logger.info(f"🎉 Incremental sync done: {stats.items} upserted, {stats.failed_items} failed, {len(removed)} deleted.")
+
+
 def main():
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        nodes = json.load(f)
-
-    items = []
-    for node in nodes:
-        semantic_text = node.get("semantic_text") or (node.get("description") or "")[:1000]
-        if not semantic_text.strip():
-            continue
-        meta = {
-            "id": node.get("id"),
-            "type": node.get("type"),
-            "name": node.get("name"),
-            "city": node.get("city", node.get("region", "")),
-            "tags": node.get("tags", []),
-        }
-        items.append((node["id"], semantic_text, meta))
-
-    logger.info(f"Preparing to upload {len(items)} items in batches of {BATCH_SIZE}...")
-
-    all_batches = []
-    for batch in tqdm(list(chunked(items, BATCH_SIZE)), desc="Preparing batches"):
-        ids = [item[0] for item in batch]
-        texts = [item[1] for item in batch]
-        metas = [item[2] for item in batch]
-        embeddings = get_embeddings(texts)
-
-        vectors = [
-            {"id": _id, "values": emb, "metadata": meta}
-            for _id, emb, meta in zip(ids, embeddings, metas)
-        ]
-        all_batches.append(vectors)
-
-    logger.info(f"Starting async upload with {MAX_WORKERS} workers...")
-    asyncio.run(upload_batches(all_batches))
-    logger.info("🎉 All items uploaded successfully.")
+    logger.info(f"Streaming items from {DATA_FILE} in batches of {BATCH_SIZE} with {MAX_WORKERS} upload workers...")
+    stats = asyncio.run(run_pipeline(iter_items()))
+    index.flush()
+    build_lexical_index(DATA_FILE)
+    bump_catalog_version()
+    logger.info(f"📊 {stats.summary()}")
+    logger.info(f"📦 Embedding cache: {model.cache.stats()}")
+    if stats.failed_items:
+        logger.error(f"⚠️ {stats.failed_items} items could not be uploaded.")
+    else:
+        logger.info("🎉 All items uploaded successfully.")
 
 
 # -----------------------------
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embed the travel dataset and upload it to the vector store.")
+    parser.add_argument("--incremental", action="store_true", help="stream the dataset and only sync changed/removed entities")
+    args = parser.parse_args()
+    if args.incremental:
+        sync_incremental()
+    else:
+        main()
\ No newline at end of file
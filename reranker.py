@@ -0,0 +1,161 @@
+"""
+Cross-encoder reranking of vector search candidates.
+
+MiniLM bi-encoder similarity ranks passages by topic; a cross-encoder reads the question
+and each passage together and scores how well the passage answers it. The search node
+over-fetches RERANK_CANDIDATES hybrid matches, this module rescores them on CPU and keeps
+only those above RERANK_THRESHOLD, so synthesis gets fewer, better passages:
+
+    matches = retrieve(question, vec, config.RERANK_CANDIDATES)["matches"]
+    kept = rerank(question, matches, keep_max=5)
+
+Candidates are scored in batches of RERANK_BATCH_SIZE in retrieval order. Once a batch
+adds nothing above the threshold the rest are not scored (adaptive depth: a precise
+question, or one the catalog cannot answer, stops after the first batch).
+Scores are cached per (question, entity id) until the catalog version changes.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import config
+from catalog_index import get_catalog_index
+from embedding_cache import normalize_text
+from ingest import read_catalog_version
+from resources import registry
+from tracing import set_attr, count
+
+logger = logging.getLogger(__name__)
+
+PASSAGE_MAX_CHARS = 600   # cross-encoder cost grows with passage length; MiniLM reads 512 tokens at most
+
+
+# ---------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------
+@registry.resource("rerank_model", enabled=lambda: config.RERANK_ENABLED)
+def rerank_model():
+    """Small MS MARCO cross-encoder on CPU, with sigmoid scores in [0, 1]."""
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(config.RERANK_MODEL_NAME, device="cpu", default_activation_function=torch.nn.Sigmoid())
+
+
+def passage(match: dict) -> str:
+    """Text the cross-encoder reads for a match: name, type, city, tags and description."""
+    meta = match.get("metadata", {})
+    entity = get_catalog_index().entities.get(match["id"], {})
+    header = ", ".join(str(v) for v in (meta.get("name"), meta.get("type"), meta.get("city")) if v)
+    tags = meta.get("tags") or entity.get("tags") or []
+    if tags:
+        header += f" ({', '.join(t.replace('_', ' ') for t in tags)})"
+    body = entity.get("semantic_text") or entity.get("description") or ""
+    return f"{header}. {body}"[:PASSAGE_MAX_CHARS]
+
+
+# ---------------------------------------------------------------------
+# Score cache
+# ---------------------------------------------------------------------
+class RerankScoreCache:
+    """Thread-safe LRU of (normalized question, entity id) -> score, cleared on catalog changes."""
+
+    def __init__(self, max_entries: int = config.RERANK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._version = read_catalog_version()
+        self._lock = threading.Lock()
+
+    def get_many(self, question: str, ids: List[str]) -> Dict[str, float]:
+        q = normalize_text(question).lower()
+        found = {}
+        with self._lock:
+            version = read_catalog_version()
+            if version != self._version:
+                logger.info("Catalog changed since scores were cached; clearing rerank cache.")
+                self._version = version
+                self._scores.clear()
+            for _id in ids:
+                score = self._scores.get((q, _id))
+                if score is not None:
+                    self._scores.move_to_end((q, _id))
+                    found[_id] = score
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+        return found
+
+    def put_many(self, question: str, scores: Dict[str, float]):
+        q = normalize_text(question).lower()
+        with self._lock:
+            for _id, score in scores.items():
+                self._scores[(q, _id)] = score
+                self._scores.move_to_end((q, _id))
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+    def __len__(self):
+        return len(self._scores)
+
+
+score_cache = RerankScoreCache()
+
+
+# ---------------------------------------------------------------------
+# Reranking
+# ---------------------------------------------------------------------
+def score_batch(question: str, batch: List[dict]) -> Dict[str, float]:
+    """Cross-encoder scores for one batch of matches, from the cache where possible."""
+    ids = [m["id"] for m in batch]
+    scores = score_cache.get_many(question, ids)
+    missing = [m for m in batch if m["id"] not in scores]
+    if missing:
+        predicted = rerank_model().predict(
+            [(question, passage(m)) for m in missing], batch_size=config.RERANK_BATCH_SIZE, show_progress_bar=False
+        )
+        fresh = {m["id"]: float(s) for m, s in zip(missing, predicted)}
+        score_cache.put_many(question, fresh)
+        scores.update(fresh)
+    count("rerank.cache_hits", len(batch) - len(missing))
+    count("rerank.scored", len(missing))
+    return scores
+
+
+def rerank(question: str, matches: List[dict], keep_max: int,
+           threshold: float = config.RERANK_THRESHOLD, min_keep: int = config.RERANK_MIN_KEEP) -> List[dict]:
+    """
+    Matches reordered by cross-encoder score (which replaces `score`), keeping those at
+    or above `threshold`: at least `min_keep`, at most `keep_max`.
+    """
+    if not matches:
+        return []
+    scores: Dict[str, float] = {}
+    passed = 0
+    size = max(config.RERANK_BATCH_SIZE, 1)
+    for start in range(0, len(matches), size):
+        batch = score_batch(question, matches[start:start + size])
+        scores.update(batch)
+        new = sum(s >= threshold for s in batch.values())
+        passed += new
+        if new == 0:
+            break  # deeper candidates rank lower still; stop paying for them
+
+    ranked = sorted((m for m in matches if m["id"] in scores), key=lambda m: -scores[m["id"]])
+    keep = max(min(passed, keep_max), min(min_keep, keep_max))
+    kept = [{**m, "score": scores[m["id"]]} for m in ranked[:keep]]
+
+    set_attr("rerank.candidates", len(matches))
+    set_attr("rerank.depth", len(scores))
+    set_attr("rerank.kept", len(kept))
+    logger.info(
+        f"Reranked {len(scores)}/{len(matches)} candidates: kept {len(kept)} "
+        f"(threshold {threshold}, best {max(scores.values()):.3f})"
+    )
+    return kept
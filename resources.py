@@ -0,0 +1,222 @@
+"""
+Lazy registry for the expensive clients the graph nodes share.
+
+Nothing here is built at import time: the embedding model, the vector store client and
+the Neo4j schema are loaded on first use (or by `registry.warm_up()`), so importing
+`hybrid_chat` is fast and works offline. Each resource is built at most once, guarded by
+its own lock, and its build time is recorded for the cold-start benchmark.
+
+    @registry.resource("embed_model")
+    def embed_model():
+        ...
+
+    embed_model()          # builds on the first call, then returns the same instance
+    registry.warm_up()     # builds everything in a background thread
+
+Neo4j's enhanced schema introspection (one sampling query per label and relationship)
+is cached on disk in GRAPH_SCHEMA_CACHE_PATH and reused until load_to_neo4j.py changes
+the graph and calls `invalidate_graph_schema()`.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------
+class LazyResource:
+    """A value built by `factory` on the first call; calling it again returns the same value."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], enabled: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.factory = factory
+        self._enabled = enabled
+        self.build_ms: Optional[float] = None
+        self._value = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    @property
+    def enabled(self) -> bool:
+        """False for optional resources switched off in config; warm-up skips them."""
+        return self._enabled is None or self._enabled()
+
+    def __call__(self):
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                logger.info(f"Building resource '{self.name}'...")
+                self._value = self.factory()
+                self.build_ms = (time.perf_counter() - start) * 1000
+                self._built = True
+                logger.info(f"✅ Resource '{self.name}' ready in {self.build_ms:.0f}ms.")
+        return self._value
+
+    def override(self, value):
+        """Use `value` instead of building (benchmarks and offline runs)."""
+        with self._lock:
+            self._value, self._built, self.build_ms = value, True, 0.0
+
+    def reset(self):
+        with self._lock:
+            self._value, self._built, self.build_ms = None, False, None
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._resources: Dict[str, LazyResource] = {}
+
+    def resource(self, name: str, enabled: Optional[Callable[[], bool]] = None):
+        """Decorator registering a zero-argument factory under `name`."""
+        def register(factory: Callable[[], Any]) -> LazyResource:
+            if name in self._resources:
+                raise ValueError(f"Resource {name!r} is already registered")
+            self._resources[name] = LazyResource(name, factory, enabled)
+            return self._resources[name]
+        return register
+
+    def __getitem__(self, name: str) -> LazyResource:
+        return self._resources[name]
+
+    def names(self):
+        return list(self._resources)
+
+    def override(self, name: str, value):
+        self._resources[name].override(value)
+
+    def replace(self, name: str, factory: Callable[[], Any]):
+        """Swap the factory of a resource (still built lazily), dropping any built value."""
+        res = self._resources[name]
+        res.reset()
+        res.factory = factory
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Build the given resources (default: all registered and enabled). Failures are
+        logged, not raised: the owning node reports the error again on first real use.
+        """
+        if names is None:
+            targets = [res for res in self._resources.values() if res.enabled]
+        else:
+            targets = [self._resources[n] for n in names]
+
+        def run():
+            start = time.perf_counter()
+            for res in targets:
+                try:
+                    res()
+                except Exception:
+                    logger.exception(f"❌ Warm-up failed for resource '{res.name}'.")
+            logger.info(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f}ms.")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="resource-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Build time in ms per resource (None = not built yet)."""
+        return {name: res.build_ms for name, res in self._resources.items()}
+
+
+registry = ResourceRegistry()
+
+
+# ---------------------------------------------------------------------
+# Graph schema cache
+# ---------------------------------------------------------------------
+def load_graph_schema(path: str = config.GRAPH_SCHEMA_CACHE_PATH) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        logger.warning(f"Ignoring unreadable graph schema cache at {path}.")
+        return None
+
+
+def save_graph_schema(schema: str, structured_schema: dict, path: str = config.GRAPH_SCHEMA_CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"schema": schema, "structured_schema": structured_schema}, f, default=str)
+    os.replace(tmp, path)
+
+
+def invalidate_graph_schema(path: str = config.GRAPH_SCHEMA_CACHE_PATH):
+    """Called after the graph changes so the next start re-introspects it."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# ---------------------------------------------------------------------
+# Shared resources
+# ---------------------------------------------------------------------
+@registry.resource("embed_model")
+def embed_model():
+    """MiniLM sentence encoder (PyTorch or ONNX Runtime) behind the on-disk embedding cache."""
+    from embedding_cache import CachedEncoder
+
+    if config.EMBEDDING_BACKEND == "onnx":
+        from onnx_encoder import load_onnx_encoder, cache_name
+
+        return CachedEncoder(load_onnx_encoder(), cache_name())
+    from sentence_transformers import SentenceTransformer
+
+    return CachedEncoder(SentenceTransformer(config.EMBEDDING_MODEL_NAME), config.EMBEDDING_MODEL_NAME)
+
+
+@registry.resource("vector_store")
+def vector_store():
+    """Pinecone or the local in-process index, depending on config.VECTOR_BACKEND."""
+    from vector_store import get_vector_store
+
+    return get_vector_store()
+
+
+@registry.resource("graph_schema")
+def graph_schema() -> str:
+    """
+    Neo4j enhanced schema text for the Cypher generation prompt, from the disk cache when
+    possible. Queries themselves run on the shared driver in neo4j_access.py; the
+    Neo4jGraph client is only opened for introspection.
+    """
+    cached = load_graph_schema()
+    if cached is not None:
+        logger.info("Loaded Neo4j schema from cache.")
+        return cached["schema"]
+
+    from langchain_neo4j import Neo4jGraph
+
+    start = time.perf_counter()
+    graph = Neo4jGraph(
+        url=config.NEO4J_URI,
+        username=config.NEO4J_USERNAME,
+        password=config.NEO4J_PASSWORD,
+        database=config.NEO4J_DATABASE,
+        enhanced_schema=True,
+    )
+    try:
+        save_graph_schema(graph.schema, graph.structured_schema)
+    finally:
+        graph.close()
+    logger.info(f"Introspected Neo4j schema in {(time.perf_counter() - start) * 1000:.0f}ms and cached it.")
+    return graph.schema
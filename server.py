@@ -0,0 +1,246 @@
+"""
+Asyncio HTTP/WebSocket serving layer over the compiled LangGraph app.
+
+    uvicorn server:api --host 0.0.0.0 --port 8000
+    python server.py --port 8000
+
+Endpoints:
+    POST /ask   {"question": "..."} -> {"answer", "route", "timing"}
+    WS   /ws    send {"question": "..."}; receive {"type": "token"} events then {"type": "final"}
+    GET  /health
+    GET  /metrics   Prometheus text format (see tracing.py)
+
+Every request gets its own AgentState. At most MAX_CONCURRENT_REQUESTS workflows run
+at once; up to MAX_QUEUED_REQUESTS more wait (QUEUE_TIMEOUT_SECONDS at most) and the
+rest are rejected with 503. Workflows exceeding REQUEST_TIMEOUT_SECONDS get 504.
+On shutdown new requests are refused and in-flight ones drain before the executors stop.
+"""
+
+import time
+import asyncio
+import logging
+import argparse
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+import config
+import tracing
+from executors import shutdown_executors
+from neo4j_access import close_driver, query_stats
+from resources import registry
+from hybrid_chat import ask, ask_stream, RequestTiming
+from GraphNodes.pinecone_node import embed_batcher
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Admission control
+# -----------------------------
+class Overloaded(Exception):
+    """Raised when a request cannot get an execution slot."""
+
+
+class AdmissionController:
+    """Bounded concurrency + bounded, time-limited queue + drain on shutdown."""
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.in_flight = 0
+        self.draining = False
+        self.rejected = 0
+        self.completed = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.draining:
+            self._reject("draining")
+            raise Overloaded("server is shutting down")
+        if self.waiting >= self.max_queued:
+            self._reject("queue_full")
+            raise Overloaded("request queue is full")
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("queue_timeout")
+            raise Overloaded("timed out waiting for a free slot")
+        finally:
+            self.waiting -= 1
+        tracing.metrics.observe("travel_admission_wait_seconds", time.perf_counter() - start)
+
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+            if self.in_flight == 0:
+                self._idle.set()
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        tracing.metrics.inc("travel_requests_rejected_total", labels={"reason": reason})
+
+    async def drain(self, timeout: float):
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.in_flight} requests still running after {timeout}s grace period.")
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "draining": self.draining,
+        }
+
+
+# -----------------------------
+# Application
+# -----------------------------
+@asynccontextmanager
+async def lifespan(api: FastAPI):
+    tracing.configure_logging()
+    api.state.admission = AdmissionController(
+        config.MAX_CONCURRENT_REQUESTS, config.MAX_QUEUED_REQUESTS, config.QUEUE_TIMEOUT_SECONDS
+    )
+    if config.WARM_UP_ON_START:
+        registry.warm_up(background=config.WARM_UP_IN_BACKGROUND)
+    logger.info("Travel assistant server ready.")
+    yield
+    logger.info("Shutting down: refusing new requests and draining in-flight ones...")
+    await api.state.admission.drain(config.SHUTDOWN_GRACE_SECONDS)
+    shutdown_executors(wait=False)
+    close_driver()
+    tracing.shutdown_logging()
+
+
+api = FastAPI(title="Vietnam Travel Assistant", lifespan=lifespan)
+
+
+class AskRequest(BaseModel):
+    question: str
+
+
+def _admission(request_app) -> AdmissionController:
+    # Created lazily too, so the app also works under transports that skip the lifespan.
+    if not hasattr(request_app.state, "admission"):
+        request_app.state.admission = AdmissionController(
+            config.MAX_CONCURRENT_REQUESTS, config.MAX_QUEUED_REQUESTS, config.QUEUE_TIMEOUT_SECONDS
+        )
+    return request_app.state.admission
+
+
+@api.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        **_admission(api).stats(),
+        "resources_ms": registry.timings(),
+        "embedding_batcher": embed_batcher.metrics.stats(),
+        "neo4j_queries": query_stats.queries,
+    }
+
+
+@api.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of span latencies and counters."""
+    admission = _admission(api).stats()
+    gauges = "".join(
+        f"# TYPE travel_{k} gauge\ntravel_{k} {int(v)}\n" for k, v in admission.items() if k in ("in_flight", "waiting")
+    )
+    return tracing.metrics.render() + gauges
+
+
+@api.post("/ask")
+async def ask_endpoint(body: AskRequest):
+    question = body.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Empty question")
+
+    start = time.perf_counter()
+    try:
+        async with _admission(api).slot():
+            queued_ms = (time.perf_counter() - start) * 1000
+            final_state = await asyncio.wait_for(ask(question), timeout=config.REQUEST_TIMEOUT_SECONDS)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timed out")
+
+    return {
+        "answer": final_state.get("answer", ""),
+        "route": final_state.get("router_decision", ""),
+        "timing": {"queued_ms": queued_ms, "total_ms": (time.perf_counter() - start) * 1000},
+    }
+
+
+@api.websocket("/ws")
+async def ws_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Malformed JSON"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Expected a JSON object"})
+                continue
+            question = str(message.get("question", "")).strip()
+            if not question:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Empty question"})
+                continue
+            try:
+                async with _admission(api).slot():
+                    timing = RequestTiming()
+
+                    async def stream():
+                        async for kind, payload in ask_stream(question, timing):
+                            if kind == "token":
+                                await websocket.send_json({"type": "token", "text": payload})
+                            else:
+                                await websocket.send_json({
+                                    "type": "final",
+                                    "answer": payload.get("answer", ""),
+                                    "route": payload.get("router_decision", ""),
+                                    "timing": {"ttft_ms": timing.ttft_ms, "total_ms": timing.total_ms},
+                                })
+
+                    await asyncio.wait_for(stream(), timeout=config.REQUEST_TIMEOUT_SECONDS)
+            except Overloaded as e:
+                await websocket.send_json({"type": "error", "status": 503, "detail": str(e)})
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "error", "status": 504, "detail": "Request timed out"})
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected.")
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the travel assistant over HTTP/WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(api, host=args.host, port=args.port, timeout_graceful_shutdown=int(config.SHUTDOWN_GRACE_SECONDS))
@@ -0,0 +1,298 @@
+"""
+Per-request tracing and Prometheus-style metrics.
+
+Each request runs inside `trace(...)`; nodes, executor calls, Neo4j transactions and
+embedding lookups open nested `span(...)`s that record wall time and attributes (cache
+hits, Cypher source, LLM token counts, executor queue time). When the request finishes
+its spans are written as one JSON line to TRACE_FILE, so a single trace shows where
+its latency went:
+
+    {"trace_id": "...", "name": "ask", "total_ms": 812.4, "attrs": {...},
+     "spans": [{"id": 1, "parent": null, "name": "node:router", "start_ms": 0.3, "duration_ms": 1.2, ...}, ...]}
+
+Span durations and counters are also aggregated in `metrics`, rendered in Prometheus
+text format by server.py at GET /metrics.
+
+Nothing is written to disk on the request path: trace lines and application logs go
+through a QueueHandler to a QueueListener thread that owns the file handlers.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("travel.traces")
+
+
+# ---------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms, rendered in Prometheus text format."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+
+    @staticmethod
+    def _key(labels: Optional[dict]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+    def inc(self, name: str, value: float = 1, labels: Optional[dict] = None):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Optional[dict] = None):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # [bucket counts..., sum, count]
+            h = series.setdefault(self._key(labels), [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    @staticmethod
+    def _labels(key: LabelKey, extra: str = "") -> str:
+        parts = [f'{k}="{v}"' for k, v in key] + ([extra] if extra else [])
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines += [f"{name}{self._labels(k)} {v}" for k, v in sorted(series.items())]
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(series.items()):
+                    for bound, n in zip(self.buckets, h):
+                        le = self._labels(key, 'le="%s"' % bound)
+                        lines.append(f"{name}_bucket{le} {n}")
+                    le = self._labels(key, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{le} {h[-1]}")
+                    lines.append(f"{name}_sum{self._labels(key)} {h[-2]}")
+                    lines.append(f"{name}_count{self._labels(key)} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# ---------------------------------------------------------------------
+# Spans and traces
+# ---------------------------------------------------------------------
+@dataclass
+class Span:
+    name: str
+    id: int
+    parent: Optional[int]
+    start: float = field(default_factory=time.perf_counter)
+    duration_ms: Optional[float] = None
+    attrs: dict = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.perf_counter)
+    attrs: dict = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    _ids: int = 0
+
+    def next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "attrs": self.attrs,
+            "spans": [
+                {
+                    "id": s.id, "parent": s.parent, "name": s.name,
+                    "start_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration_ms or 0.0, 3),
+                    **({"attrs": s.attrs} if s.attrs else {}),
+                }
+                for s in sorted(self.spans, key=lambda s: s.start)
+            ],
+        }, ensure_ascii=False, default=str)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """Root of one request; its spans are exported when it ends."""
+    if not config.TRACING_ENABLED:
+        yield None
+        return
+    t = Trace(name, attrs=dict(attrs))
+    trace_token = _current_trace.set(t)
+    span_token = _current_span.set(None)
+    try:
+        yield t
+    finally:
+        try:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+        except ValueError:
+            pass  # an async generator closed from another context; its context is discarded anyway
+        metrics.observe("travel_request_seconds", time.perf_counter() - t.start, {"name": name})
+        trace_logger.info(t.to_json())
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Timed section inside the current trace (metrics are still recorded without one)."""
+    if not config.TRACING_ENABLED:
+        yield None
+        return
+    t = _current_trace.get()
+    parent = _current_span.get()
+    s = Span(name, t.next_id() if t else 0, parent.id if parent else None, attrs=dict(attrs))
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        s.duration_ms = (time.perf_counter() - s.start) * 1000
+        if t is not None:
+            t.spans.append(s)
+        metrics.observe("travel_span_seconds", s.duration_ms / 1000, {"span": name})
+
+
+def set_attr(key: str, value):
+    """Attach an attribute to the innermost open span (or the trace)."""
+    target = _current_span.get() or _current_trace.get()
+    if target is not None:
+        target.attrs[key] = value
+
+
+def count(key: str, n: float = 1, **labels):
+    """Add `n` to a span attribute and to the `travel_<key>_total` counter."""
+    target = _current_span.get() or _current_trace.get()
+    if target is not None:
+        target.attrs[key] = target.attrs.get(key, 0) + n
+    metrics.inc(f"travel_{key.replace('.', '_')}_total", n, labels)
+
+
+def traced_node(name: str, fn):
+    """`wrap` for hybrid_chat.build_app: one span per node execution."""
+    async def node(state):
+        with span(f"node:{name}"):
+            return await fn(state)
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
+
+
+# ---------------------------------------------------------------------
+# LLM token usage
+# ---------------------------------------------------------------------
+class TokenUsageHandler(BaseCallbackHandler):
+    """Adds LLM token counts to the span of the node that made the call."""
+
+    run_inline = True  # run in the caller's context so the current span is visible
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        count("llm.streamed_chunks")
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for gen in generations:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    count("llm.input_tokens", usage.get("input_tokens", 0))
+                    count("llm.output_tokens", usage.get("output_tokens", 0))
+
+
+token_usage_handler = TokenUsageHandler()
+
+
+def callbacks() -> list:
+    """Callbacks to pass in the workflow's RunnableConfig."""
+    return [token_usage_handler] if config.TRACING_ENABLED else []
+
+
+# ---------------------------------------------------------------------
+# Non-blocking export
+# ---------------------------------------------------------------------
+_listeners: List[QueueListener] = []
+_configure_lock = threading.Lock()
+
+
+def _file_handler(path: str, fmt: str) -> logging.Handler:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(fmt))
+    return handler
+
+
+def configure_logging():
+    """
+    Route application logs (LOG_FILE) and traces (TRACE_FILE) through queues drained by
+    background listeners. Safe to call more than once.
+    """
+    with _configure_lock:
+        if _listeners:
+            return
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(QueueHandler(log_queue))
+        _listeners.append(QueueListener(
+            log_queue, _file_handler(config.LOG_FILE, "%(asctime)s | %(name)s | %(levelname)s | %(message)s")
+        ))
+
+        if config.TRACING_ENABLED:
+            trace_queue = queue.SimpleQueue()
+            trace_logger.setLevel(logging.INFO)
+            trace_logger.propagate = False  # trace lines go to the trace file only
+            trace_logger.addHandler(QueueHandler(trace_queue))
+            _listeners.append(QueueListener(trace_queue, _file_handler(config.TRACE_FILE, "%(message)s")))
+
+        for listener in _listeners:
+            listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener threads."""
+    with _configure_lock:
+        for listener in _listeners:
+            listener.stop()
+        _listeners.clear()
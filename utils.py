@@ -5,11 +5,12 @@ Utility to initialize and return a configured LLM for use in LangChain pipelines
 from langchain_openai import ChatOpenAI
 import os
 from dotenv import load_dotenv
+import config
 load_dotenv()
 
 
 def get_llm(
-    model_name: str = "gpt-4o-mini",
+    model_name: str = config.LLM_MODEL_NAME,
     temperature: float = 0.0,
     max_tokens: int = 1024,
     api_key: str | None = None,
@@ -18,7 +19,7 @@ def get_llm(
     Initializes and returns an OpenAI Chat model instance.
 
     Args:
-        model_name (str): The model name to use. Defaults to 'gpt-4o-mini'.
+        model_name (str): The model name to use. Defaults to config.LLM_MODEL_NAME.
         temperature (float): The creativity level of the model. Defaults to 0.0.
         max_tokens (int): Maximum output tokens. Defaults to 1024.
         api_key (str, optional): Custom OpenAI API key. If not provided, reads from env.
@@ -41,6 +42,7 @@ def get_llm(
         temperature=temperature,
         max_tokens=max_tokens,
         api_key=api_key,
+        stream_usage=True,  # token counts for streamed completions too (see tracing.py)
     )
 
     return llm
\ No newline at end of file
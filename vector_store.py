@@ -0,0 +1,347 @@
+"""
+Pluggable vector store used by the Pinecone search node and pinecone_upload.py.
+
+Both backends expose the subset of the Pinecone index API the repo uses
+(`upsert`, `query`, `delete`) and return Pinecone-shaped results, so callers do not
+care which one `get_vector_store()` hands back:
+
+- "pinecone": the managed Pinecone index (network round trip per query).
+- "local":    an in-process NumPy matrix of normalized embeddings, memory-mapped
+              from disk and searched with a blocked matrix-vector product + argpartition
+              (optionally over int8 / binary codes, see quantization.py).
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BLOCK_ROWS = 65536  # rows scored per block, bounds temporary memory on large mmaps
+
+
+# ---------------------------------------------------------------------
+# Metadata filters (Pinecone filter syntax subset)
+# ---------------------------------------------------------------------
+def _match_value(value, cond) -> bool:
+    """Evaluate one field condition. List-valued fields (e.g. tags) match if any element does."""
+    if not isinstance(cond, dict):
+        cond = {"$eq": cond}
+    values = value if isinstance(value, list) else [value]
+    for op, arg in cond.items():
+        if op == "$eq":
+            ok = arg in values
+        elif op == "$ne":
+            ok = arg not in values
+        elif op == "$in":
+            ok = any(v in arg for v in values)
+        elif op == "$nin":
+            ok = not any(v in arg for v in values)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches_filter(metadata: dict, flt: Optional[dict]) -> bool:
+    """Return True if `metadata` satisfies a Pinecone-style filter (`$eq/$ne/$in/$nin/$and/$or`)."""
+    if not flt:
+        return True
+    for key, cond in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in cond):
+                return False
+        elif not _match_value(metadata.get(key), cond):
+            return False
+    return True
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+def as_list(vector) -> list:
+    """Plain float list for the Pinecone client; local backends take NumPy arrays as they are."""
+    return vector.tolist() if isinstance(vector, np.ndarray) else list(vector)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first (argpartition, then sort only k)."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+# ---------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------
+class VectorStore:
+    """Interface shared by all backends (mirrors the Pinecone index methods we use)."""
+
+    def upsert(self, vectors: List[dict]):
+        raise NotImplementedError
+
+    def query(self, vector, top_k: int, filter: Optional[dict] = None,
+              include_metadata: bool = True, include_values: bool = False) -> dict:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist pending writes (no-op for remote backends)."""
+
+
+class PineconeVectorStore(VectorStore):
+    """Thin wrapper over a Pinecone index; creates the index if it does not exist yet."""
+
+    def __init__(self, index_name: str = config.PINECONE_INDEX_NAME, dimension: int = config.PINECONE_VECTOR_DIM):
+        from pinecone import Pinecone, ServerlessSpec
+
+        logger.info("Initializing Pinecone client...")
+        pc = Pinecone(api_key=config.PINECONE_API_KEY)
+        if index_name not in pc.list_indexes().names():
+            logger.warning(f"Index {index_name} not found. Creating new managed index...")
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+            )
+            logger.info(f"✅ Index {index_name} created.")
+        else:
+            logger.info(f"Connecting to existing index: {index_name}")
+        self.index = pc.Index(index_name)
+
+    def upsert(self, vectors):
+        return self.index.upsert([{**v, "values": as_list(v["values"])} for v in vectors])
+
+    def query(self, vector, top_k, filter=None, include_metadata=True, include_values=False):
+        kwargs = {"filter": filter} if filter else {}
+        return self.index.query(
+            vector=as_list(vector),
+            top_k=top_k,
+            include_metadata=include_metadata,
+            include_values=include_values,
+            **kwargs,
+        )
+
+    def delete(self, ids):
+        return self.index.delete(ids=ids)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Exact cosine search over normalized float32 embeddings stored in `<path>/vectors.npy`
+    (opened with mmap) plus `<path>/metadata.json`. Writes are staged in memory and
+    persisted by `flush()`.
+    """
+
+    def __init__(self, path: str = config.LOCAL_VECTOR_DIR, dimension: int = config.PINECONE_VECTOR_DIM):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._meta: List[dict] = []
+        self._pos: Dict[str, int] = {}
+        self._alive = np.ones(0, dtype=bool)
+        self._staged: List[np.ndarray] = []
+        self._dirty = False
+        self._mask_cache: Dict[str, np.ndarray] = {}
+        self._load()
+
+    # -- persistence ---------------------------------------------------
+    @property
+    def _vectors_file(self):
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def _meta_file(self):
+        return os.path.join(self.path, "metadata.json")
+
+    def _load(self):
+        if not (os.path.exists(self._vectors_file) and os.path.exists(self._meta_file)):
+            logger.info(f"No local vector index at {self.path}; starting empty.")
+            return
+        self._matrix = np.load(self._vectors_file, mmap_mode="r")
+        with open(self._meta_file, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self._ids = [r["id"] for r in records]
+        self._meta = [r["metadata"] for r in records]
+        self._pos = {_id: i for i, _id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        logger.info(f"Loaded local vector index ({len(self._ids)} vectors) from {self.path}.")
+
+    def flush(self):
+        with self._lock:
+            self._consolidate()
+            if not self._dirty:
+                return
+            keep = np.flatnonzero(self._alive)
+            matrix = np.ascontiguousarray(self._matrix[keep], dtype=np.float32)
+            records = [{"id": self._ids[i], "metadata": self._meta[i]} for i in keep]
+
+            os.makedirs(self.path, exist_ok=True)
+            tmp_vectors = self._vectors_file + ".tmp.npy"
+            tmp_meta = self._meta_file + ".tmp"
+            np.save(tmp_vectors, matrix)
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False)
+            os.replace(tmp_vectors, self._vectors_file)
+            os.replace(tmp_meta, self._meta_file)
+
+            self._dirty = False
+            self._mask_cache.clear()
+            self._load()
+
+    # -- writes --------------------------------------------------------
+    def _writable(self):
+        if isinstance(self._matrix, np.memmap) or not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix, dtype=np.float32)
+
+    def _consolidate(self):
+        """Append staged rows to the matrix in one copy."""
+        if self._staged:
+            self._matrix = np.vstack([np.asarray(self._matrix), *self._staged]).astype(np.float32, copy=False)
+            self._staged = []
+
+    def upsert(self, vectors):
+        vectors = list({v["id"]: v for v in vectors}.values())  # last write wins within a batch
+        with self._lock:
+            new_rows = []
+            for v in vectors:
+                vec = _normalize(np.asarray(v["values"], dtype=np.float32))
+                meta = v.get("metadata", {}) or {}
+                row = self._pos.get(v["id"])
+                if row is not None and self._alive[row]:
+                    self._consolidate()
+                    self._writable()
+                    self._matrix[row] = vec
+                    self._meta[row] = meta
+                    continue
+                self._pos[v["id"]] = len(self._ids)
+                self._ids.append(v["id"])
+                self._meta.append(meta)
+                new_rows.append(vec)
+            if new_rows:
+                self._staged.append(np.stack(new_rows))
+                self._alive = np.concatenate([self._alive, np.ones(len(new_rows), dtype=bool)])
+            self._dirty = True
+            self._mask_cache.clear()
+
+    def delete(self, ids):
+        with self._lock:
+            for _id in ids:
+                row = self._pos.pop(_id, None)
+                if row is not None:
+                    self._alive[row] = False
+            self._dirty = True
+            self._mask_cache.clear()
+
+    # -- reads ---------------------------------------------------------
+    def _filter_mask(self, flt: Optional[dict]) -> np.ndarray:
+        if not flt:
+            return self._alive
+        key = json.dumps(flt, sort_keys=True)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = self._alive & np.fromiter(
+                (matches_filter(m, flt) for m in self._meta), dtype=bool, count=len(self._meta)
+            )
+            self._mask_cache[key] = mask
+        return mask
+
+    def _score_block(self, queries: np.ndarray, rows: np.ndarray, start: int, contiguous: bool) -> np.ndarray:
+        """(q, len(rows)) similarity of normalized queries to the given rows."""
+        if contiguous:
+            block = self._matrix[start : start + len(rows)]
+        else:
+            block = self._matrix[rows]
+        return queries @ np.asarray(block).T
+
+    def search(self, queries: np.ndarray, top_k: int, filter: Optional[dict] = None):
+        """
+        Batched exact search: `queries` is (q, dim). Returns a list (one per query)
+        of (row indices, scores), best first.
+        """
+        with self._lock:
+            self._consolidate()
+            queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+            mask = self._filter_mask(filter)
+            n = len(self._ids)
+            best_rows = [np.empty(0, dtype=np.int64) for _ in range(len(queries))]
+            best_scores = [np.empty(0, dtype=np.float32) for _ in range(len(queries))]
+
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                block_mask = mask[start : start + SEARCH_BLOCK_ROWS]
+                rows = np.flatnonzero(block_mask) + start
+                if len(rows) == 0:
+                    continue
+                scores = self._score_block(queries, rows, start, len(rows) == len(block_mask))  # (q, rows)
+                for qi in range(len(queries)):
+                    cand_rows = np.concatenate([best_rows[qi], rows])
+                    cand_scores = np.concatenate([best_scores[qi], scores[qi]])
+                    keep = top_k_indices(cand_scores, top_k)
+                    best_rows[qi] = cand_rows[keep]
+                    best_scores[qi] = cand_scores[keep]
+            return list(zip(best_rows, best_scores))
+
+    def _format(self, rows, scores, include_metadata, include_values):
+        matches = []
+        for row, score in zip(rows, scores):
+            match = {"id": self._ids[row], "score": float(score)}
+            if include_metadata:
+                match["metadata"] = self._meta[row]
+            if include_values:
+                match["values"] = np.asarray(self._matrix[row]).tolist()
+            matches.append(match)
+        return {"matches": matches}
+
+    def query(self, vector, top_k, filter=None, include_metadata=True, include_values=False):
+        (rows, scores), = self.search(np.asarray(vector, dtype=np.float32)[None, :], top_k, filter)
+        return self._format(rows, scores, include_metadata, include_values)
+
+    def query_many(self, vectors, top_k, filter=None, include_metadata=True, include_values=False):
+        """Answer several queries with one matrix product per block."""
+        return [
+            self._format(rows, scores, include_metadata, include_values)
+            for rows, scores in self.search(np.asarray(vectors, dtype=np.float32), top_k, filter)
+        ]
+
+    def __len__(self):
+        return int(self._alive.sum())
+
+
+# ---------------------------------------------------------------------
+# Factory
+# ---------------------------------------------------------------------
+def get_vector_store(backend: str = config.VECTOR_BACKEND) -> VectorStore:
+    """
+    Build the backend selected by `config.VECTOR_BACKEND` ("pinecone" or "local");
+    the local backend uses the IVF index when `config.LOCAL_INDEX_TYPE == "ivf"`, and
+    otherwise scans quantized codes when `config.LOCAL_QUANTIZATION` is set.
+    """
+    if backend == "local":
+        if config.LOCAL_INDEX_TYPE == "ivf":
+            from ann_index import IVFVectorStore
+            return IVFVectorStore()
+        if config.LOCAL_QUANTIZATION != "none":
+            from quantization import QuantizedVectorStore
+            return QuantizedVectorStore()
+        return LocalVectorStore()
+    if backend == "pinecone":
+        return PineconeVectorStore()
+    raise ValueError(f"Unknown vector backend: {backend!r}")
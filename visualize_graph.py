@@ -1,13 +1,10 @@
 # visualize_graph.py
-from neo4j import GraphDatabase
 from pyvis.network import Network
 import networkx as nx
-import config
+from neo4j_access import session, close_driver
 
 NEO_BATCH = 500  # number of relationships to fetch / visualize
 
-driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD))
-
 def fetch_subgraph(tx, limit=500):
     # fetch nodes and relationships up to a limit
     q = (
@@ -34,8 +31,9 @@ def build_pyvis(rows, output_html="neo4j_viz.html"):
     print(f"Saved visualization to {output_html}")
 
 def main():
-    with driver.session() as session:
-        rows = session.execute_read(fetch_subgraph, limit=NEO_BATCH)
+    with session() as s:
+        rows = s.execute_read(fetch_subgraph, limit=NEO_BATCH)
+    close_driver()
     build_pyvis(rows)
 
 if __name__ == "__main__":